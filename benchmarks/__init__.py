@@ -0,0 +1,6 @@
+"""
+CodA performance benchmarks
+
+Run each benchmark from the repository root as a module, e.g., `python -m benchmarks.parse_modes`.
+
+"""
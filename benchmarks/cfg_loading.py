@@ -0,0 +1,80 @@
+"""
+
+Compare loading saved CFGs into `ControlFlowGraph` from text files and from one binary file
+
+Synthetic function CFGs, a chain of blocks with a branch and a loop edge every few blocks, are
+written by the text and the binary `coda.graph.cfg_sinks`. Then all the CFGs are loaded, from the
+`<id>.txt` files as `main.py` does and from `cfgs.bin` with `ControlFlowGraph.load_binary`. The
+loaded graphs of both formats must be equal.
+
+Usage:
+
+    python -m benchmarks.cfg_loading [--functions 1000] [--nodes 50]
+
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from coda.analysis.paths.prime_path_extractor import ControlFlowGraph
+from coda.graph.cfg_sinks import BinaryCFGSink, TextCFGSink
+
+
+def synthetic_cfg(n: int):
+    edges = []
+    for i in range(1, n):
+        edges.append((i, i + 1))
+        if i % 5 == 0 and i + 3 <= n:
+            edges.append((i, i + 3))
+        if i % 7 == 0:
+            edges.append((i, i - 4))
+    return edges, {1}, {n}
+
+
+def load_text(directory: Path, function_ids) -> dict:
+    cfgs = {}
+    for function_id in function_ids:
+        with open(directory / '{0}.txt'.format(function_id)) as cfg_file:
+            cfgs[function_id] = ControlFlowGraph(cfg_file)
+    return cfgs
+
+
+def main(args):
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        function_ids = range(1, args.functions + 1)
+        with TextCFGSink(directory) as text_sink, BinaryCFGSink(directory) as binary_sink:
+            for function_id in function_ids:
+                edges, initial_nodes, final_nodes = synthetic_cfg(args.nodes + function_id % 10)
+                text_sink.write_cfg(function_id, edges, initial_nodes, final_nodes)
+                binary_sink.write_cfg(function_id, edges, initial_nodes, final_nodes)
+
+        start = time.perf_counter()
+        text_cfgs = load_text(directory, function_ids)
+        text_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        binary_cfgs = ControlFlowGraph.load_binary(directory / binary_sink.path.name)
+        binary_seconds = time.perf_counter() - start
+
+    for function_id in function_ids:
+        text_cfg, binary_cfg = text_cfgs[function_id], binary_cfgs[function_id]
+        if (text_cfg.edges, text_cfg.nodes, text_cfg.inits, text_cfg.finals) != \
+                (binary_cfg.edges, binary_cfg.nodes, binary_cfg.inits, binary_cfg.finals):
+            print('The CFGs of function {0} differ'.format(function_id))
+            return 1
+    print('{0} CFGs of about {1} nodes'.format(args.functions, args.nodes))
+    print('{0:>8} {1:>10}'.format('format', 'load ms'))
+    print('{0:>8} {1:10.1f}'.format('text', text_seconds * 1e3))
+    print('{0:>8} {1:10.1f}'.format('binary', binary_seconds * 1e3))
+    return 0
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--functions', type=int, default=1000, help='The number of function CFGs')
+    arg_parser.add_argument('--nodes', type=int, default=50, help='The number of blocks of each CFG')
+    args = arg_parser.parse_args()
+    sys.exit(main(args))
@@ -0,0 +1,82 @@
+"""
+
+Compare the aggregation of prime path coverage over lists with `CoverageMatrix`
+
+A random coverage of `--tests` tests × `--paths` prime paths is aggregated as `coda/main.py`
+did, by OR-ing the 0/1 lists of the tests together and counting the toured paths, and by
+`CoverageMatrix.percentage`, which must agree. The sizes of the coverage saved as
+`covered_primepaths.json` and as `.npz` are compared as well.
+
+Usage:
+
+    python -m benchmarks.coverage_aggregation [--tests 2000] [--paths 3000] [--density 0.01]
+
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from coda.analysis.paths.coverage_matrix import TOURING_MODES, CoverageMatrix, save_coverage
+
+
+def list_percentage(coverage: dict, number_of_paths: int) -> float:
+    total_cover = [0] * number_of_paths
+    for testcase in coverage:
+        total_cover = [x or y for x, y in zip(total_cover, coverage[testcase])]
+    return sum(total_cover) / len(total_cover) * 100
+
+
+def main(args):
+    rng = np.random.default_rng(args.seed)
+    tests = ['test{0}.txt'.format(i) for i in range(args.tests)]
+    matrices = {mode: rng.random((args.tests, args.paths)) < args.density for mode in TOURING_MODES}
+    matrix = CoverageMatrix(tests, args.paths, matrices)
+    coverage = {mode: matrix.to_json(mode) for mode in TOURING_MODES}
+
+    start = time.perf_counter()
+    list_percentages = [list_percentage(coverage[mode], args.paths) for mode in TOURING_MODES]
+    list_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    matrix_percentages = [matrix.percentage(mode) for mode in TOURING_MODES]
+    for mode in TOURING_MODES:
+        matrix.contributions(mode)
+    matrix_seconds = time.perf_counter() - start
+    if list_percentages != matrix_percentages:
+        print('The coverage percentages differ')
+        return 1
+
+    with tempfile.TemporaryDirectory() as directory:
+        json_path = os.path.join(directory, 'covered_primepaths.json')
+        with open(json_path, 'w') as coverage_json:
+            json.dump({mode: {'1': coverage[mode]} for mode in TOURING_MODES}, coverage_json)
+        npz_path = os.path.join(directory, 'covered_primepaths.npz')
+        save_coverage(npz_path, {'1': matrix})
+        json_size, npz_size = os.path.getsize(json_path), os.path.getsize(npz_path)
+    print('{0} tests x {1} prime paths: lists {2:.3f} s, matrix {3:.3f} s with contributions ({4:.0f}x)'.format(
+        args.tests, args.paths, list_seconds, matrix_seconds, list_seconds / matrix_seconds))
+    print('covered_primepaths.json {0} bytes, .npz {1} bytes'.format(json_size, npz_size))
+    return 0
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument(
+        '--tests', type=int,
+        help='The number of tests', default=2000)
+    arg_parser.add_argument(
+        '--paths', type=int,
+        help='The number of prime paths of the function', default=3000)
+    arg_parser.add_argument(
+        '--density', type=float,
+        help='The probability that a test tours a prime path', default=0.01)
+    arg_parser.add_argument(
+        '--seed', type=int,
+        help='The seed of the random coverage', default=1)
+    args = arg_parser.parse_args()
+    sys.exit(main(args))
@@ -0,0 +1,110 @@
+"""
+
+Compare the original prime path coverage matchers with `ExecutionPathIndex`
+
+For each function of the sources with at least `--min-paths` and at most `--max-paths` prime
+paths, `--traces` execution paths of `--length` nodes are generated by random walks over its
+CFG, which start again from the initial node at the final node, as the probes log the calls of a
+function during a test. The coverage vectors of all the prime paths in the three touring
+modes are computed by the original matchers and by `prime_path_coverage`, which must agree.
+
+Usage:
+
+    python -m benchmarks.coverage_matcher [--files "test_data/student_projects/*.cpp"] [--length 1000]
+
+"""
+
+import argparse
+import glob
+import random
+import sys
+import time
+
+from coda.analysis.cfg.frontend import get_front_end
+from coda.analysis.paths.prime_path_coverage import (checkCoverWithDetour, checkCoverWithSideAndDetour,
+                                                     checkCoverWithSidetour, prime_path_coverage)
+from coda.analysis.paths.prime_path_extractor import ControlFlowGraph
+from coda.batch import cfg_summary
+
+
+def random_trace(cfg: ControlFlowGraph, length: int, rng: random.Random) -> list:
+    """
+    A random execution path of `length` nodes, of calls of the function one after another, as the
+    probes log them for a test
+
+    """
+    initial = next(iter(cfg.inits))
+    trace = []
+    node = initial
+    while len(trace) < length:
+        trace.append(node)
+        node = rng.choice(cfg.edges[node]) if node not in cfg.finals and node in cfg.edges else initial
+    return trace
+
+
+def original_coverage(prime_paths, trace):
+    return ([int(checkCoverWithSideAndDetour(path, trace)) for path in prime_paths],
+            [int(checkCoverWithSidetour(path, trace)) for path in prime_paths],
+            [int(checkCoverWithDetour(path, trace)) for path in prime_paths])
+
+
+def main(args):
+    rng = random.Random(args.seed)
+    front_end = get_front_end(args.front_end)
+    print('{0:>40} {1:>12} {2:>10} {3:>12} {4:>10} {5:>8}'.format(
+        'function', 'prime paths', 'trace', 'original s', 'index s', 'speedup'))
+    for path in sorted(p for pattern in args.files for p in glob.glob(pattern)):
+        functions = front_end.extract_cfgs_from_file(path, encoding='latin1')
+        for i, g in enumerate(functions.values(), start=1):
+            summary = cfg_summary(g)
+            if len(summary["edges"]) < 2:
+                continue
+            cfg = ControlFlowGraph.from_edges(summary["edges"], summary["initial_nodes"], summary["final_nodes"])
+            paths = cfg.iterPrimePaths(max_paths=args.max_paths)
+            prime_paths = list(paths)
+            if paths.truncated is not None or len(prime_paths) < args.min_paths:
+                continue
+            traces = [random_trace(cfg, args.length, rng) for _ in range(args.traces)]
+            start = time.perf_counter()
+            original = [original_coverage(prime_paths, trace) for trace in traces]
+            original_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            indexed = [prime_path_coverage(prime_paths, trace) for trace in traces]
+            index_seconds = time.perf_counter() - start
+            name = '{0}:{1}'.format(path[-34:], i)
+            if [tuple(vectors) for vectors in indexed] != original:
+                print('The coverage of {0} differs'.format(name))
+                return 1
+            print('{0:>40} {1:12} {2:10.0f} {3:12.3f} {4:10.3f} {5:8.1f}'.format(
+                name, len(prime_paths), sum(map(len, traces)) / len(traces), original_seconds, index_seconds,
+                original_seconds / index_seconds))
+    return 0
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument(
+        '--files', nargs='+',
+        help='Glob patterns of the sources',
+        default=['test_data/student_projects/*.cpp'])
+    arg_parser.add_argument(
+        '--min-paths', type=int,
+        help='The fewest prime paths of a measured function', default=100)
+    arg_parser.add_argument(
+        '--max-paths', type=int,
+        help='The most prime paths of a measured function', default=5000)
+    arg_parser.add_argument(
+        '--traces', type=int,
+        help='The number of execution paths per function', default=5)
+    arg_parser.add_argument(
+        '--length', type=int,
+        help='The number of nodes of each execution path', default=1000)
+    arg_parser.add_argument(
+        '--seed', type=int,
+        help='The seed of the random walks', default=1)
+    arg_parser.add_argument(
+        '--front-end',
+        help='The CFG front-end, antlr or tree-sitter',
+        default='tree-sitter')
+    args = arg_parser.parse_args()
+    sys.exit(main(args))
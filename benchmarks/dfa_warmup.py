@@ -0,0 +1,76 @@
+"""
+
+Compare cold and warm parse times with a persisted ANTLR DFA cache
+
+First, the DFAs are warmed up by parsing all the files once and saved with `save_dfa_cache`.
+Then each file is parsed twice: cold, from empty DFAs as in a fresh process, and warm,
+right after preloading the saved DFAs with `load_dfa_cache`.
+
+Usage:
+
+    python -m benchmarks.dfa_warmup [--files "test_data/simple/*/*.c" "test_data/yaml_cpp_src/*.cpp"]
+
+"""
+
+import argparse
+import glob
+import os
+import tempfile
+import time
+
+from coda.analysis.dfa_cache import load_dfa_cache, save_dfa_cache, reset_dfa_cache
+from coda.analysis.parse_session import ParseSession, PARSE_MODES
+
+
+def time_parse(path, parse_mode):
+    session = ParseSession.from_file(path, parse_mode=parse_mode)
+    start = time.perf_counter()
+    session.parse_tree
+    return time.perf_counter() - start
+
+
+def main(args):
+    files = sorted(f for pattern in args.files for f in glob.glob(pattern))
+    cache_path = args.cache or os.path.join(tempfile.mkdtemp(), 'coda_dfa.pickle')
+
+    reset_dfa_cache()
+    start = time.perf_counter()
+    for path in files:
+        time_parse(path, args.parse_mode)
+    save_dfa_cache(cache_path)
+    print('Warm-up run: {0:.2f}s, cache size: {1} bytes'.format(time.perf_counter() - start,
+                                                                os.path.getsize(cache_path)))
+
+    start = time.perf_counter()
+    load_dfa_cache(cache_path)
+    print('Cache load time: {0:.2f}s'.format(time.perf_counter() - start))
+
+    print('{0:50} {1:>10} {2:>10}'.format('file', 'cold', 'warm'))
+    total_cold = total_warm = 0.0
+    for path in files:
+        reset_dfa_cache()
+        cold = time_parse(path, args.parse_mode)
+        load_dfa_cache(cache_path)
+        warm = time_parse(path, args.parse_mode)
+        total_cold += cold
+        total_warm += warm
+        print('{0:50} {1:10.2f} {2:10.2f}'.format(path[-50:], cold, warm))
+    print('{0:50} {1:10.2f} {2:10.2f}'.format('total', total_cold, total_warm))
+    if total_warm > 0:
+        print('speedup: {0:.2f}x'.format(total_cold / total_warm))
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument(
+        '--files', nargs='+',
+        help='Glob patterns of the input sources',
+        default=['test_data/simple/*/*.c', 'test_data/yaml_cpp_src/*.cpp'])
+    arg_parser.add_argument(
+        '--parse-mode', choices=PARSE_MODES,
+        help='Prediction mode of the parser', default='two_stage')
+    arg_parser.add_argument(
+        '--cache',
+        help='Path of the DFA cache file, a temporary file if not given', default=None)
+    args = arg_parser.parse_args()
+    main(args)
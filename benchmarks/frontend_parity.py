@@ -0,0 +1,82 @@
+"""
+
+Compare the CFGs and the speed of the ANTLR and tree-sitter front-ends
+
+Each source is analyzed by both front-ends of `coda.analysis.cfg.frontend`. The functions are matched
+by the text of their declarators, and their CFGs are compared node by node: the edges with their
+states and the text of the rules in each block must be the same.
+It requires the optional `tree-sitter` and `tree-sitter-cpp` packages.
+
+Usage:
+
+    python -m benchmarks.frontend_parity [--files "test_data/simple/*/*.c"] [-v]
+
+"""
+
+import argparse
+import glob
+import sys
+import time
+
+from coda.analysis.cfg.frontend import get_front_end
+
+
+def cfg_signature(g) -> tuple:
+    blocks = tuple((label, tuple(None if rule is None else rule.getText() for rule in data))
+                   for label, data in sorted(g.nodes_data()))
+    return blocks, tuple(sorted(g.edges(), key=lambda e: e[:2]))
+
+
+def extract(front_end, source):
+    start = time.perf_counter()
+    try:
+        functions = front_end.extract_cfgs(source)
+    except Exception as e:
+        return None, '{0}: {1}'.format(type(e).__name__, e), time.perf_counter() - start
+    seconds = time.perf_counter() - start
+    return {declarator.getText(): cfg_signature(g) for declarator, g in functions.items()}, None, seconds
+
+
+def main(args):
+    files = sorted(f for pattern in args.files for f in glob.glob(pattern))
+    front_ends = [get_front_end('antlr'), get_front_end('tree-sitter')]
+    print('{0:50} {1:>9} {2:>9} {3:>9} {4:>9} {5:>9}'.format(
+        'file', 'antlr s', 'ts s', 'functions', 'same', 'different'))
+    total = [0.0, 0.0]
+    mismatches = 0
+    for path in files:
+        with open(path, encoding='utf8', errors='replace') as f:
+            source = f.read()
+        (antlr, antlr_error, antlr_seconds), (ts, ts_error, ts_seconds) = (extract(fe, source) for fe in front_ends)
+        total[0] += antlr_seconds
+        total[1] += ts_seconds
+        if antlr_error or ts_error:
+            print('{0:50} {1:9.2f} {2:9.2f}  antlr: {3}  tree-sitter: {4}'.format(
+                path[-50:], antlr_seconds, ts_seconds, antlr_error, ts_error))
+            continue
+        same = [name for name in antlr if ts.get(name) == antlr[name]]
+        different = [name for name in set(antlr) | set(ts) if ts.get(name) != antlr.get(name)]
+        mismatches += len(different)
+        print('{0:50} {1:9.2f} {2:9.2f} {3:9} {4:9} {5:9}'.format(
+            path[-50:], antlr_seconds, ts_seconds, len(antlr), len(same), len(different)))
+        if args.verbose:
+            for name in different:
+                print('    {0}\n      antlr:       {1}\n      tree-sitter: {2}'.format(
+                    name, antlr.get(name), ts.get(name)))
+    print('{0:50} {1:9.2f} {2:9.2f}'.format('total', *total))
+    if total[1] > 0:
+        print('speedup: {0:.1f}x'.format(total[0] / total[1]))
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument(
+        '--files', nargs='+',
+        help='Glob patterns of the input sources',
+        default=['test_data/simple/*/*.c', 'test_data/yaml_cpp_src/*.cpp'])
+    arg_parser.add_argument(
+        '-v', '--verbose', action='store_true',
+        help='Print the CFGs of the functions that differ')
+    args = arg_parser.parse_args()
+    sys.exit(main(args))
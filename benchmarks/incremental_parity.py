@@ -0,0 +1,133 @@
+"""
+
+Check that incremental re-analysis gives the outputs of a fresh analysis after each edit
+
+A source is analyzed by `update_cfgs`, then edited in ways that keep the fingerprints of some of
+its functions: a comment inside a signature, a comment before it, lines inserted above a function
+and a changed body. After each edit, the outputs of the incremental run, `functions.json`,
+`primepaths.json` and the `<n>.txt` CFGs, must be those of a fresh run on the edited source.
+The time of both runs is reported.
+
+Usage:
+
+    python -m benchmarks.incremental_parity [--files "test_data/student_projects/*.cpp"] [-v]
+
+"""
+
+import argparse
+import glob
+import os
+import sys
+import tempfile
+import time
+
+from coda.analysis.incremental import update_cfgs
+
+SOURCE = '''int compute(int x, int y)
+{
+    if (x > y)
+        return x;
+    return y;
+}
+
+int count(int n)
+{
+    int s = 0;
+    for (int i = 0; i < n; i++)
+        s += i;
+    return s;
+}
+
+int main()
+{
+    return compute(1, 2) + count(3);
+}
+'''
+
+# (name, old text, new text); each edit applies to the source left by the previous ones
+EDITS = [
+    ('comment inside a signature', 'int compute(int x, int y)', 'int compute(int x, /* the second */ int y)'),
+    ('comment before a signature', 'int count(int n)', '// the sum below n\nint /* sum */ count(int n)'),
+    ('lines above a function', 'int compute(', '#include <cstdio>\n\n// comparison\nint compute('),
+    ('changed body', 's += i;', 's += i * i;'),
+]
+
+
+def outputs(directory) -> dict:
+    files = {}
+    for name in sorted(os.listdir(directory)):
+        if name == 'functions.json' or name == 'primepaths.json' or name.endswith('.txt'):
+            with open(os.path.join(directory, name)) as f:
+                files[name] = f.read()
+    return files
+
+
+def check(directory, source: str, edits, verbose: bool) -> int:
+    """
+    Apply the edits to a source one after the other, comparing incremental and fresh outputs after each
+
+    Returns:
+
+        The number of edits after which the outputs differ
+
+    """
+    source_path = os.path.join(directory, 'source.cpp')
+    incremental_dir = os.path.join(directory, 'incremental')
+    with open(source_path, 'w') as f:
+        f.write(source)
+    update_cfgs(source_path, incremental_dir)
+    mismatches = 0
+    for k, (name, old, new) in enumerate(edits):
+        source = source.replace(old, new, 1)
+        with open(source_path, 'w') as f:
+            f.write(source)
+        start = time.perf_counter()
+        result = update_cfgs(source_path, incremental_dir)
+        incremental_seconds = time.perf_counter() - start
+        fresh_dir = os.path.join(directory, 'fresh{0}'.format(k))
+        start = time.perf_counter()
+        update_cfgs(source_path, fresh_dir)
+        fresh_seconds = time.perf_counter() - start
+        expected, found = outputs(fresh_dir), outputs(incremental_dir)
+        status = 'ok' if expected == found else 'MISMATCH'
+        if expected != found:
+            mismatches += 1
+        if verbose or expected != found:
+            print('{0}: {1}, reused {2}, analyzed {3}, incremental {4:.3f} s, fresh {5:.3f} s'.format(
+                name, status, result["reused"], result["analyzed"], incremental_seconds, fresh_seconds))
+        for file_name in sorted(set(expected) | set(found)):
+            if expected.get(file_name) != found.get(file_name):
+                print('  {0} differs: {1!r} instead of {2!r}'.format(
+                    file_name, (found.get(file_name) or '')[:200], (expected.get(file_name) or '')[:200]))
+    return mismatches
+
+
+def main(args):
+    sources = [('built-in', SOURCE, EDITS)]
+    for path in sorted(set(p for pattern in args.files for p in glob.glob(pattern))):
+        with open(path, encoding='utf8', errors='replace') as f:
+            text = f.read()
+        # A comment inside the first parameter list of the file
+        paren = text.find('(')
+        if paren >= 0:
+            sources.append((path, text, [('comment inside a signature', text[:paren + 1],
+                                          text[:paren + 1] + '/* the first */ ')]))
+    mismatches = 0
+    for name, source, edits in sources:
+        with tempfile.TemporaryDirectory() as directory:
+            found = check(directory, source, edits, args.verbose)
+        print('{0}: {1} edits, {2} mismatches'.format(name, len(edits), found))
+        mismatches += found
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument(
+        '--files', nargs='*',
+        help='Glob patterns of more sources, each edited with a comment in its first parentheses', default=[])
+    arg_parser.add_argument(
+        '-v', '--verbose', action='store_true',
+        help='Print each edit')
+    args = arg_parser.parse_args()
+    sys.exit(main(args))
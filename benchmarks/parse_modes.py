@@ -0,0 +1,66 @@
+"""
+
+Compare the parse time of the prediction modes of `ParseSession`
+
+Each file is lexed once, then parsed with every mode starting from an empty DFA cache,
+so that no mode benefits from the prediction states warmed up by another one.
+
+Usage:
+
+    python -m benchmarks.parse_modes [--files test_data/student_projects/*.cpp]
+
+"""
+
+import argparse
+import glob
+import time
+
+from antlr4.dfa.DFA import DFA
+
+from coda.analysis.parse_session import ParseSession, PARSE_MODES
+from coda.antlr_gen.cpp_parser.CPP14_v2Parser import CPP14_v2Parser
+
+
+def reset_parser_dfa():
+    CPP14_v2Parser.decisionsToDFA[:] = [DFA(ds, i) for i, ds in enumerate(CPP14_v2Parser.atn.decisionToState)]
+
+
+def time_parse(path, mode):
+    session = ParseSession.from_file(path, parse_mode=mode)
+    reset_parser_dfa()
+    start = time.perf_counter()
+    session.parse_tree
+    return time.perf_counter() - start, session
+
+
+def main(args):
+    files = sorted(f for pattern in args.files for f in glob.glob(pattern))
+    totals = {mode: 0.0 for mode in args.modes}
+    print('{0:45} '.format('file') + ' '.join('{0:>10}'.format(mode) for mode in args.modes) + '  fallback')
+    for path in files:
+        row = []
+        fallback = ''
+        for mode in args.modes:
+            elapsed, session = time_parse(path, mode)
+            totals[mode] += elapsed
+            row.append(elapsed)
+            if session.used_ll_fallback:
+                fallback = 'yes'
+        print('{0:45} '.format(path[-45:]) + ' '.join('{0:10.2f}'.format(t) for t in row) + '  ' + fallback)
+    print('{0:45} '.format('total') + ' '.join('{0:10.2f}'.format(totals[mode]) for mode in args.modes))
+    if 'll' in totals:
+        for mode in args.modes:
+            if mode != 'll' and totals[mode] > 0:
+                print('speedup of {0} over ll: {1:.2f}x'.format(mode, totals['ll'] / totals[mode]))
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument(
+        '--files', nargs='+',
+        help='Glob patterns of the input sources', default=['test_data/student_projects/*.cpp'])
+    arg_parser.add_argument(
+        '--modes', nargs='+', choices=PARSE_MODES,
+        help='Parse modes to compare', default=['ll', 'two_stage'])
+    args = arg_parser.parse_args()
+    main(args)
@@ -0,0 +1,73 @@
+"""
+
+Compare the serial prime path loop with the parallel, cached prime path stage
+
+The CFGs of all the functions of the sources are extracted once. Their prime paths are then
+computed one function after another, as the loop of `coda/main.py` did, and by
+`prime_path_stage.compute_all_prime_paths`, which enumerates each distinct CFG once, the largest
+first, on a process pool; both must give the same prime paths.
+
+Usage:
+
+    python -m benchmarks.prime_path_stage [--files "test_data/student_projects/*.cpp"] [-j 4]
+
+"""
+
+import argparse
+import glob
+import sys
+import time
+
+from coda.analysis.cfg.frontend import get_front_end
+from coda.analysis.paths.prime_path_extractor import ControlFlowGraph
+from coda.analysis.paths.prime_path_stage import cfg_key, compute_all_prime_paths
+from coda.batch import cfg_summary
+
+
+def main(args):
+    front_end = get_front_end(args.front_end)
+    cfgs = {}
+    for path in sorted(p for pattern in args.files for p in glob.glob(pattern)):
+        functions = front_end.extract_cfgs_from_file(path, encoding='latin1')
+        for i, g in enumerate(functions.values(), start=1):
+            summary = cfg_summary(g)
+            cfgs['{0}:{1}'.format(path, i)] = (summary["edges"], summary["initial_nodes"], summary["final_nodes"])
+    print('{0} functions, {1} distinct CFGs'.format(len(cfgs), len({cfg_key(*cfg) for cfg in cfgs.values()})))
+
+    start = time.perf_counter()
+    serial_paths = {}
+    for name, (edges, initial_nodes, final_nodes) in cfgs.items():
+        cfg = ControlFlowGraph.from_edges(edges, initial_nodes, final_nodes)
+        try:
+            cfg.computePrimePaths()
+        except Exception:
+            continue
+        serial_paths[name] = cfg.primePaths
+    serial_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    stage_paths, errors = compute_all_prime_paths(cfgs, workers=args.jobs)
+    stage_seconds = time.perf_counter() - start
+    if stage_paths != serial_paths:
+        print('The prime paths differ')
+        return 1
+    print('serial {0:.3f} s, stage {1:.3f} s on {2} workers, {3} failed functions'.format(
+        serial_seconds, stage_seconds, args.jobs or 'all CPU', len(errors)))
+    return 0
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument(
+        '--files', nargs='+',
+        help='Glob patterns of the sources',
+        default=['test_data/student_projects/*.cpp'])
+    arg_parser.add_argument(
+        '-j', '--jobs', type=int,
+        help='Number of worker processes of the stage, defaults to the number of CPUs', default=None)
+    arg_parser.add_argument(
+        '--front-end',
+        help='The CFG front-end, antlr or tree-sitter',
+        default='tree-sitter')
+    args = arg_parser.parse_args()
+    sys.exit(main(args))
@@ -0,0 +1,101 @@
+"""
+
+Compare the list-based and the bitset prime path engines of `ControlFlowGraph`
+
+A synthetic loop-heavy function is generated for each size: a `while` loop whose body has N `if`
+statements, with a nested `while` loop after every third one. Its CFG is extracted once, then the
+prime paths are computed by both engines, which must find the same paths in the same order.
+Most candidate paths of these functions end as prime paths, so copying out the prime paths
+bounds the speedup.
+
+With `--files`, the functions of some sources are measured instead, and those that take the
+list-based engine at least `--min-seconds` are listed.
+
+Usage:
+
+    python -m benchmarks.prime_paths [--sizes 4 8 12] [--front-end antlr]
+    python -m benchmarks.prime_paths --files "test_data/yaml_cpp_src/*.cpp" --front-end tree-sitter
+
+"""
+
+import argparse
+import glob
+import sys
+import time
+
+from coda.analysis.cfg.frontend import get_front_end
+from coda.analysis.paths.prime_path_extractor import ControlFlowGraph
+from coda.batch import cfg_summary
+
+
+def loop_heavy_function(n: int) -> str:
+    statements = []
+    for i in range(n):
+        statements.append('        if (x % {0} == 0) {{ y = y + {0}; }}\n'.format(i + 2))
+        if i % 3 == 2:
+            statements.append('        while (y > {0}) {{ y = y - x; }}\n'.format(i))
+    return ('int f(int x) {\n    int y = 0;\n    while (x > 0) {\n' + ''.join(statements)
+            + '        x = x - 1;\n    }\n    return y;\n}\n')
+
+
+def time_engine(summary: dict, engine: str):
+    cfg = ControlFlowGraph.from_edges(summary["edges"], summary["initial_nodes"], summary["final_nodes"])
+    start = time.perf_counter()
+    cfg.computePrimePaths(engine)
+    return time.perf_counter() - start, cfg.primePaths
+
+
+def print_row(name, summary: dict):
+    list_seconds, list_paths = time_engine(summary, 'list')
+    bitset_seconds, bitset_paths = time_engine(summary, 'bitset')
+    if list_paths != bitset_paths:
+        print('The prime paths of {0} differ'.format(name))
+        return False
+    print('{0:>40} {1:6} {2:12} {3:10.3f} {4:10.3f} {5:8.1f}'.format(
+        name, summary["nodes"], len(list_paths), list_seconds, bitset_seconds, list_seconds / bitset_seconds))
+    return True
+
+
+def main(args):
+    front_end = get_front_end(args.front_end)
+    print('{0:>40} {1:>6} {2:>12} {3:>10} {4:>10} {5:>8}'.format(
+        'function', 'nodes', 'prime paths', 'list s', 'bitset s', 'speedup'))
+    if args.files:
+        for path in sorted(p for pattern in args.files for p in glob.glob(pattern)):
+            functions = front_end.extract_cfgs_from_file(path, encoding='latin1')
+            for i, g in enumerate(functions.values(), start=1):
+                summary = cfg_summary(g)
+                cfg = ControlFlowGraph.from_edges(summary["edges"], summary["initial_nodes"], summary["final_nodes"])
+                start = time.perf_counter()
+                cfg.computePrimePaths('list')
+                if time.perf_counter() - start >= args.min_seconds:
+                    same = print_row('{0}:{1}'.format(path[-34:], i), summary)
+                    if not same:
+                        return 1
+        return 0
+    for n in args.sizes:
+        g = next(iter(front_end.extract_cfgs(loop_heavy_function(n)).values()))
+        same = print_row('synthetic {0}'.format(n), cfg_summary(g))
+        if not same:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument(
+        '--sizes', nargs='+', type=int,
+        help='The numbers of if statements in the loop of the synthetic functions',
+        default=[4, 8, 12])
+    arg_parser.add_argument(
+        '--files', nargs='+',
+        help='Glob patterns of sources to measure instead of the synthetic functions', default=None)
+    arg_parser.add_argument(
+        '--min-seconds', type=float,
+        help='The time of the list-based engine from which a function of the sources is listed', default=0.1)
+    arg_parser.add_argument(
+        '--front-end',
+        help='The CFG front-end, antlr or tree-sitter',
+        default='antlr')
+    args = arg_parser.parse_args()
+    sys.exit(main(args))
@@ -0,0 +1,89 @@
+"""
+
+Compare the prime path engines of `ControlFlowGraph` on the functions of yaml-cpp
+
+The CFG of each function in the sources is extracted once, and its prime paths are computed by
+the bitset engine and by the engine over strongly connected components (`scc`), which must find
+the same paths in the same order. The functions whose bitset enumeration takes at least
+`--min-seconds` are listed, with the time of the list-based engine, whose breadth-first search
+blows up on them; the totals cover all the functions.
+
+Usage:
+
+    python -m benchmarks.scc_prime_paths [--files "test_data/yaml_cpp_src/*.cpp"] [--front-end antlr]
+
+"""
+
+import argparse
+import glob
+import sys
+import time
+
+from coda.analysis.cfg.frontend import get_front_end
+from coda.analysis.paths.prime_path_extractor import ControlFlowGraph
+from coda.batch import cfg_summary
+
+ENGINES = ('list', 'bitset', 'scc')
+
+
+def time_engine(summary: dict, engine: str):
+    cfg = ControlFlowGraph.from_edges(summary["edges"], summary["initial_nodes"], summary["final_nodes"])
+    start = time.perf_counter()
+    cfg.computePrimePaths(engine)
+    return time.perf_counter() - start, cfg.primePaths
+
+
+def main(args):
+    front_end = get_front_end(args.front_end)
+    print('{0:>40} {1:>6} {2:>12} {3:>10} {4:>10} {5:>10} {6:>8}'.format(
+        'function', 'nodes', 'prime paths', 'list s', 'bitset s', 'scc s', 'speedup'))
+    totals = dict.fromkeys(ENGINES, 0.0)
+    functions = 0
+    for path in sorted(p for pattern in args.files for p in glob.glob(pattern)):
+        cfgs = front_end.extract_cfgs_from_file(path, encoding='latin1')
+        for i, g in enumerate(cfgs.values(), start=1):
+            summary = cfg_summary(g)
+            bitset_seconds, bitset_paths = time_engine(summary, 'bitset')
+            scc_seconds, scc_paths = time_engine(summary, 'scc')
+            name = '{0}:{1}'.format(path[-34:], i)
+            if scc_paths != bitset_paths:
+                print('The prime paths of {0} differ'.format(name))
+                return 1
+            functions += 1
+            totals['bitset'] += bitset_seconds
+            totals['scc'] += scc_seconds
+            if bitset_seconds < args.min_seconds:
+                continue
+            list_seconds = float('nan')
+            if not args.skip_list:
+                list_seconds, list_paths = time_engine(summary, 'list')
+                totals['list'] += list_seconds
+                if list_paths != scc_paths:
+                    print('The prime paths of {0} differ'.format(name))
+                    return 1
+            print('{0:>40} {1:6} {2:12} {3:10.3f} {4:10.3f} {5:10.3f} {6:8.1f}'.format(
+                name, summary["nodes"], len(scc_paths), list_seconds, bitset_seconds, scc_seconds,
+                bitset_seconds / scc_seconds))
+    print('{0} functions: bitset {1:.3f} s, scc {2:.3f} s, list {3:.3f} s on the listed functions'.format(
+        functions, totals['bitset'], totals['scc'], totals['list']))
+    return 0
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument(
+        '--files', nargs='+',
+        help='Glob patterns of the sources',
+        default=['test_data/yaml_cpp_src/*.cpp'])
+    arg_parser.add_argument(
+        '--min-seconds', type=float,
+        help='The time of the bitset engine from which a function is listed', default=0.1)
+    arg_parser.add_argument(
+        '--skip-list', action='store_true',
+        help='Do not run the list-based engine on the listed functions')
+    arg_parser.add_argument(
+        '--front-end',
+        help='The CFG front-end, antlr or tree-sitter',
+        default='tree-sitter')
+    args = arg_parser.parse_args()
+    sys.exit(main(args))
@@ -0,0 +1,85 @@
+"""
+
+Guard the startup time of the `coda` command line interface
+
+Runs the `primepaths` subcommand on a small saved CFG in a fresh interpreter, and fails if
+it imports the generated C++ parser modules or takes longer than the time budget.
+
+Usage:
+
+    python -m benchmarks.startup [--max-seconds 1.0] [--repeat 5]
+
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+HEAVY_MODULES = (
+    'coda.antlr_gen.cpp_parser.CPP14_v2Parser',
+    'coda.antlr_gen.cpp_parser.CPP14_v2Listener',
+    'coda.antlr_gen.cpp_parser.CPP14_v2Visitor',
+    'coda.antlr_gen.cpp_parser.CPP14_v2Lexer',
+    'networkx',
+)
+
+SAMPLE_CFG = '0 1\n1 2\n1 5\n2 3\n2 4\n5 6\n4 1\n3 4\ninitial nodes:0\nfinal nodes:6\n'
+
+PROBE = '''
+import json, sys
+from coda.cli import main
+status = main(['primepaths', sys.argv[1], '-o', sys.argv[2]])
+print(json.dumps({{"status": status, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+'''
+
+
+def run_once(cfg_dir):
+    output = os.path.join(cfg_dir, 'primepaths.json')
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, '-c', PROBE.format(heavy=HEAVY_MODULES), cfg_dir, output],
+                               capture_output=True, text=True, check=True)
+    elapsed = time.perf_counter() - start
+    return elapsed, json.loads(completed.stdout.splitlines()[-1])
+
+
+def main(args):
+    with tempfile.TemporaryDirectory() as cfg_dir:
+        with open(os.path.join(cfg_dir, '1.txt'), 'w') as f:
+            f.write(SAMPLE_CFG)
+        times = []
+        for _ in range(args.repeat):
+            elapsed, report = run_once(cfg_dir)
+            times.append(elapsed)
+
+    best = min(times)
+    print('coda primepaths startup: best {0:.3f}s, mean {1:.3f}s over {2} runs'.format(
+        best, sum(times) / len(times), len(times)))
+    failed = False
+    if report["status"] != 0:
+        print('FAIL: the primepaths command exited with status', report["status"])
+        failed = True
+    if report["heavy"]:
+        print('FAIL: heavy modules imported:', ', '.join(report["heavy"]))
+        failed = True
+    if best > args.max_seconds:
+        print('FAIL: startup time exceeds the budget of {0:.3f}s'.format(args.max_seconds))
+        failed = True
+    if not failed:
+        print('OK')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument(
+        '--max-seconds', type=float,
+        help='Startup time budget of the best run', default=1.0)
+    arg_parser.add_argument(
+        '--repeat', type=int,
+        help='Number of runs', default=5)
+    args = arg_parser.parse_args()
+    sys.exit(main(args))
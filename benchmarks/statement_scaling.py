@@ -0,0 +1,112 @@
+"""
+
+Measure how the CFG construction scales with the length of a statement sequence
+
+A synthetic function of N statements is generated for each size: mostly expression statements,
+with an `if` statement after every tenth one. The source is parsed once, and the parse and the
+CFG construction by `CFGExtractorVisitor` are timed separately. The CFG time per statement stays
+flat when statement sequences are built in linear time.
+
+With `--shape nested`, the size is the depth of nested `while` loops, each with a `break`, a
+`continue` and some statements, and a `return` in the innermost loop, to measure the jump resolution.
+The nesting depth is limited by the recursion of the parser and the visitor.
+
+With `--front-end tree-sitter`, the whole extraction of the tree-sitter front-end is timed instead.
+
+Usage:
+
+    python -m benchmarks.statement_scaling [--sizes 100 1000 10000] [--front-end antlr]
+    python -m benchmarks.statement_scaling --shape nested --sizes 10 20 40 [--front-end antlr]
+
+"""
+
+import argparse
+import time
+
+from coda.analysis.cfg.frontend import get_front_end
+
+
+def synthetic_function(n: int) -> str:
+    statements = []
+    for i in range(n):
+        statements.append('    x = x + {0};\n'.format(i))
+        if i % 10 == 9:
+            statements.append('    if (x > {0}) {{ y = x; }}\n'.format(i))
+    return 'int f(int x) {\n    int y = 0;\n' + ''.join(statements) + '    return y;\n}\n'
+
+
+def nested_function(depth: int) -> str:
+    opening = []
+    closing = []
+    for i in range(depth):
+        indent = '    ' * (i + 1)
+        opening.append('{0}while (x > {1}) {{\n{0}    x = x - 1;\n{0}    if (x == {1}) break;\n'
+                       '{0}    if (x == {2}) continue;\n'.format(indent, i, i + depth))
+        closing.append('{0}    y = y + x;\n{0}}}\n'.format(indent))
+    innermost = '    ' * (depth + 1) + 'if (y > x) return y;\n'
+    return ('int f(int x) {\n    int y = 0;\n' + ''.join(opening) + innermost + ''.join(reversed(closing))
+            + '    return y;\n}\n')
+
+
+SHAPES = {'sequence': synthetic_function, 'nested': nested_function}
+
+
+def measure_antlr(source: str, parse_mode: str):
+    from coda.analysis.parse_session import ParseSession
+    from coda.analysis.cfg.cfg_extractor_visitor import CFGExtractorVisitor
+
+    session = ParseSession.from_source(source, parse_mode=parse_mode)
+    start = time.perf_counter()
+    parse_tree = session.parse_tree
+    parse_seconds = time.perf_counter() - start
+    cfg_extractor = CFGExtractorVisitor(session.token_stream)
+    start = time.perf_counter()
+    cfg_extractor.visit(parse_tree)
+    cfg_seconds = time.perf_counter() - start
+    return parse_seconds, cfg_seconds, next(iter(cfg_extractor.functions.values()))
+
+
+def measure_front_end(source: str, front_end):
+    start = time.perf_counter()
+    functions = front_end.extract_cfgs(source)
+    return None, time.perf_counter() - start, next(iter(functions.values()))
+
+
+def main(args):
+    front_end = None if args.front_end == 'antlr' else get_front_end(args.front_end)
+    print('{0:>8} {1:>8} {2:>10} {3:>10} {4:>14}'.format('size', 'nodes', 'parse s', 'cfg s', 'cfg us/size'))
+    for n in args.sizes:
+        source = SHAPES[args.shape](n)
+        try:
+            if front_end is None:
+                parse_seconds, cfg_seconds, g = measure_antlr(source, args.parse_mode)
+            else:
+                parse_seconds, cfg_seconds, g = measure_front_end(source, front_end)
+        except RecursionError:
+            print('{0:8} RecursionError'.format(n))
+            continue
+        print('{0:8} {1:8} {2:>10} {3:10.3f} {4:14.1f}'.format(
+            n, len(g), '-' if parse_seconds is None else '{0:.2f}'.format(parse_seconds),
+            cfg_seconds, cfg_seconds / n * 1e6))
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument(
+        '--sizes', nargs='+', type=int,
+        help='The numbers of statements of the synthetic functions',
+        default=[100, 300, 1000, 3000, 10000])
+    arg_parser.add_argument(
+        '--shape',
+        help='The shape of the synthetic functions, sequence or nested',
+        default='sequence')
+    arg_parser.add_argument(
+        '--front-end',
+        help='The CFG front-end, antlr or tree-sitter',
+        default='antlr')
+    arg_parser.add_argument(
+        '--parse-mode',
+        help='The prediction mode of the ANTLR parser',
+        default='sll')
+    args = arg_parser.parse_args()
+    main(args)
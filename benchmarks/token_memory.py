@@ -0,0 +1,53 @@
+"""
+
+Compare the memory of the token buffer with and without `CompactTokenList`
+
+Each file is lexed twice into a `ParseSession`, with the default list of `CommonToken` objects
+and with the compact array-backed buffer, and the memory allocated by lexing is traced.
+The parse trees are not built, since they keep their own tokens alive.
+
+Usage:
+
+    python -m benchmarks.token_memory [--files "test_data/student_projects/*.cpp"]
+
+"""
+
+import argparse
+import gc
+import glob
+import time
+import tracemalloc
+
+from coda.analysis.parse_session import ParseSession
+
+
+def measure(path, compact_tokens):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    session = ParseSession.from_file(path, compact_tokens=compact_tokens)
+    seconds = time.perf_counter() - start
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return session.number_of_tokens, memory, seconds
+
+
+def main(args):
+    files = sorted(f for pattern in args.files for f in glob.glob(pattern))
+    print('{0:50} {1:>8} {2:>10} {3:>10} {4:>8} {5:>8}'.format(
+        'file', 'tokens', 'list MB', 'compact MB', 'list s', 'compact s'))
+    for path in files:
+        tokens, list_memory, list_seconds = measure(path, False)
+        _, compact_memory, compact_seconds = measure(path, True)
+        print('{0:50} {1:8} {2:10.2f} {3:10.2f} {4:8.2f} {5:8.2f}'.format(
+            path[-50:], tokens, list_memory / 1e6, compact_memory / 1e6, list_seconds, compact_seconds))
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument(
+        '--files', nargs='+',
+        help='Glob patterns of the input sources',
+        default=['test_data/student_projects/*.cpp', 'test_data/yaml_cpp_src/*.cpp'])
+    args = arg_parser.parse_args()
+    main(args)
@@ -0,0 +1,109 @@
+"""
+
+Compare the text probes of the former `logFile` runtime with the binary probes of `PROBE_RUNTIME`
+
+The same loop, of `--iterations` iterations over `--functions` functions of `--blocks` probes
+each, is compiled with g++ once with a `logFile << "f b" << std::endl` probe, as the
+instrumentation inserted, and once with a `coda_probe(f, b)` probe. The run time of each program,
+the size of its trace and the time `read_trace` takes to read it are compared, and the two traces
+must give the same execution paths. A binary probe always takes 8 bytes, a text probe 4 bytes and
+more, with the number of digits of its ids.
+
+Usage:
+
+    python -m benchmarks.trace_format [--iterations 200000] [--functions 4] [--blocks 5]
+
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from coda.analysis.test_runner import read_trace
+from coda.synthesis.probe_runtime import DEFAULT_TRACE_FILE, PROBE_RUNTIME, TRACE_FILE_VARIABLE, probe_call
+
+TEXT_RUNTIME = '''#include <cstdlib>
+#include <fstream>
+static const char *coda_trace_file() {{
+    const char *path = std::getenv("{0}");
+    return path != 0 && *path != 0 ? path : "{1}";
+}}
+std::ofstream logFile(coda_trace_file());
+
+'''.format(TRACE_FILE_VARIABLE, DEFAULT_TRACE_FILE)
+
+
+def text_probe(function: int, block: int) -> str:
+    return 'logFile << "{0} {1}" << std::endl'.format(function, block)
+
+
+def program(runtime: str, probe, functions: int, blocks: int, iterations: int) -> str:
+    """
+    A C++ program calling `functions` functions `iterations` times, each running `blocks` probes
+    """
+    source = [runtime]
+    for function in range(1, functions + 1):
+        body = ' '.join('{0}; x += {1};'.format(probe(function, block), block) for block in range(1, blocks + 1))
+        source.append('int f{0}(int x) {{ {1} return x; }}\n'.format(function, body))
+    calls = ' '.join('s += f{0}(i);'.format(function) for function in range(1, functions + 1))
+    source.append('int main() {{ long s = 0; for (int i = 0; i < {0}; ++i) {{ {1} }} return s == 0; }}\n'.format(
+        iterations, calls))
+    return ''.join(source)
+
+
+def build_and_run(directory, name, source):
+    source_path = os.path.join(directory, name + '.cpp')
+    executable = os.path.join(directory, name)
+    trace_path = os.path.join(directory, name + '.log')
+    with open(source_path, 'w') as source_file:
+        source_file.write(source)
+    subprocess.run(['g++', '-O2', '-std=c++11', source_path, '-o', executable], check=True)
+    env = dict(os.environ)
+    env[TRACE_FILE_VARIABLE] = trace_path
+    start = time.perf_counter()
+    subprocess.run([executable], env=env, check=False)
+    run_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    executed_paths = read_trace(trace_path)
+    read_seconds = time.perf_counter() - start
+    return run_seconds, os.path.getsize(trace_path), read_seconds, executed_paths
+
+
+def main(args):
+    if shutil.which('g++') is None:
+        print('g++ is not found')
+        return 1
+    with tempfile.TemporaryDirectory() as directory:
+        text = build_and_run(directory, 'text', program(TEXT_RUNTIME, text_probe, args.functions, args.blocks,
+                                                        args.iterations))
+        binary = build_and_run(directory, 'binary', program(PROBE_RUNTIME, probe_call, args.functions, args.blocks,
+                                                            args.iterations))
+    if text[3] != binary[3]:
+        print('The execution paths of the text and binary traces differ')
+        return 1
+    probes = args.iterations * args.functions * args.blocks
+    print('{0} probes'.format(probes))
+    for name, (run_seconds, size, read_seconds, _) in (('text', text), ('binary', binary)):
+        print('{0:>6}: run {1:.3f} s, trace {2} bytes, read {3:.3f} s'.format(name, run_seconds, size, read_seconds))
+    print('binary: run {0:.0f}x faster, trace {1:.2f}x the text size, read {2:.0f}x faster'.format(
+        text[0] / binary[0], binary[1] / text[1], text[2] / binary[2]))
+    return 0
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument(
+        '--iterations', type=int,
+        help='The number of iterations of the loop of the program', default=200000)
+    arg_parser.add_argument(
+        '--functions', type=int,
+        help='The number of functions called in each iteration', default=4)
+    arg_parser.add_argument(
+        '--blocks', type=int,
+        help='The number of probes of each function', default=5)
+    args = arg_parser.parse_args()
+    sys.exit(main(args))
@@ -0,0 +1,10 @@
+"""
+Entry point of `python -m coda`
+
+"""
+
+import sys
+
+from coda.cli import main
+
+sys.exit(main())
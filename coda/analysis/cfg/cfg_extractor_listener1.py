@@ -21,15 +21,17 @@ __author__ = 'Morteza Zakeri'
 
 
 import json
+import sys
 
 import networkx as nx
 
-from networkx.drawing.nx_pydot import graphviz_layout
-
 from antlr4 import *
 from antlr4 import TokenStreamRewriter
 from coda.antlr_gen.cpp_parser.CPP14_v2Listener import CPP14_v2Listener
 from coda.antlr_gen.cpp_parser.CPP14_v2Parser import CPP14_v2Parser
+from coda.synthesis.probe_runtime import PROBE_RUNTIME, probe_call
+from coda.graph.cfg_sinks import CFGSink, TextCFGSink
+from coda.graph.render import render_sources
 
 SWITCH_FOR = {
     "for_while": 0,
@@ -39,11 +41,24 @@ SWITCH_FOR = {
 
 
 class CFGInstListener(CPP14_v2Listener):
-    def __init__(self, common_token_stream: CommonTokenStream, number_of_tokens, directory_name):
+    def __init__(self, common_token_stream: CommonTokenStream, number_of_tokens, directory_name,
+                 token_stream_rewriter: TokenStreamRewriter.TokenStreamRewriter = None, cfg_sink: CFGSink = None,
+                 render_format: str = None):
         """
         :param common_token_stream:
+        :param number_of_tokens: The size of the filled token buffer, e.g., `ParseSession.number_of_tokens`
+        :param directory_name:
+        :param token_stream_rewriter: An existing rewriter over `common_token_stream` to reuse, if any
+        :param cfg_sink: The sink of the function CFGs, by default a `TextCFGSink` in the CFG directory;
+            a given sink is not closed by the listener
+        :param render_format: The format to render the saved Graphviz sources of the CFGs to, all at once
+            after the walk, e.g., png or svg; the sources are only saved by default
         """
         self.cfg_path = 'CFGS/' + directory_name + '/'
+        self.owns_cfg_sink = cfg_sink is None
+        self.cfg_sink = TextCFGSink(self.cfg_path) if cfg_sink is None else cfg_sink
+        self.render_format = render_format
+        self.graphviz_sources = []
         self.instrument_path = 'Instrument/' + directory_name + '/'
         self.block_dict = {}
         self.block_number = 0
@@ -71,7 +86,9 @@ class CFGInstListener(CPP14_v2Listener):
         self.goto_dict = {}
 
         # Move all the tokens in the source code in a buffer, token_stream_rewriter.
-        if common_token_stream is not None:
+        if token_stream_rewriter is not None:
+            self.token_stream_rewriter = token_stream_rewriter
+        elif common_token_stream is not None:
             self.token_stream_rewriter = TokenStreamRewriter.TokenStreamRewriter(common_token_stream)
         else:
             raise TypeError('common_token_stream is None')
@@ -91,13 +108,11 @@ class CFGInstListener(CPP14_v2Listener):
         for source_node, Type in self.select_junction_stack[-1]:
             dest_node = self.block_number
             self.block_dict[self.domain_name]["Edges"].append((source_node, dest_node, Type))
-            self.CFG_file.write(str(source_node) + ' ' + str(dest_node) + '\n')
 
     def addDecisionEdge(self):
         source_node, Type = self.select_decision_stack.pop()
         dest_node = self.block_number
         self.block_dict[self.domain_name]["Edges"].append((source_node, dest_node, Type))
-        self.CFG_file.write(str(source_node) + ' ' + str(dest_node) + '\n')
 
     def addJunc(self, Type='flow'):
         self.select_junction_stack[-1].append((self.block_number, Type))
@@ -109,25 +124,21 @@ class CFGInstListener(CPP14_v2Listener):
         for source_node, Type in self.iterate_junction_stack[-1]:
             dest_node = self.block_number
             self.block_dict[self.domain_name]["Edges"].append((source_node, dest_node, Type))
-            self.CFG_file.write(str(source_node) + ' ' + str(dest_node) + '\n')
 
     def addIterateEdge(self):
         source_node = self.block_number
         dest_node, Type = self.iterate_stack[-1]
         self.block_dict[self.domain_name]["Edges"].append((source_node, dest_node, Type))
-        self.CFG_file.write(str(source_node) + ' ' + str(dest_node) + '\n')
 
     def addInitEdge(self, Type='flow'):
         source_node = self.block_number
         dest_node = source_node + 1
         self.block_dict[self.domain_name]["Edges"].append((source_node, dest_node, Type))
-        self.CFG_file.write(str(source_node) + ' ' + str(dest_node) + '\n')
 
     def addDoWhileInitEdge(self):
         source_node = self.block_number
         dest_node = source_node + 2
         self.block_dict[self.domain_name]["Edges"].append((source_node, dest_node, 'flow'))
-        self.CFG_file.write(str(source_node) + ' ' + str(dest_node) + '\n')
 
     def addIterateJunc(self, Type='flow'):
         self.iterate_junction_stack[-1].append((self.block_number, Type))
@@ -139,13 +150,11 @@ class CFGInstListener(CPP14_v2Listener):
         source_node, Type = self.switch_stack[-1]
         dest_node = self.block_number
         self.block_dict[self.domain_name]["Edges"].append((source_node, dest_node, Type))
-        self.CFG_file.write(str(source_node) + ' ' + str(dest_node) + '\n')
 
     def addSwitchJunctionEdges(self):
         for source_node, Type in self.switch_junction_stack[-1]:
             dest_node = self.block_number
             self.block_dict[self.domain_name]["Edges"].append((source_node, dest_node, Type))
-            self.CFG_file.write(str(source_node) + ' ' + str(dest_node) + '\n')
 
     def addSwitch(self, Type='switch'):
         self.switch_stack.append((self.block_number, Type))
@@ -157,14 +166,13 @@ class CFGInstListener(CPP14_v2Listener):
         source_node = self.block_number
         dest_node = self.label_dict[label]
         self.block_dict[self.domain_name]["Edges"].append((source_node, dest_node, 'goto'))
-        self.CFG_file.write(str(source_node) + ' ' + str(dest_node) + '\n')
 
     def insertAfter(self, ctx):
         new_code = '\n' + self.logLine() + ';\n'
         self.token_stream_rewriter.insertAfter(ctx.start.tokenIndex, new_code)
 
     def logLine(self):
-        return 'logFile << "' + str(self.domain_name) + ' ' + str(self.block_number) + '" << std::endl'
+        return probe_call(self.domain_name, self.block_number)
 
     def addTryJunc(self, Type='flow'):
         self.try_junction_stack[-1].append((self.block_number, Type))
@@ -173,13 +181,11 @@ class CFGInstListener(CPP14_v2Listener):
         for source_node, Type in self.try_stack[-1]:
             dest_node = self.block_number
             self.block_dict[self.domain_name]["Edges"].append((source_node, dest_node, Type))
-            self.CFG_file.write(str(source_node) + ' ' + str(dest_node) + '\n')
 
     def addTryJuncEdges(self):
         for source_node, Type in self.try_junction_stack[-1]:
             dest_node = self.block_number
             self.block_dict[self.domain_name]["Edges"].append((source_node, dest_node, Type))
-            self.CFG_file.write(str(source_node) + ' ' + str(dest_node) + '\n')
 
     # -----------------------------------------------
     def enterTranslationunit(self, ctx: CPP14_v2Parser.TranslationunitContext):
@@ -189,8 +195,7 @@ class CFGInstListener(CPP14_v2Listener):
         :return:
         """
         self.instrumented_source = open(self.instrument_path + 'instrumented_source.cpp', 'w')
-        log_path = self.instrument_path + "log_file.txt"
-        new_code = '\n#include <fstream>\nstd::ofstream logFile("log_file.txt");\n\n'
+        new_code = '\n' + PROBE_RUNTIME
         self.token_stream_rewriter.insertBeforeIndex(ctx.start.tokenIndex, new_code)
         self.domain_name = 0
 
@@ -206,7 +211,6 @@ class CFGInstListener(CPP14_v2Listener):
             "Nodes": [],
             "Edges": []
         }
-        self.CFG_file = open(self.cfg_path + str(self.domain_name) + '.txt', 'w')
 
     def enterFunctionbody1(self, ctx: CPP14_v2Parser.Functionbody1Context):  # normal function
         self.block_number = 1
@@ -332,7 +336,6 @@ class CFGInstListener(CPP14_v2Listener):
         try:
             for source_node in self.goto_dict[label]:
                 self.block_dict[self.domain_name]["Edges"].append((source_node, self.block_number))
-                self.CFG_file.write(str(source_node) + ' ' + str(self.block_number) + '\n')
         except:
             pass
         index = ctx.statement().start.tokenIndex
@@ -699,13 +702,11 @@ class CFGInstListener(CPP14_v2Listener):
             pass
 
     def exitFunctiondefinition(self, ctx: CPP14_v2Parser.FunctiondefinitionContext):
-        initial_nodes_str = ' '.join(str(node) for node in self.initial_nodes)
-        self.CFG_file.write("initial nodes:" + initial_nodes_str + '\n')
         self.final_nodes.add(self.block_number)
-        final_nodes_str = ' '.join(str(node) for node in self.final_nodes)
-        self.CFG_file.write("final nodes:" + final_nodes_str + '\n')
+        self.cfg_sink.write_cfg(self.domain_name,
+                                [(edge[0], edge[1]) for edge in self.block_dict[self.domain_name]["Edges"]],
+                                self.initial_nodes, self.final_nodes)
         print(self.block_dict)
-        self.CFG_file.close()
 
         graph_json = open(self.cfg_path + str(self.domain_name) + '.json', 'w')
         json.dump(self.block_dict[self.domain_name], graph_json)
@@ -720,10 +721,8 @@ class CFGInstListener(CPP14_v2Listener):
 
         func_graph = self.edge_contraction(func_graph)
 
-        graphviz_layout_progs = ['neato', 'dot', 'twopi', 'fdp', 'sfdp', 'circo']
         # pos = nx.spring_layout(func_graph)
         # pos = nx.kamada_kawai_layout(func_graph)
-        pos = graphviz_layout(G=func_graph, prog=graphviz_layout_progs[1])
 
         color_map = []
         size_map = []
@@ -763,7 +762,7 @@ class CFGInstListener(CPP14_v2Listener):
 
         # nx.drawing.nx_pydot.write_dot(func_graph, self.cfg_path + str(self.domain_name) + '.dot')
         pydot_graph.write(self.cfg_path + str(self.domain_name) + '.dot')
-        pydot_graph.write_png(self.cfg_path + str(self.domain_name) + '_pydot.png')
+        self.graphviz_sources.append(self.cfg_path + str(self.domain_name) + '.dot')
 
     def exitTranslationunit(self, ctx: CPP14_v2Parser.TranslationunitContext):
         """
@@ -779,6 +778,12 @@ class CFGInstListener(CPP14_v2Listener):
 
         functions_json = open(self.cfg_path + 'functions.json', 'w')
         json.dump(self.function_dict, functions_json)
+        if self.owns_cfg_sink:
+            self.cfg_sink.close()
+        if self.render_format:
+            rendered, failed = render_sources(self.graphviz_sources, format=self.render_format)
+            for source_path, error in failed:
+                print('Failed to render {0}: {1}'.format(source_path, error), file=sys.stderr)
 
     def enterDeclarator(self, ctx: CPP14_v2Parser.DeclaratorContext):
         pass
@@ -19,6 +19,7 @@ __version__ = '2.0.1'
 __author__ = 'Rezvani, Zakeri'
 
 import json
+import sys
 import networkx as nx
 
 from antlr4 import *
@@ -27,6 +28,9 @@ from antlr4 import TokenStreamRewriter
 from coda.antlr_gen.cpp_parser.CPP14_v2Listener import CPP14_v2Listener
 from coda.antlr_gen.cpp_parser.CPP14_v2Parser import CPP14_v2Parser
 from coda.antlr_gen.cpp_parser.CPP14_v2Lexer import CPP14_v2Lexer as lexer
+from coda.synthesis.probe_runtime import PROBE_RUNTIME, probe_call
+from coda.graph.cfg_sinks import CFGSink, TextCFGSink
+from coda.graph.render import render_sources
 import graphviz as gv
 
 SWITCH_FOR = {
@@ -57,19 +61,16 @@ class CFGInstListener(CPP14_v2Listener):
         for source_node, Type in self.select_junction_stack[-1]:
             dest_node = self.block_number
             self.block_dict[self.domain_name]["Edges"].append((source_node, dest_node, Type))
-            self.CFG_file.write(str(source_node) + ' ' + str(dest_node) + '\n')
 
     def addJunctionEdges_for(self):
         for source_node, Type in self.select_junction_stack[-1]:
             dest_node = self.block_number
             self.block_dict[self.domain_name]["Edges"].append((source_node, dest_node, 'Flow'))
-            self.CFG_file.write(str(source_node) + ' ' + str(dest_node) + '\n')
 
     def addDecisionEdge(self):
         source_node, Type = self.select_decision_stack.pop()
         dest_node = self.block_number
         self.block_dict[self.domain_name]["Edges"].append((source_node, dest_node, Type))
-        self.CFG_file.write(str(source_node) + ' ' + str(dest_node) + '\n')
 
     def addJunc(self, Type='flow'):
         self.select_junction_stack[-1].append((self.block_number, Type))
@@ -81,37 +82,31 @@ class CFGInstListener(CPP14_v2Listener):
         for source_node, Type in self.iterate_junction_stack[-1]:
             dest_node = self.block_number
             self.block_dict[self.domain_name]["Edges"].append((source_node, dest_node, Type))
-            self.CFG_file.write(str(source_node) + ' ' + str(dest_node) + '\n')
 
     def addIterateJunctionEdges_dwhile(self):
         for source_node, Type in self.iterate_junction_stack[-1]:
             dest_node = self.block_number
             self.block_dict[self.domain_name]["Edges"].append((dest_node, source_node + 1, 'flow'))
-            self.CFG_file.write(str(dest_node) + ' ' + str(source_node + 1) + '\n')
 
     def addIterateEdge(self):
         source_node = self.block_number
         dest_node, Type = self.iterate_stack[-1]
         self.block_dict[self.domain_name]["Edges"].append((source_node, dest_node, Type))
-        self.CFG_file.write(str(source_node) + ' ' + str(dest_node) + '\n')
 
     def addIterateEdge_dwhile(self):
         source_node = self.block_number
         dest_node, Type = self.iterate_stack[-1]
         self.block_dict[self.domain_name]["Edges"].append((source_node, dest_node + 1, Type))
-        self.CFG_file.write(str(source_node) + ' ' + str(dest_node + 1) + '\n')
 
     def addInitEdge(self, Type='flow'):
         source_node = self.block_number
         dest_node = source_node + 1
         self.block_dict[self.domain_name]["Edges"].append((source_node, dest_node, Type))
-        self.CFG_file.write(str(source_node) + ' ' + str(dest_node) + '\n')
 
     def addDoWhileInitEdge(self):
         source_node = self.block_number
         dest_node = source_node + 1
         self.block_dict[self.domain_name]["Edges"].append((source_node, dest_node, 'flow'))
-        self.CFG_file.write(str(source_node) + ' ' + str(dest_node) + '\n')
 
     def addIterateJunc(self, Type='flow'):
         self.iterate_junction_stack[-1].append((self.block_number, Type))
@@ -126,19 +121,16 @@ class CFGInstListener(CPP14_v2Listener):
         source_node, Type = self.switch_stack[-1]
         dest_node = self.block_number
         self.block_dict[self.domain_name]["Edges"].append((source_node, dest_node, Type))
-        self.CFG_file.write(str(source_node) + ' ' + str(dest_node) + '\n')
 
     def addSwitchJunctionEdges(self):
         for source_node, Type in self.switch_junction_stack[-1]:
             dest_node = self.block_number
             self.block_dict[self.domain_name]["Edges"].append((source_node, dest_node, Type))
-            self.CFG_file.write(str(source_node) + ' ' + str(dest_node) + '\n')
 
     def add_throwedges(self):
         for source_node, Type in self.throw_stack[-1]:
             dest_node = self.block_number
             self.block_dict[self.domain_name]["Edges"].append((source_node, dest_node, Type))
-            self.CFG_file.write(str(source_node) + ' ' + str(dest_node) + '\n')
 
     def add_throw(self, Type='Exception'):
         self.throw_stack.append((self.block_number, Type))
@@ -153,14 +145,13 @@ class CFGInstListener(CPP14_v2Listener):
         source_node = self.block_number
         dest_node = self.label_dict[label]
         self.block_dict[self.domain_name]["Edges"].append((source_node, dest_node, 'goto'))
-        self.CFG_file.write(str(source_node) + ' ' + str(dest_node) + '\n')
 
     def insertAfter(self, ctx):
         new_code = '\n' + self.logLine() + ';\n'
         self.token_stream_rewriter.insertAfter(ctx.start.tokenIndex, new_code)
 
     def logLine(self):
-        return 'logFile << "' + str(self.domain_name) + ' ' + str(self.block_number) + '" << std::endl'
+        return probe_call(self.domain_name, self.block_number)
 
     def addTryJunc(self, Type='flow'):
         self.try_junction_stack[-1].append((self.block_number, Type))
@@ -169,19 +160,30 @@ class CFGInstListener(CPP14_v2Listener):
         for source_node, Type in self.try_stack[-1]:
             dest_node = self.block_number
             self.block_dict[self.domain_name]["Edges"].append((source_node, dest_node, Type))
-            self.CFG_file.write(str(source_node) + ' ' + str(dest_node) + '\n')
 
     def addTryJuncEdges(self):
         for source_node, Type in self.try_junction_stack[-1]:
             dest_node = self.block_number
             self.block_dict[self.domain_name]["Edges"].append((source_node, dest_node, Type))
-            self.CFG_file.write(str(source_node) + ' ' + str(dest_node) + '\n')
 
-    def __init__(self, common_token_stream: CommonTokenStream, number_of_tokens, directory_name):
+    def __init__(self, common_token_stream: CommonTokenStream, number_of_tokens, directory_name,
+                 token_stream_rewriter: TokenStreamRewriter.TokenStreamRewriter = None, cfg_sink: CFGSink = None,
+                 render_format: str = None):
         """
         :param common_token_stream:
+        :param number_of_tokens: The size of the filled token buffer, e.g., `ParseSession.number_of_tokens`
+        :param directory_name:
+        :param token_stream_rewriter: An existing rewriter over `common_token_stream` to reuse, if any
+        :param cfg_sink: The sink of the function CFGs, by default a `TextCFGSink` in the CFG directory;
+            a given sink is not closed by the listener
+        :param render_format: The format to render the saved Graphviz sources of the CFGs to, all at once
+            after the walk, e.g., png or svg; the sources are only saved by default
         """
         self.cfg_path = 'extracted_cfgs/' + directory_name + '/'
+        self.owns_cfg_sink = cfg_sink is None
+        self.cfg_sink = TextCFGSink(self.cfg_path) if cfg_sink is None else cfg_sink
+        self.render_format = render_format
+        self.graphviz_sources = []
         self.instrument_path = 'instrumented_programs/' + directory_name + '/'
         self.block_dict = {}
         self.block_number = 0
@@ -215,7 +217,9 @@ class CFGInstListener(CPP14_v2Listener):
         self.goto_dict = {}
 
         # Move all the tokens in the source code in a buffer, token_stream_rewriter.
-        if common_token_stream is not None:
+        if token_stream_rewriter is not None:
+            self.token_stream_rewriter = token_stream_rewriter
+        elif common_token_stream is not None:
             self.token_stream_rewriter = TokenStreamRewriter.TokenStreamRewriter(common_token_stream)
         else:
             raise TypeError('common_token_stream is None')
@@ -229,8 +233,7 @@ class CFGInstListener(CPP14_v2Listener):
         :return:
         """
         self.instrumented_source = open(self.instrument_path + 'instrumented_source.cpp', 'w')
-        log_path = self.instrument_path + "log_file.txt"
-        new_code = '\n//in the name of allah\n#include <fstream>\nstd::ofstream logFile("log_file.txt");\n\n'
+        new_code = '\n//in the name of allah\n' + PROBE_RUNTIME
         self.token_stream_rewriter.insertBeforeIndex(ctx.start.tokenIndex, new_code)
         self.domain_name = 0
 
@@ -246,7 +249,6 @@ class CFGInstListener(CPP14_v2Listener):
             "Nodes": [],
             "Edges": []
         }
-        self.CFG_file = open(self.cfg_path + str(self.domain_name) + '.txt', 'w')
 
     def enterFunctionbody1(self, ctx: CPP14_v2Parser.Functionbody1Context):  # normal function
         self.block_number = 1
@@ -504,7 +506,6 @@ class CFGInstListener(CPP14_v2Listener):
         try:
             for source_node in self.goto_dict[label]:
                 self.block_dict[self.domain_name]["Edges"].append((source_node, self.block_number))
-                self.CFG_file.write(str(source_node) + ' ' + str(self.block_number) + '\n')
         except:
             pass
         index = ctx.statement().start.tokenIndex
@@ -810,13 +811,11 @@ class CFGInstListener(CPP14_v2Listener):
         self.is_catch = True
 
     def exitFunctiondefinition(self, ctx: CPP14_v2Parser.FunctiondefinitionContext):
-        initial_nodes_str = ' '.join(str(node) for node in self.initial_nodes)
-        self.CFG_file.write("initial nodes:" + initial_nodes_str + '\n')
         self.final_nodes.add(self.block_number)
-        final_nodes_str = ' '.join(str(node) for node in self.final_nodes)
-        self.CFG_file.write("final nodes:" + final_nodes_str + '\n')
+        self.cfg_sink.write_cfg(self.domain_name,
+                                [(edge[0], edge[1]) for edge in self.block_dict[self.domain_name]["Edges"]],
+                                self.initial_nodes, self.final_nodes)
 
-        self.CFG_file.close()
         temp = []
         temp_e = []
         func_graph = nx.DiGraph()
@@ -861,7 +860,7 @@ class CFGInstListener(CPP14_v2Listener):
 
         graph.edge('start', f'{str(Nodes_list[0])}:here:n')
 
-        graph.render(f'{self.cfg_path}/{str(self.domain_name)}.gv', view=True)
+        self.graphviz_sources.append(graph.save(f'{self.cfg_path}/{str(self.domain_name)}.gv'))
 
         graph_json = open(self.cfg_path + str(self.domain_name) + '.json', 'w')
         json.dump(self.block_dict[self.domain_name], graph_json)
@@ -880,6 +879,12 @@ class CFGInstListener(CPP14_v2Listener):
 
         functions_json = open(self.cfg_path + 'functions.json', 'w')
         json.dump(self.function_dict, functions_json)
+        if self.owns_cfg_sink:
+            self.cfg_sink.close()
+        if self.render_format:
+            rendered, failed = render_sources(self.graphviz_sources, format=self.render_format)
+            for source_path, error in failed:
+                print('Failed to render {0}: {1}'.format(source_path, error), file=sys.stderr)
 
     def enterDeclarator(self, ctx: CPP14_v2Parser.DeclaratorContext):
         pass
@@ -36,6 +36,7 @@ from coda.analysis.cfg.lang_structures import (
 from coda.graph.utils import (
     build_single_node_graph,
     concat_graphs,
+    concat_graph_sequence,
     build_isolated_node_graph
 )
 
@@ -95,7 +96,7 @@ class CFGExtractorVisitor(CPP14_v2Visitor):
 
     def visitHandlerseq(self, ctx: CPP14_v2Parser.HandlerseqContext):
         g_handler = self.visit(ctx.handler())
-        g = g_handler.copy()
+        g = g_handler
         if ctx.handlerseq():
             g_handler_seq = self.visit(ctx.handlerseq())
             g = concat_graphs(g, g_handler_seq)
@@ -120,9 +121,13 @@ class CFGExtractorVisitor(CPP14_v2Visitor):
         return self.visit(ctx.statement())
 
     def visitStatementseq2(self, ctx: CPP14_v2Parser.Statementseq2Context):
-        gin1 = self.visit(ctx.statementseq())
-        gin2 = self.visit(ctx.statement())
-        return concat_graphs(gin1, gin2)
+        # The rule is left-recursive, so its statements are collected by a loop rather than by recursion
+        statements = []
+        while isinstance(ctx, CPP14_v2Parser.Statementseq2Context):
+            statements.append(ctx.statement())
+            ctx = ctx.statementseq()
+        statements.append(ctx.statement())
+        return concat_graph_sequence(self.visit(statement) for statement in reversed(statements))
 
     def visitExpressionstatement(self, ctx: CPP14_v2Parser.ExpressionstatementContext):
         return build_single_node_graph(ctx)
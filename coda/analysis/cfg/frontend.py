@@ -0,0 +1,77 @@
+"""
+
+Pluggable C++ front-ends of the CFG extraction
+
+A front-end parses a C++ source and builds the CFG of each function definition with the
+`lang_structures.embed_in_*` builders, so every front-end produces the same CFG model as
+`CFGExtractorVisitor`: a `coda.graph.compact_cfg.CompactCFG` per function, whose nodes have a
+`data` list of rules and whose decision edges have a `state`.
+
+The rules in the blocks answer `start`, `stop`, `getText()` and, for return statements,
+`expression()`, like ANTLR rule contexts. The functions are keyed by their declarators.
+
+Available front-ends:
+
+- `antlr`: the generated `CPP14_v2Parser` and `CFGExtractorVisitor`
+- `tree-sitter`: tree-sitter-cpp, see `coda.analysis.cfg.tree_sitter_frontend`; it requires
+the optional `tree-sitter` and `tree-sitter-cpp` packages
+
+"""
+
+__version__ = '0.1.0'
+__author__ = 'Morteza Zakeri'
+
+import importlib
+
+FRONT_ENDS = {
+    'antlr': ('coda.analysis.cfg.frontend', 'AntlrFrontEnd'),
+    'tree-sitter': ('coda.analysis.cfg.tree_sitter_frontend', 'TreeSitterFrontEnd'),
+}
+
+
+class CFGFrontEnd:
+    """
+    The interface of the front-ends that extract the CFGs of the functions of a C++ source
+
+    """
+    name = None
+
+    def extract_cfgs(self, source: str) -> dict:
+        """
+        Returns:
+
+            A dictionary of function declarators to their CFGs, as `CFGExtractorVisitor.functions`
+
+        """
+        raise NotImplementedError
+
+    def extract_cfgs_from_file(self, path, encoding='utf8') -> dict:
+        with open(path, encoding=encoding) as f:
+            return self.extract_cfgs(f.read())
+
+
+class AntlrFrontEnd(CFGFrontEnd):
+    name = 'antlr'
+
+    def __init__(self, parse_mode: str = 'll'):
+        self.parse_mode = parse_mode
+
+    def extract_cfgs(self, source: str) -> dict:
+        from coda.analysis.parse_session import ParseSession
+        from coda.analysis.cfg.cfg_extractor_visitor import CFGExtractorVisitor
+
+        session = ParseSession.from_source(source, parse_mode=self.parse_mode)
+        cfg_extractor = CFGExtractorVisitor(session.token_stream)
+        cfg_extractor.visit(session.parse_tree)
+        return cfg_extractor.functions
+
+
+def get_front_end(name: str = 'antlr', **options) -> CFGFrontEnd:
+    """
+    Create a front-end by its name, one of `FRONT_ENDS`
+
+    """
+    if name not in FRONT_ENDS:
+        raise ValueError('Unknown front-end {0!r}, expected one of {1}'.format(name, tuple(FRONT_ENDS)))
+    module_name, class_name = FRONT_ENDS[name]
+    return getattr(importlib.import_module(module_name), class_name)(**options)
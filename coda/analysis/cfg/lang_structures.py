@@ -1,12 +1,12 @@
-import networkx as nx
 
 from coda.antlr_gen.cpp_parser.CPP14_v2Parser import CPP14_v2Parser
 from coda.antlr_gen.rule_utils import is_break
+from coda.graph.compact_cfg import CompactCFG
 from coda.graph.utils import (
     shift_node_labels,
     head_node, last_node,
     split_on_break,
-    split_on_continue,
+    split_on_loop_jumps,
     split_on_return,
     split_on_throw,
     compose,
@@ -23,24 +23,23 @@ def embed_in_for_structure(gin, initializer, condition, successor):
     g_succ = gin_last + 1
     g_last = g_succ + 1
     g.add_edges_from([(g_head, g_cond),
-                      (g_cond, gin_head, {"state": "True"}),
-                      (g_cond, g_last, {"state": "False"}),
+                      (g_cond, gin_head, "True"),
+                      (g_cond, g_last, "False"),
                       (gin_last, g_succ),
                       (g_succ, g_cond)])
 
-    g.nodes[g_succ]["data"] = [successor]
-    g.nodes[g_last]["data"] = []
+    g.set_data(g_succ, [successor])
+    g.set_data(g_last, [])
     g = compose(g, gin)
-    g = split_on_continue(g, g_succ)
-    g = split_on_break(g)
+    g = split_on_loop_jumps(g, g_succ)
     return g
 
 
 def build_for_initial_graph(condition, initializer):
-    g = nx.DiGraph()
+    g = CompactCFG()
     g_head, g_cond = 0, 1
-    g.add_nodes_from([(g_head, {"data": [initializer]}),
-                      (g_cond, {"data": [condition]})])
+    g.add_node(g_head, [initializer])
+    g.add_node(g_cond, [condition])
     return g, g_cond, g_head
 
 
@@ -53,21 +52,20 @@ def embed_in_do_while_structure(gin, condition):
 
     g.add_edges_from([(g_head, gin_head),
                       (gin_last, g_cond),
-                      (g_cond, gin_head, {"state": "True"}),
-                      (g_cond, g_last, {"state": "False"})])
+                      (g_cond, gin_head, "True"),
+                      (g_cond, g_last, "False")])
 
-    g.nodes[g_cond]["data"] = [condition]
-    g.nodes[g_last]["data"] = []
+    g.set_data(g_cond, [condition])
+    g.set_data(g_last, [])
     g = compose(g, gin)
-    g = split_on_continue(g, g_cond)
-    g = split_on_break(g)
+    g = split_on_loop_jumps(g, g_cond)
     return g
 
 
 def build_simple_initial_graph():
-    g = nx.DiGraph()
+    g = CompactCFG()
     g_head = 0
-    g.add_node(g_head, data=[])
+    g.add_node(g_head, [])
     return g, g_head
 
 
@@ -79,22 +77,21 @@ def embed_in_while_structure(gin, condition):
     g_last = gin_last + 1
 
     g.add_edges_from([(g_head, g_cond),
-                      (g_cond, gin_head, {"state": "True"}),
-                      (g_cond, g_last, {"state": "False"}),
+                      (g_cond, gin_head, "True"),
+                      (g_cond, g_last, "False"),
                       (gin_last, g_cond)])
 
-    g.nodes[g_last]["data"] = []
+    g.set_data(g_last, [])
     g = compose(g, gin)
-    g = split_on_continue(g, g_cond)
-    g = split_on_break(g)
+    g = split_on_loop_jumps(g, g_cond)
     return g
 
 
 def build_initial_while_graph(condition):
-    g = nx.DiGraph()
+    g = CompactCFG()
     g_head, g_cond = 0, 1
-    g.add_nodes_from([(g_head, {"data": []}),
-                      (g_cond, {"data": [condition]})])
+    g.add_node(g_head, [])
+    g.add_node(g_cond, [condition])
     return g, g_cond, g_head
 
 
@@ -111,12 +108,12 @@ def embed_in_if_else_structure(gin_true, gin_false, condition):
     g_last = gin_false_last + len(g)
 
     # set if-else structure nodes, as well as the decision flows
-    g.add_edges_from([(g_head, gin_false_head, {"state": "False"}),
-                      (g_head, gin_true_head, {"state": "True"}),
+    g.add_edges_from([(g_head, gin_false_head, "False"),
+                      (g_head, gin_true_head, "True"),
                       (gin_true_last, g_last),
                       (gin_false_last, g_last)])
     # set the junction basic block as an empty block
-    g.nodes[g_last]["data"] = []
+    g.set_data(g_last, [])
 
     # compose then part, else part, and the new graph into a graph as the final result
     g = compose(g, gin_true, gin_false)
@@ -127,9 +124,9 @@ def get_graph_label_range(gin): return head_node(gin), last_node(gin)
 
 
 def build_initial_conditional_graph(condition):
-    g = nx.DiGraph()
+    g = CompactCFG()
     g_head = 0
-    g.add_node(g_head, data=[condition])
+    g.add_node(g_head, [condition])
     return g, g_head
 
 
@@ -139,7 +136,7 @@ def shift_if_else_graphs(n, gin_true, gin_false):
     return gin_false, gin_true
 
 
-def embed_in_if_structure(gin, condition) -> nx.DiGraph:
+def embed_in_if_structure(gin, condition) -> CompactCFG:
     g, g_head = build_initial_conditional_graph(condition)
     gin = shift_node_labels(gin, len(g))
 
@@ -147,28 +144,28 @@ def embed_in_if_structure(gin, condition) -> nx.DiGraph:
 
     g_last = gin_last + len(g)
 
-    g.add_edges_from([(g_head, g_last, {"state": "False"}),
-                      (g_head, gin_head, {"state": "True"}),
+    g.add_edges_from([(g_head, g_last, "False"),
+                      (g_head, gin_head, "True"),
                       (gin_last, g_last)])
 
-    g.nodes[g_last]["data"] = []
+    g.set_data(g_last, [])
     g = compose(g, gin)
     return g
 
 
-def embed_in_switch_structure(gin: nx.DiGraph, condition):
+def embed_in_switch_structure(gin: CompactCFG, condition):
     g, g_head = build_initial_conditional_graph(condition)
     sub_graphs, cases = extract_case_sub_graphs(gin)
     g_last = sum([len(h) for h in sub_graphs]) + 1
 
     hs = shift_case_graphs(sub_graphs, len(g))
-    g.add_edges_from([(g_head, head_node(h), {"state": case.getText()}) for h, case in zip(hs, cases)])
+    g.add_edges_from([(g_head, head_node(h), case.getText()) for h, case in zip(hs, cases)])
 
     with_breaks, trails = partition_graphs_on_break(hs)
     g.add_edges_from([(last_node(h), g_last) for h in with_breaks])
     g.add_edges_from([(last_node(h), head_node(hs[hs.index(h) + 1])) for h in trails])
 
-    g.nodes[g_last]["data"] = []
+    g.set_data(g_last, [])
     g = compose(g, *hs)
     g = split_on_break(g)
     return g
@@ -181,7 +178,7 @@ def shift_case_graphs(sub_graphs, n):
 
 
 def partition_graphs_on_break(gs):
-    contains_break = lambda g: any(is_break(ctx) for ctx in g.nodes[last_node(g)]["data"])
+    contains_break = lambda g: any(is_break(ctx) for ctx in g.data(last_node(g)))
     with_breaks, trails = partition(contains_break, gs[:-1])
     with_breaks.append(gs[-1])
     return with_breaks, trails
@@ -198,9 +195,14 @@ def partition(predicate, iterator):
 
 
 def case_indices(gin):
-    return zip(*[(l, d[0]) for l, d in gin.nodes(data="data") if
-                 d and (isinstance(d[0], CPP14_v2Parser.ConstantexpressionContext)
-                        or d[0].getText() == "default")])
+    return zip(*[(l, d[0]) for l, d in gin.nodes_data() if
+                 d and (is_case_value(d[0]) or d[0].getText() == "default")])
+
+
+def is_case_value(rule) -> bool:
+    # Rules of other front-ends name their grammar rule, see `coda.analysis.cfg.frontend`
+    return (isinstance(rule, CPP14_v2Parser.ConstantexpressionContext)
+            or getattr(rule, 'rule_name', None) == 'constantexpression')
 
 
 def extract_case_sub_graphs(gin):
@@ -219,16 +221,16 @@ def pair_case_indices(iterator, ending):
 
 
 def embed_in_function_structure(gin):
-    g = gin.copy()
+    g = gin
     g_last = last_node(gin) + 1
-    g.add_node(g_last, data=[])
     g.add_edge(last_node(gin), g_last)
+    g.set_data(g_last, [])
     g = split_on_return(g)
     return solve_null_nodes(g)
 
 
 def embed_in_try_catch_structure(g_body, g_handler_seq):
-    g = nx.DiGraph()
+    g = CompactCFG()
     g_handler_seq = shift_node_labels(g_handler_seq, len(g_body))
     g_handler_seq_head, g_handler_seq_last = get_graph_label_range(g_handler_seq)
     g_body_last = last_node(g_body)
@@ -237,7 +239,7 @@ def embed_in_try_catch_structure(g_body, g_handler_seq):
     g.add_edges_from([(g_body_last, g_last),
                       (g_handler_seq_last, g_last)])
     g = compose(g, g_handler_seq, g_body)
-    g.nodes[g_last]["data"] = []
+    g.set_data(g_last, [])
 
     g = split_on_throw(g, g_handler_seq_head)
     return g
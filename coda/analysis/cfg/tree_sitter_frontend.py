@@ -0,0 +1,304 @@
+"""
+
+tree-sitter C++ front-end of the CFG extraction
+
+The front-end parses a source with the C-backed tree-sitter-cpp parser and builds the function CFGs
+with the same `lang_structures` builders as `CFGExtractorVisitor`. The statements are mapped onto the
+rules of the `CPP14_v2` grammar that the visitor handles, e.g., a `case` label takes only the first
+statement after it as its body, as `labeledstatement` does, and a range-based `for` loop is its body.
+
+The tree-sitter nodes in the blocks are wrapped in `TreeSitterRule`, which answers like an ANTLR
+rule context: `start` and `stop` tokens with the `CPP14_v2Lexer` token types of keywords, `getText()`
+without whitespace and comments, and `expression()` for return statements.
+
+Known differences to the ANTLR front-end:
+
+- Function-try-blocks are built as try-catch structures, while the visitor keeps only the handlers.
+- Empty compound statements, `return {...};` and `goto` build a CFG, while the visitor fails on them.
+
+The `tree-sitter` and `tree-sitter-cpp` packages are optional dependencies:
+
+    pip install tree-sitter tree-sitter-cpp
+
+"""
+
+__version__ = '0.1.0'
+__author__ = 'Morteza Zakeri'
+
+from coda.analysis.cfg.frontend import CFGFrontEnd
+from coda.analysis.cfg.lang_structures import (
+    embed_in_function_structure,
+    embed_in_do_while_structure,
+    embed_in_for_structure,
+    embed_in_switch_structure,
+    embed_in_if_structure,
+    embed_in_if_else_structure,
+    embed_in_while_structure,
+    embed_in_try_catch_structure
+)
+from coda.antlr_gen.cpp_parser.CPP14_v2Parser import CPP14_v2Parser
+from coda.graph.utils import (
+    build_single_node_graph,
+    concat_graph_sequence,
+    build_isolated_node_graph
+)
+
+# Token types of the keywords and operators, by their text; the parser lists the literal names of all types
+LITERAL_TYPES = {name[1:-1]: token_type for token_type, name in enumerate(CPP14_v2Parser.literalNames)
+                 if name.startswith("'")}
+
+# Nodes whose text is one token of the ANTLR lexer
+LITERAL_NODES = {'string_literal', 'char_literal', 'raw_string_literal', 'number_literal'}
+
+# Conditional preprocessor blocks, whose statements are all seen by the ANTLR parser
+PREPROCESSOR_BLOCKS = {'preproc_if', 'preproc_ifdef', 'preproc_else', 'preproc_elif', 'preproc_elifdef'}
+
+
+class TreeSitterToken:
+    __slots__ = ('type', 'text', 'line', 'column')
+
+    def __init__(self, node):
+        self.text = node.text.decode('utf8', errors='replace')
+        self.type = LITERAL_TYPES.get(self.text, 0)
+        self.line = node.start_point[0] + 1
+        self.column = node.start_point[1]
+
+
+def leaves(node):
+    """
+    The token nodes under a node, without the comments
+
+    """
+    stack = [node]
+    while stack:
+        n = stack.pop()
+        if n.type == 'comment' or n.is_missing:
+            continue
+        if n.child_count == 0 or n.type in LITERAL_NODES:
+            if n.end_byte > n.start_byte:
+                yield n
+        else:
+            stack.extend(reversed(n.children))
+
+
+class TreeSitterRule:
+    """
+    A tree-sitter node, or a range of sibling nodes, in place of an ANTLR rule context
+
+    """
+    __slots__ = ('nodes', 'rule_name', 'start', 'stop', '_expression')
+
+    def __init__(self, nodes, rule_name: str, expression=None):
+        self.nodes = nodes
+        self.rule_name = rule_name
+        tokens = [t for node in nodes for t in leaves(node)]
+        self.start = TreeSitterToken(tokens[0]) if tokens else None
+        self.stop = TreeSitterToken(tokens[-1]) if tokens else None
+        self._expression = expression
+
+    def getText(self) -> str:
+        return ''.join(t.text.decode('utf8', errors='replace') for node in self.nodes for t in leaves(node))
+
+    def expression(self):
+        return self._expression
+
+    def __repr__(self):
+        return '<{0} {1!r}>'.format(self.rule_name, self.getText())
+
+
+def statement_children(node):
+    """
+    The named children of a node that are statements, with the preprocessor blocks flattened
+
+    """
+    for i, child in enumerate(node.children):
+        if not child.is_named or child.type == 'comment' or node.field_name_for_child(i) == 'condition':
+            continue
+        if child.type in PREPROCESSOR_BLOCKS:
+            yield from statement_children(child)
+        elif not child.type.startswith('preproc_'):
+            yield child
+
+
+def inner_expression(node):
+    """
+    The expression in a condition clause or a parenthesized expression
+
+    """
+    value = node.child_by_field_name('value')
+    if value is not None:
+        return value
+    named = [c for c in node.named_children if c.type != 'comment']
+    return named[0] if named else None
+
+
+def rule(node, rule_name: str):
+    return None if node is None else TreeSitterRule([node], rule_name)
+
+
+class TreeSitterCFGBuilder:
+    """
+    Build the CFG of one function from its tree-sitter body
+
+    """
+
+    def visit(self, node):
+        method = getattr(self, 'visit_' + node.type, None)
+        if method is None:
+            return build_single_node_graph(TreeSitterRule([node], 'statement'))
+        return method(node)
+
+    def visit_compound_statement(self, node):
+        return self.visit_sequence(list(statement_children(node)))
+
+    def visit_sequence(self, statements):
+        graphs = []
+        k = 0
+        while k < len(statements):
+            statement = statements[k]
+            if statement.type != 'case_statement':
+                graphs.append(self.visit(statement))
+                k += 1
+                continue
+            # A case label takes the next statement as its body, and nested labels are part of that body
+            label = self.case_label(statement)
+            body = case_body(statement)
+            nested = []
+            while not body and k + 1 < len(statements) and statements[k + 1].type == 'case_statement':
+                k += 1
+                nested.extend(case_label_nodes(statements[k]))
+                body = case_body(statements[k])
+            body_rule = TreeSitterRule(nested + body[:1], 'statement') if body or nested else None
+            graphs.append(build_isolated_node_graph(label, body_rule))
+            graphs.extend(self.visit(s) for s in body[1:])
+            k += 1
+        if not graphs:
+            return build_single_node_graph()
+        return concat_graph_sequence(graphs)
+
+    @staticmethod
+    def case_label(node):
+        value = node.child_by_field_name('value')
+        if value is None:
+            return TreeSitterRule([node.children[0]], 'Default')
+        return TreeSitterRule([value], 'constantexpression')
+
+    def visit_if_statement(self, node):
+        condition = rule(inner_expression(node.child_by_field_name('condition')), 'condition')
+        gin_if = self.visit(node.child_by_field_name('consequence'))
+        alternative = node.child_by_field_name('alternative')
+        if alternative is None:
+            return embed_in_if_structure(gin_if, condition)
+        else_body = alternative if alternative.type != 'else_clause' else list(statement_children(alternative))[0]
+        return embed_in_if_else_structure(gin_if, self.visit(else_body), condition)
+
+    def visit_switch_statement(self, node):
+        condition = rule(inner_expression(node.child_by_field_name('condition')), 'condition')
+        return embed_in_switch_structure(self.visit(node.child_by_field_name('body')), condition)
+
+    def visit_while_statement(self, node):
+        condition = rule(inner_expression(node.child_by_field_name('condition')), 'condition')
+        return embed_in_while_structure(self.visit(node.child_by_field_name('body')), condition)
+
+    def visit_do_statement(self, node):
+        condition = rule(inner_expression(node.child_by_field_name('condition')), 'expression')
+        return embed_in_do_while_structure(self.visit(node.child_by_field_name('body')), condition)
+
+    def visit_for_statement(self, node):
+        children = node.children
+        initializer = node.child_by_field_name('initializer')
+        # The init statement of the grammar ends with its semicolon
+        first = children.index(initializer) if initializer is not None else 2
+        end = first
+        while children[end].type != ';' and children[end].type != 'declaration':
+            end += 1
+        init = TreeSitterRule(children[first:end + 1], 'forinitstatement')
+        condition = rule(node.child_by_field_name('condition'), 'condition')
+        successor = rule(node.child_by_field_name('update'), 'expression')
+        gin = self.visit(node.child_by_field_name('body'))
+        return embed_in_for_structure(gin, init, condition, successor)
+
+    def visit_for_range_loop(self, node):
+        return self.visit(node.child_by_field_name('body'))
+
+    def visit_try_statement(self, node):
+        g_body = self.visit(node.child_by_field_name('body'))
+        handlers = [self.visit(c.child_by_field_name('body')) for c in node.children if c.type == 'catch_clause']
+        return embed_in_try_catch_structure(g_body, concat_graph_sequence(handlers))
+
+    def visit_labeled_statement(self, node):
+        return self.visit(list(statement_children(node))[-1])
+
+    def visit_attributed_statement(self, node):
+        return self.visit(list(statement_children(node))[-1])
+
+    def visit_return_statement(self, node):
+        values = [c for c in node.named_children if c.type != 'comment']
+        return build_single_node_graph(TreeSitterRule([node], 'jumpstatement', rule(values[0] if values else None,
+                                                                                  'expression')))
+
+
+def case_label_nodes(node) -> list:
+    """
+    The nodes of the label of a case statement, up to its colon
+
+    """
+    children = node.children
+    colon = next(i for i, c in enumerate(children) if c.type == ':')
+    return children[:colon + 1]
+
+
+def case_body(node) -> list:
+    """
+    The statements after the label of a case statement
+
+    """
+    children = node.children
+    return [c for c in children[len(case_label_nodes(node)):] if c.is_named and c.type != 'comment']
+
+
+def function_definitions(root):
+    """
+    The function definitions with a body, outside of other function bodies
+
+    """
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if node.type == 'function_definition':
+            if any(c.type in ('compound_statement', 'try_statement') for c in node.children):
+                yield node
+            continue
+        stack.extend(reversed(node.children))
+
+
+class TreeSitterFrontEnd(CFGFrontEnd):
+    name = 'tree-sitter'
+
+    def __init__(self):
+        try:
+            import tree_sitter
+            import tree_sitter_cpp
+        except ImportError as e:
+            raise ImportError('The tree-sitter front-end requires the optional packages '
+                              '"tree-sitter" and "tree-sitter-cpp"') from e
+        language = tree_sitter.Language(tree_sitter_cpp.language())
+        try:
+            self.parser = tree_sitter.Parser(language)
+        except TypeError:
+            # tree-sitter < 0.22
+            self.parser = tree_sitter.Parser()
+            self.parser.set_language(language)
+
+    def parse(self, source: str):
+        return self.parser.parse(source.encode('utf8'))
+
+    def extract_cfgs(self, source: str) -> dict:
+        tree = self.parse(source)
+        builder = TreeSitterCFGBuilder()
+        functions = {}
+        for node in function_definitions(tree.root_node):
+            body = next(c for c in node.children if c.type in ('compound_statement', 'try_statement'))
+            declarator = TreeSitterRule([node.child_by_field_name('declarator')], 'declarator')
+            functions[declarator] = embed_in_function_structure(builder.visit(body))
+        return functions
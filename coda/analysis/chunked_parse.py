@@ -0,0 +1,271 @@
+"""
+
+Function-level chunked parsing of C++ translation units
+
+Instead of parsing a whole translation unit with one `translationunit()` call, the token
+stream is pre-scanned for the top-level function definitions by brace matching on the
+default channel. Each function is then lexed and parsed on its own with the
+`functiondefinition` rule, optionally on a process pool, and its CFG is extracted by
+`CFGExtractorVisitor`. Only one function parse tree is alive at a time in each process.
+
+The chunk CFGs are returned with their blocks as token index ranges of the whole file,
+so that they are rebuilt on top of the token stream of the translation unit.
+
+The pre-scan is a heuristic: namespaces and `extern "C"` blocks are entered, while class,
+struct, union and enum bodies, as well as brace initializers, are skipped. Member functions
+defined inside class bodies are therefore not extracted in this mode.
+
+"""
+
+__version__ = '0.1.0'
+__author__ = 'Morteza Zakeri'
+
+from concurrent.futures import ProcessPoolExecutor
+
+from antlr4 import InputStream, CommonTokenStream, Token
+
+from coda.antlr_gen.cpp_parser.CPP14_v2Lexer import CPP14_v2Lexer
+from coda.graph.utils import graph_to_token_ranges, graph_from_token_ranges
+from coda.antlr_gen.rule_utils import RuleSpan, rule_token_range
+
+CLASS_KEYS = {CPP14_v2Lexer.Class, CPP14_v2Lexer.Struct, CPP14_v2Lexer.Union, CPP14_v2Lexer.Enum}
+
+
+def default_channel_indices(tokens) -> list:
+    return [t.tokenIndex for t in tokens if t.channel == Token.DEFAULT_CHANNEL and t.type != Token.EOF]
+
+
+def match_brace(tokens, indices, k) -> int:
+    """
+    The position in `indices` of the brace closing the one at position `k`
+
+    """
+    depth = 0
+    for j in range(k, len(indices)):
+        token_type = tokens[indices[j]].type
+        if token_type == CPP14_v2Lexer.LeftBrace:
+            depth += 1
+        elif token_type == CPP14_v2Lexer.RightBrace:
+            depth -= 1
+            if depth == 0:
+                return j
+    return len(indices) - 1
+
+
+def skip_template_header(tokens, indices, k, end) -> int:
+    """
+    Skip `template < ... >` headers starting at position `k`
+
+    """
+    while k < end and tokens[indices[k]].type == CPP14_v2Lexer.Template:
+        k += 1
+        depth = 0
+        while k < end:
+            token_type = tokens[indices[k]].type
+            k += 1
+            if token_type == CPP14_v2Lexer.Less:
+                depth += 1
+            elif token_type == CPP14_v2Lexer.Greater:
+                depth -= 1
+            elif token_type == CPP14_v2Lexer.RightShift:
+                depth -= 2
+            if depth <= 0:
+                break
+    return k
+
+
+def classify_head(tokens, indices, start, end) -> str:
+    """
+    Classify the declaration head in positions `[start, end)`, just before a top-level brace
+
+    Returns:
+
+        'scope' for namespaces and linkage specifications, 'function' for function definitions,
+        and 'other' for the other braced declarations, e.g., classes and initializers
+
+    """
+    types = [tokens[indices[k]].type for k in range(start, end)]
+    if not types:
+        return 'other'
+    if CPP14_v2Lexer.Namespace in types[:2]:
+        return 'scope'
+    if types[0] == CPP14_v2Lexer.Extern and len(types) == 2:
+        return 'scope'
+
+    k = skip_template_header(tokens, indices, start, end) - start
+    previous = None
+    for token_type in types[k:]:
+        if token_type == CPP14_v2Lexer.LeftParen:
+            return 'function'
+        if token_type in CLASS_KEYS:
+            return 'other'
+        if token_type == CPP14_v2Lexer.Assign and previous != CPP14_v2Lexer.Operator:
+            return 'other'
+        previous = token_type
+    return 'other'
+
+
+def find_body_start(tokens, indices, k, end) -> int:
+    """
+    The position of the brace opening a function body, at or after position `k`
+
+    Braces of the member initializers in a constructor initializer list, e.g., `a{0}`,
+    follow an identifier or a `>`, while the body follows a `)`, a `}` or a specifier.
+
+    """
+    paren_depth = 0
+    in_ctor_initializer = False
+    while k < end:
+        token_type = tokens[indices[k]].type
+        if token_type == CPP14_v2Lexer.LeftParen:
+            paren_depth += 1
+        elif token_type == CPP14_v2Lexer.RightParen:
+            paren_depth -= 1
+        elif paren_depth == 0 and token_type == CPP14_v2Lexer.Colon:
+            in_ctor_initializer = True
+        elif paren_depth == 0 and token_type == CPP14_v2Lexer.LeftBrace:
+            previous = tokens[indices[k - 1]].type
+            if not in_ctor_initializer or previous in (CPP14_v2Lexer.RightParen, CPP14_v2Lexer.RightBrace):
+                return k
+            k = match_brace(tokens, indices, k)
+        k += 1
+    return end
+
+
+def find_function_chunks(tokens) -> list:
+    """
+    Find the top-level function definitions of a filled token buffer
+
+    Returns:
+
+        A list of (first token index, last token index) pairs, one per function definition
+
+    """
+    indices = default_channel_indices(tokens)
+    chunks = []
+    segment_start = 0
+    scope_depth = 0
+    k = 0
+    n = len(indices)
+    while k < n:
+        token_type = tokens[indices[k]].type
+        if token_type == CPP14_v2Lexer.Semi:
+            segment_start = k + 1
+        elif token_type == CPP14_v2Lexer.RightBrace and scope_depth > 0:
+            # the end of a namespace or a linkage specification
+            scope_depth -= 1
+            segment_start = k + 1
+        elif token_type == CPP14_v2Lexer.LeftBrace:
+            kind = classify_head(tokens, indices, segment_start, k)
+            if kind == 'scope':
+                scope_depth += 1
+                segment_start = k + 1
+            elif kind == 'function':
+                k = find_body_start(tokens, indices, segment_start, n)
+                close = match_brace(tokens, indices, k)
+                # function-try-blocks are followed by their handlers
+                while close + 1 < n and tokens[indices[close + 1]].type == CPP14_v2Lexer.Catch:
+                    close = match_brace(tokens, indices, find_body_start(tokens, indices, close + 1, n))
+                chunks.append((indices[segment_start], indices[close]))
+                k = close
+                segment_start = k + 1
+            else:
+                k = match_brace(tokens, indices, k)
+        k += 1
+    return chunks
+
+
+def chunk_source(tokens, chunk) -> tuple:
+    """
+    The arguments of `parse_chunk` for a chunk of a filled token buffer
+
+    """
+    first, last = tokens[chunk[0]], tokens[chunk[1]]
+    text = first.getInputStream().getText(first.start, last.stop)
+    return text, first.line, first.column, first.tokenIndex
+
+
+def parse_chunk(text: str, line: int, column: int, token_offset: int, parse_mode: str = 'll') -> tuple:
+    """
+    Parse one function definition and extract its CFG
+
+    The chunk is lexed from its own text, starting at its line and column in the file, so its
+    tokens are those of the whole file shifted by `token_offset`.
+
+    Returns:
+
+        (declarator token range, CFG with token index ranges), both in the indices of the whole file
+
+    """
+    from coda.antlr_gen.cpp_parser.CPP14_v2Parser import CPP14_v2Parser
+    from coda.analysis.parse_session import parse_with_mode
+    from coda.analysis.cfg.cfg_extractor_visitor import CFGExtractorVisitor
+
+    lexer = CPP14_v2Lexer(InputStream(text))
+    lexer.line = line
+    lexer.column = column
+    token_stream = CommonTokenStream(lexer)
+    token_stream.fill()
+    tree, _ = parse_with_mode(CPP14_v2Parser(token_stream), parse_mode, start_rule='functiondefinition')
+
+    cfg_extractor = CFGExtractorVisitor(token_stream)
+    cfg_extractor.visit(tree)
+    declarator, g = next(iter(cfg_extractor.functions.items()))
+    ranges = graph_to_token_ranges(g)
+    ranges["nodes"] = [(label, [None if r is None else (r[0] + token_offset, r[1] + token_offset) for r in data])
+                       for label, data in ranges["nodes"]]
+    start, stop = rule_token_range(declarator)
+    return (start + token_offset, stop + token_offset), ranges
+
+
+def parse_chunk_or_error(text: str, line: int, column: int, token_offset: int, parse_mode: str = 'll') -> tuple:
+    """
+    `parse_chunk`, which returns the error message instead of raising it
+
+    """
+    try:
+        return parse_chunk(text, line, column, token_offset, parse_mode), None
+    except Exception as e:
+        return None, '{0}: {1}'.format(type(e).__name__, e)
+
+
+def extract_chunked_cfgs(token_stream: CommonTokenStream, workers: int = 1, parse_mode: str = 'll',
+                         errors: list = None) -> dict:
+    """
+    Extract the CFGs of the top-level functions of a filled token stream, one function at a time
+
+    Args:
+
+        token_stream (CommonTokenStream): The filled token stream of the translation unit,
+        e.g., `ParseSession.token_stream`
+
+        workers (int): The number of worker processes, 1 to parse the functions in this process
+
+        parse_mode (str): The prediction mode of the parser for each function, see `ParseSession`
+
+        errors (list): If given, the functions that fail are skipped and their (line, error message)
+        pairs are appended to it, otherwise the first error is raised
+
+    Returns:
+
+        A dictionary of function declarators to their CFGs, as `CFGExtractorVisitor.functions`
+
+    """
+    tokens = token_stream.tokens
+    args = [chunk_source(tokens, chunk) + (parse_mode,) for chunk in find_function_chunks(tokens)]
+    if workers == 1:
+        results = [parse_chunk_or_error(*a) for a in args]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(parse_chunk_or_error, *zip(*args), chunksize=4)) if args else []
+
+    functions = {}
+    for (_, line, _, _, _), (result, error) in zip(args, results):
+        if error is not None:
+            if errors is None:
+                raise RuntimeError('Failed to extract the CFG of the function at line {0}: {1}'.format(line, error))
+            errors.append((line, error))
+            continue
+        (start, stop), ranges = result
+        functions[RuleSpan(tokens[start], tokens[stop])] = graph_from_token_ranges(ranges, tokens)
+    return functions
@@ -0,0 +1,233 @@
+"""
+
+Persist and preload the ANTLR prediction DFAs of the C++ lexer and parser
+
+The ATN simulators of `CPP14_v2Lexer` and `CPP14_v2Parser` build their decision DFAs
+lazily, and the DFAs are shared by all recognizer instances of a process.
+A fresh process starts from empty DFAs, so the first files of every run pay a heavy warm-up.
+This module saves the warmed DFAs after a run and loads them into a new process,
+before any file is lexed or parsed.
+
+The DFA states refer to the states of the ATN deserialized by the generated modules,
+so ATN states are saved by their numbers and resolved against the ATN of the loading process.
+A cache file is only loaded if it was saved with the same grammar and ANTLR runtime.
+
+Usage:
+
+    python -m coda.analysis.dfa_cache test_data/simple/*/*.c -o coda_dfa.pickle
+
+"""
+
+__version__ = '0.1.0'
+__author__ = 'Morteza Zakeri'
+
+import argparse
+import glob
+import os
+import pickle
+import sys
+
+from antlr4.atn.ATNState import ATNState
+from antlr4.atn.ATNSimulator import ATNSimulator
+from antlr4.atn.SemanticContext import SemanticContext
+from antlr4.dfa.DFA import DFA
+from antlr4.dfa.DFAState import DFAState
+from antlr4.PredictionContext import PredictionContext
+
+from coda.analysis.parse_cache import grammar_version
+from coda.antlr_gen.cpp_parser.CPP14_v2Lexer import CPP14_v2Lexer
+from coda.antlr_gen.cpp_parser.CPP14_v2Parser import CPP14_v2Parser
+
+FORMAT_VERSION = 1
+
+# Edge target index of ATNSimulator.ERROR
+ERROR_STATE = -1
+
+
+def runtime_version() -> str:
+    try:
+        from importlib.metadata import version
+        return version('antlr4-python3-runtime')
+    except Exception:
+        return 'unknown'
+
+
+class _DFAPickler(pickle.Pickler):
+    def persistent_id(self, obj):
+        if isinstance(obj, ATNState):
+            return 'atn_state', obj.stateNumber
+        if obj is PredictionContext.EMPTY:
+            return 'empty_context', None
+        if obj is SemanticContext.NONE:
+            return 'no_semantic_context', None
+        return None
+
+
+class _DFAUnpickler(pickle.Unpickler):
+    def __init__(self, file, atn):
+        super().__init__(file)
+        self.atn = atn
+
+    def persistent_load(self, pid):
+        kind, value = pid
+        if kind == 'atn_state':
+            return self.atn.states[value]
+        if kind == 'empty_context':
+            return PredictionContext.EMPTY
+        if kind == 'no_semantic_context':
+            return SemanticContext.NONE
+        raise pickle.UnpicklingError('Unknown persistent id {0!r}'.format(pid))
+
+
+def dfa_states(dfa: DFA) -> list:
+    """
+    All states reachable in a DFA, including the start state of a precedence DFA and
+    edge targets that are not registered in `dfa.states`
+
+    """
+    states = list(dfa.states)
+    if dfa.s0 is not None:
+        states.append(dfa.s0)
+    seen = set()
+    reachable = []
+    while states:
+        s = states.pop()
+        if id(s) in seen or s is ATNSimulator.ERROR:
+            continue
+        seen.add(id(s))
+        reachable.append(s)
+        if s.edges is not None:
+            states.extend(t for t in s.edges if t is not None)
+    return reachable
+
+
+def dump_dfa(dfa: DFA) -> tuple:
+    states = dfa_states(dfa)
+    index = {id(s): i for i, s in enumerate(states)}
+
+    def edge_index(t):
+        if t is None:
+            return None
+        if t is ATNSimulator.ERROR:
+            return ERROR_STATE
+        return index[id(t)]
+
+    # Edges are saved as state indices, so pickling a long chain of states does not recurse through it
+    payload = [(s.stateNumber, s.configs, None if s.edges is None else [edge_index(t) for t in s.edges],
+                s.isAcceptState, s.prediction, s.lexerActionExecutor, s.requiresFullContext, s.predicates)
+               for s in states]
+    s0 = None if dfa.s0 is None else index[id(dfa.s0)]
+    registered = [index[id(s)] for s in dfa.states]
+    return dfa.decision, dfa.precedenceDfa, s0, registered, payload
+
+
+def restore_dfa(atn, dumped: tuple) -> DFA:
+    decision, precedence_dfa, s0, registered, payload = dumped
+    dfa = DFA(atn.decisionToState[decision], decision)
+    states = []
+    for state_number, configs, _, is_accept, prediction, executor, full_context, predicates in payload:
+        s = DFAState(state_number, configs)
+        s.isAcceptState = is_accept
+        s.prediction = prediction
+        s.lexerActionExecutor = executor
+        s.requiresFullContext = full_context
+        s.predicates = predicates
+        states.append(s)
+    for s, (_, _, edges, *_) in zip(states, payload):
+        if edges is not None:
+            s.edges = [None if t is None else ATNSimulator.ERROR if t == ERROR_STATE else states[t] for t in edges]
+    dfa.precedenceDfa = precedence_dfa
+    dfa.s0 = None if s0 is None else states[s0]
+    registered = [states[i] for i in registered]
+    dfa._states = {s: s for s in registered}
+    return dfa
+
+
+def save_dfa_cache(path):
+    """
+    Save the current DFAs of the C++ lexer and parser
+
+    """
+    header = (FORMAT_VERSION, grammar_version(), runtime_version())
+    recursion_limit = sys.getrecursionlimit()
+    # Prediction contexts are nested as deep as the rule invocation stack
+    sys.setrecursionlimit(max(recursion_limit, 100000))
+    tmp_path = '{0}.tmp{1}'.format(path, os.getpid())
+    try:
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+            for recognizer in (CPP14_v2Lexer, CPP14_v2Parser):
+                _DFAPickler(f, protocol=pickle.HIGHEST_PROTOCOL).dump(
+                    [dump_dfa(dfa) for dfa in recognizer.decisionsToDFA])
+        os.replace(tmp_path, path)
+    finally:
+        sys.setrecursionlimit(recursion_limit)
+
+
+def load_dfa_cache(path) -> bool:
+    """
+    Preload the DFAs of the C++ lexer and parser saved by `save_dfa_cache`
+
+    It must be called before the DFAs are used, since the current DFAs are replaced.
+
+    Returns:
+
+        True if the cache was loaded, False if it is missing or was saved for another grammar or runtime
+
+    """
+    if not os.path.exists(path):
+        return False
+    recursion_limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(recursion_limit, 100000))
+    try:
+        with open(path, 'rb') as f:
+            header = pickle.load(f)
+            if header != (FORMAT_VERSION, grammar_version(), runtime_version()):
+                return False
+            loaded = []
+            for recognizer in (CPP14_v2Lexer, CPP14_v2Parser):
+                dumped = _DFAUnpickler(f, recognizer.atn).load()
+                loaded.append([restore_dfa(recognizer.atn, d) for d in dumped])
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return False
+    finally:
+        sys.setrecursionlimit(recursion_limit)
+    # The simulators hold a reference to the class level lists, so update them in place
+    for recognizer, dfas in zip((CPP14_v2Lexer, CPP14_v2Parser), loaded):
+        recognizer.decisionsToDFA[:] = dfas
+    return True
+
+
+def reset_dfa_cache():
+    """
+    Drop all DFA states of the C++ lexer and parser, as in a fresh process
+
+    """
+    for recognizer in (CPP14_v2Lexer, CPP14_v2Parser):
+        recognizer.decisionsToDFA[:] = [DFA(ds, i) for i, ds in enumerate(recognizer.atn.decisionToState)]
+
+
+def main(args):
+    from coda.analysis.parse_session import ParseSession
+
+    load_dfa_cache(args.output)
+    for pattern in args.files:
+        for path in glob.glob(pattern):
+            print('Warming up on', path)
+            ParseSession.from_file(path, parse_mode=args.parse_mode).parse_tree
+    save_dfa_cache(args.output)
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser(description='Warm up the lexer and parser DFAs and save them')
+    arg_parser.add_argument(
+        'files', nargs='+',
+        help='Glob patterns of the sources to parse')
+    arg_parser.add_argument(
+        '-o', '--output',
+        help='The DFA cache file, extended if it already exists', default='coda_dfa.pickle')
+    arg_parser.add_argument(
+        '--parse-mode', choices=('ll', 'sll', 'two_stage'),
+        help='Prediction mode of the parser', default='ll')
+    args = arg_parser.parse_args()
+    main(args)
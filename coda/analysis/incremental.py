@@ -0,0 +1,212 @@
+"""
+
+Incremental re-analysis of a translation unit
+
+The top-level function definitions found by `coda.analysis.chunked_parse` are fingerprinted by
+the text of their default-channel tokens, so edits to whitespace, comments and other functions
+do not change the fingerprint of a function. The compact CFG and the prime paths of each function
+are kept in a manifest next to the extracted CFGs, and only the functions whose fingerprint is not
+in the manifest are parsed and analyzed again. Output files whose content does not change are not
+rewritten.
+
+The output directory has the layout of `python -m coda cfg`:
+`<n>.txt` per function, `functions.json` and `primepaths.json`, plus `manifest.json`.
+
+The instrumented source is not produced here: instrumentation edits the whole token stream,
+so `python -m coda instrument` still processes the whole file.
+
+"""
+
+__version__ = '0.1.0'
+__author__ = 'Morteza Zakeri'
+
+import bisect
+import hashlib
+import io
+import json
+import os
+from pathlib import Path
+
+from antlr4 import FileStream, CommonTokenStream, Token
+
+import coda
+from coda.analysis.parse_cache import grammar_version
+from coda.analysis.chunked_parse import (find_function_chunks, chunk_source, parse_chunk_or_error,
+                                         default_channel_indices)
+from coda.antlr_gen.cpp_parser.CPP14_v2Lexer import CPP14_v2Lexer
+from coda.antlr_gen.rule_utils import RuleSpan, rule_text
+from coda.graph.cfg_io import write_text_cfg
+
+MANIFEST_FILE = 'manifest.json'
+# The version of the layout of the manifest entries
+MANIFEST_VERSION = 2
+
+
+def function_fingerprint(tokens, chunk) -> str:
+    """
+    The hash of the default-channel token texts of a function chunk
+
+    """
+    h = hashlib.sha256()
+    for t in tokens[chunk[0]:chunk[1] + 1]:
+        if t.channel == Token.DEFAULT_CHANNEL:
+            h.update(t.text.encode('utf8'))
+            h.update(b'\0')
+    return h.hexdigest()
+
+
+def load_manifest(output_dir: Path) -> dict:
+    """
+    The cached analysis results of an output directory, by function fingerprint
+
+    A manifest written for another grammar, CodA or manifest version is ignored.
+
+    """
+    try:
+        with open(output_dir / MANIFEST_FILE) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if (manifest.get("grammar") != grammar_version() or manifest.get("coda") != coda.__version__
+            or manifest.get("version") != MANIFEST_VERSION):
+        return {}
+    return manifest.get("functions", {})
+
+
+def write_if_changed(path: Path, content: str) -> bool:
+    """
+    Write a text file only if its content changes
+
+    Returns:
+
+        True if the file was written
+
+    """
+    try:
+        if path.read_text() == content:
+            return False
+    except OSError:
+        pass
+    tmp_path = path.with_name('{0}.tmp{1}'.format(path.name, os.getpid()))
+    tmp_path.write_text(content)
+    os.replace(tmp_path, path)
+    return True
+
+
+def analyze_chunk(args: tuple, prime_paths: bool = True) -> dict:
+    """
+    Extract the compact CFG and the prime paths of one function chunk
+
+    The declarator is the (start, stop) token index range in the whole file; `update_cfgs` saves
+    it relative to the chunk.
+
+    """
+    from coda.batch import cfg_summary, compute_prime_paths
+    from coda.graph.utils import graph_from_token_ranges
+
+    result, error = parse_chunk_or_error(*args)
+    if error is not None:
+        return {"error": error}
+    (start, stop), ranges = result
+    # Only the shape of the CFG is kept, so the blocks need no tokens
+    g = graph_from_token_ranges({"nodes": [(label, []) for label, _ in ranges["nodes"]],
+                                 "edges": ranges["edges"]}, [])
+    entry = cfg_summary(g)
+    entry["error"] = None
+    entry["declarator"] = (start, stop)
+    if prime_paths:
+        try:
+            entry["prime_paths"] = compute_prime_paths(entry)
+        except Exception as e:
+            entry["error"] = '{0}: {1}'.format(type(e).__name__, e)
+    return entry
+
+
+def update_cfgs(source, output_dir, parse_mode: str = 'll', workers: int = 1, prime_paths: bool = True) -> dict:
+    """
+    Bring the extracted CFGs and prime paths of a source up to date
+
+    Args:
+
+        source (str): The C++ source file
+
+        output_dir (str): The output directory, e.g., `extracted_cfgs/<name>`
+
+        parse_mode (str): The prediction mode of the parser, see `ParseSession`
+
+        workers (int): The number of worker processes to analyze the changed functions with
+
+        prime_paths (bool): Whether to compute the prime paths of the functions
+
+    Returns:
+
+        The number of `reused` and `analyzed` functions, and the list of `written` and `removed` files
+
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    cached = load_manifest(output_dir)
+
+    token_stream = CommonTokenStream(CPP14_v2Lexer(FileStream(str(source), encoding='utf8')))
+    token_stream.fill()
+    tokens = token_stream.tokens
+    chunks = find_function_chunks(tokens)
+    fingerprints = [function_fingerprint(tokens, chunk) for chunk in chunks]
+    # The declarators are saved as positions among the default-channel tokens of their chunk, which
+    # move neither with the edits above the function nor with comments, like the fingerprints
+    indices = default_channel_indices(tokens)
+    first_positions = [bisect.bisect_left(indices, chunk[0]) for chunk in chunks]
+
+    changed = {}
+    changed_first_positions = {}
+    for chunk, fingerprint, first in zip(chunks, fingerprints, first_positions):
+        entry = cached.get(fingerprint)
+        if entry is None or (prime_paths and entry["error"] is None and "prime_paths" not in entry):
+            changed[fingerprint] = chunk_source(tokens, chunk) + (parse_mode,)
+            changed_first_positions[fingerprint] = first
+    if workers == 1 or len(changed) <= 1:
+        entries = [analyze_chunk(args, prime_paths) for args in changed.values()]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            entries = list(executor.map(analyze_chunk, changed.values(), [prime_paths] * len(changed)))
+    analyzed = dict(zip(changed, entries))
+    for fingerprint, entry in analyzed.items():
+        if entry["error"] is None:
+            first = changed_first_positions[fingerprint]
+            entry["declarator"] = [bisect.bisect_left(indices, i) - first for i in entry["declarator"]]
+
+    functions = {}
+    function_dict = {}
+    function_prime_paths = {}
+    written = []
+    for f_code, (fingerprint, first) in enumerate(zip(fingerprints, first_positions), start=1):
+        entry = analyzed.get(fingerprint) or cached[fingerprint]
+        functions[fingerprint] = entry
+        if entry["error"] is not None:
+            continue
+        start, stop = (indices[first + i] for i in entry["declarator"])
+        function_dict[f_code] = (rule_text(token_stream, RuleSpan(tokens[start], tokens[stop])), tokens[start].line)
+        cfg_file = io.StringIO()
+        write_text_cfg(cfg_file, entry["edges"], entry["initial_nodes"], entry["final_nodes"])
+        if write_if_changed(output_dir / '{0}.txt'.format(f_code), cfg_file.getvalue()):
+            written.append('{0}.txt'.format(f_code))
+        if "prime_paths" in entry:
+            function_prime_paths[str(f_code)] = entry["prime_paths"]
+
+    outputs = [('functions.json', function_dict), (MANIFEST_FILE, {
+        "grammar": grammar_version(), "coda": coda.__version__, "version": MANIFEST_VERSION,
+        "functions": functions})]
+    if prime_paths:
+        outputs.append(('primepaths.json', function_prime_paths))
+    for file_name, content in outputs:
+        if write_if_changed(output_dir / file_name, json.dumps(content)):
+            written.append(file_name)
+
+    removed = []
+    for cfg_path in output_dir.glob('*.txt'):
+        if cfg_path.stem.isdigit() and int(cfg_path.stem) not in function_dict:
+            cfg_path.unlink()
+            removed.append(cfg_path.name)
+    reused = sum(1 for fingerprint in fingerprints if fingerprint not in changed)
+    return {"reused": reused, "analyzed": len(changed), "written": written, "removed": removed}
@@ -0,0 +1,177 @@
+"""
+
+Persistent, content-addressed cache of parse results
+
+Parsing with the pure-Python `CPP14_v2Parser` is the slowest stage of CodA.
+For an unchanged source, the cache restores the token stream and the per-function CFGs
+extracted by `CFGExtractorVisitor`, so the source is neither lexed nor parsed again.
+
+A cache entry is keyed by the hash of the source, the grammar (the serialized ATNs of
+the generated lexer and parser) and the CodA version.
+It stores the tokens as a flat integer array and the CFG blocks as token index ranges.
+
+"""
+
+__version__ = '0.1.0'
+__author__ = 'Morteza Zakeri'
+
+import hashlib
+import os
+import pickle
+from array import array
+from pathlib import Path
+
+from antlr4 import InputStream, CommonTokenStream
+from antlr4.Token import CommonToken
+from antlr4.ListTokenSource import ListTokenSource
+
+import coda
+from coda.antlr_gen.rule_utils import RuleSpan, rule_token_range
+from coda.graph.utils import graph_to_token_ranges, graph_from_token_ranges
+
+GRAMMAR_FILES = ('CPP14_v2.interp', 'CPP14_v2Lexer.interp')
+
+# type, channel, start, stop, line, column
+TOKEN_FIELDS = 6
+
+
+def grammar_version() -> str:
+    """
+    The hash of the serialized ATNs the generated lexer and parser were built from
+
+    """
+    h = hashlib.sha256()
+    grammar_dir = Path(coda.__file__).parent / 'antlr_gen' / 'cpp_parser'
+    for file_name in GRAMMAR_FILES:
+        h.update((grammar_dir / file_name).read_bytes())
+    return h.hexdigest()
+
+
+class CachedParse:
+    """
+    The token stream and the function CFGs of a source, restored from the cache
+
+    """
+
+    def __init__(self, token_stream: CommonTokenStream, functions: dict):
+        self.token_stream = token_stream
+        self.functions = functions
+
+
+class ParseCache:
+    """
+    On-disk parse cache, one file per source content
+
+    """
+
+    def __init__(self, cache_dir='.coda_cache'):
+        """
+        Args:
+
+            cache_dir (str): The directory to keep the cache entries in
+
+
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._grammar_version = None
+
+    def key(self, source: str) -> str:
+        if self._grammar_version is None:
+            self._grammar_version = grammar_version()
+        h = hashlib.sha256()
+        h.update(coda.__version__.encode())
+        h.update(self._grammar_version.encode())
+        h.update(source.encode('utf8'))
+        return h.hexdigest()
+
+    def entry_path(self, source: str) -> Path:
+        key = self.key(source)
+        return self.cache_dir / key[:2] / (key + '.pickle')
+
+    def load(self, source: str):
+        """
+        Restore the parse results of `source`, or return None on a cache miss
+
+        """
+        path = self.entry_path(source)
+        try:
+            with open(path, 'rb') as f:
+                entry = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+        token_stream = restore_token_stream(source, entry["tokens"])
+        tokens = token_stream.tokens
+        functions = {RuleSpan(tokens[start], tokens[stop]): graph_from_token_ranges(ranges, tokens)
+                     for (start, stop), ranges in entry["functions"]}
+        return CachedParse(token_stream, functions)
+
+    def store(self, source: str, token_stream: CommonTokenStream, functions: dict):
+        """
+        Save the token stream and the function CFGs, as extracted by `CFGExtractorVisitor`, of `source`
+
+        """
+        entry = {
+            "tokens": compact_tokens(token_stream.tokens),
+            "functions": [(rule_token_range(declarator), graph_to_token_ranges(g))
+                          for declarator, g in functions.items()]
+        }
+        path = self.entry_path(source)
+        path.parent.mkdir(exist_ok=True)
+        # Write then rename, so that concurrent runs never read a partial entry.
+        tmp_path = path.with_suffix('.tmp{0}'.format(os.getpid()))
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+
+def compact_tokens(tokens) -> array:
+    buffer = array('q')
+    for t in tokens:
+        buffer.extend((t.type, t.channel, t.start, t.stop, t.line, t.column))
+    return buffer
+
+
+def restore_token_stream(source: str, buffer: array) -> CommonTokenStream:
+    """
+    Rebuild a filled token stream; the token texts are sliced from the source on demand
+
+    """
+    input_stream = InputStream(source)
+    token_source = (None, input_stream)
+    tokens = []
+    for i in range(0, len(buffer), TOKEN_FIELDS):
+        t = CommonToken(token_source, buffer[i], buffer[i + 1], buffer[i + 2], buffer[i + 3])
+        t.line = buffer[i + 4]
+        t.column = buffer[i + 5]
+        tokens.append(t)
+    token_stream = CommonTokenStream(ListTokenSource(tokens))
+    token_stream.fill()
+    return token_stream
+
+
+def load_or_extract_cfgs(source: str, cache: ParseCache = None, name: str = None, parse_mode: str = 'll'):
+    """
+    Extract the function CFGs of a source with `CFGExtractorVisitor`, unless they are already cached
+
+    Returns:
+
+        (token_stream, functions): The filled token stream and a dictionary of
+        function declarators to their CFGs
+
+    """
+    if cache is not None:
+        cached = cache.load(source)
+        if cached is not None:
+            return cached.token_stream, cached.functions
+
+    from coda.analysis.parse_session import ParseSession
+    from coda.analysis.cfg.cfg_extractor_visitor import CFGExtractorVisitor
+
+    session = ParseSession.from_source(source, name=name, parse_mode=parse_mode)
+    cfg_extractor = CFGExtractorVisitor(session.token_stream)
+    cfg_extractor.visit(session.parse_tree)
+    if cache is not None:
+        cache.store(source, session.token_stream, cfg_extractor.functions)
+    return session.token_stream, cfg_extractor.functions
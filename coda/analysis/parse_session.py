@@ -0,0 +1,142 @@
+"""
+
+A parse session lexes and parses a C++ translation unit exactly once
+
+The session owns the input stream, the single filled token buffer, the parse tree
+and the `TokenStreamRewriter` built on top of that buffer.
+CFG listeners, the CFG visitor and the instrumentation listener all read the same tokens,
+so the source is never re-lexed to size the listeners' insertion buffers.
+
+The parser runs in one of the following prediction modes:
+
+- `ll`: full-LL prediction with the default error strategy (the ANTLR default).
+- `sll`: SLL prediction only, which is faster but may report syntax errors on some valid inputs.
+- `two_stage`: SLL prediction with a bail-out error strategy first; the input is re-parsed
+with full-LL prediction only if the first stage fails.
+
+"""
+
+__version__ = '0.1.0'
+__author__ = 'Morteza Zakeri'
+
+from pathlib import Path
+
+from antlr4 import InputStream, FileStream, CommonTokenStream, PredictionMode, BailErrorStrategy
+from antlr4 import TokenStreamRewriter
+from antlr4.error.ErrorStrategy import DefaultErrorStrategy
+from antlr4.error.Errors import ParseCancellationException
+
+from coda.analysis.token_buffer import CompactTokenList
+from coda.antlr_gen.cpp_parser.CPP14_v2Lexer import CPP14_v2Lexer
+from coda.antlr_gen.cpp_parser.CPP14_v2Parser import CPP14_v2Parser
+
+PARSE_MODES = ('ll', 'sll', 'two_stage')
+
+
+def parse_with_mode(parser: CPP14_v2Parser, parse_mode: str, start_rule: str = 'translationunit') -> tuple:
+    """
+    Parse the token stream of `parser` from `start_rule` in one of the `PARSE_MODES`
+
+    Returns:
+
+        (parse tree, True if the two-stage mode had to fall back to full-LL prediction)
+
+    """
+    parse = getattr(parser, start_rule)
+    if parse_mode == 'll':
+        return parse(), False
+    parser._interp.predictionMode = PredictionMode.SLL
+    if parse_mode == 'sll':
+        return parse(), False
+
+    parser._errHandler = BailErrorStrategy()
+    error_listeners = parser._listeners
+    parser.removeErrorListeners()
+    try:
+        return parse(), False
+    except ParseCancellationException:
+        # SLL prediction failed, the input is either invalid or needs full-LL prediction
+        pass
+    finally:
+        parser._listeners = error_listeners
+    parser.reset()
+    parser._interp.predictionMode = PredictionMode.LL
+    parser._errHandler = DefaultErrorStrategy()
+    return parse(), True
+
+
+class ParseSession:
+    """
+    Lex and parse one C++ source once, and share the results between the analysis passes
+
+    """
+
+    def __init__(self, input_stream: InputStream, name: str = None, parse_mode: str = 'll',
+                 compact_tokens: bool = False):
+        """
+        Args:
+
+            input_stream (InputStream): The character stream of the source code
+
+            name (str): A name for the translation unit, e.g., the stem of the source file
+
+            parse_mode (str): The prediction mode of the parser, one of `PARSE_MODES`
+
+            compact_tokens (bool): Whether to store the tokens in a `CompactTokenList`, which creates
+            token objects only when they are read, to save memory on very large sources
+
+        """
+        if parse_mode not in PARSE_MODES:
+            raise ValueError('Unknown parse mode {0!r}, expected one of {1}'.format(parse_mode, PARSE_MODES))
+        self.name = name
+        self.parse_mode = parse_mode
+        # Set to True if the two-stage mode had to fall back to full-LL prediction
+        self.used_ll_fallback = False
+        self.input_stream = input_stream
+        self.lexer = CPP14_v2Lexer(self.input_stream)
+        self.token_stream = CommonTokenStream(self.lexer)
+        if compact_tokens:
+            self.token_stream.tokens = CompactTokenList()
+        # Lex the whole input in one pass; the parser and every listener reuse this buffer.
+        self.token_stream.fill()
+        self.parser = None
+        self._parse_tree = None
+        self._rewriter = None
+
+    @classmethod
+    def from_file(cls, path, encoding='utf8', parse_mode: str = 'll', compact_tokens: bool = False):
+        return cls(FileStream(str(path), encoding=encoding), name=Path(path).stem, parse_mode=parse_mode,
+                   compact_tokens=compact_tokens)
+
+    @classmethod
+    def from_source(cls, source: str, name: str = None, parse_mode: str = 'll', compact_tokens: bool = False):
+        return cls(InputStream(source), name=name, parse_mode=parse_mode, compact_tokens=compact_tokens)
+
+    @property
+    def number_of_tokens(self) -> int:
+        """
+        The number of tokens in the buffer (on all channels, including EOF)
+
+        """
+        return len(self.token_stream.tokens)
+
+    @property
+    def parse_tree(self) -> CPP14_v2Parser.TranslationunitContext:
+        """
+        The translation unit parse tree, built on first access
+
+        """
+        if self._parse_tree is None:
+            self.parser = CPP14_v2Parser(self.token_stream)
+            self._parse_tree, self.used_ll_fallback = parse_with_mode(self.parser, self.parse_mode)
+        return self._parse_tree
+
+    @property
+    def rewriter(self) -> TokenStreamRewriter.TokenStreamRewriter:
+        """
+        The token stream rewriter shared by the passes that edit the source
+
+        """
+        if self._rewriter is None:
+            self._rewriter = TokenStreamRewriter.TokenStreamRewriter(self.token_stream)
+        return self._rewriter
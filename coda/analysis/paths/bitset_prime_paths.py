@@ -0,0 +1,197 @@
+"""
+
+Prime path enumeration over bitsets
+
+`compute_prime_paths` finds the same prime paths, in the same order, as the list-based
+`ControlFlowGraph.computePrimePaths`. The list-based enumeration extends the candidate paths
+breadth-first, one node per round, so it lists the prime paths by length, and the paths of one
+length in the order of the start nodes and then of the successor lists. Here, the candidates are
+extended depth-first in the same order, and the prime paths are sorted by length with a stable sort.
+
+The nodes are numbered, and a candidate keeps the set of its nodes after the first one as an
+integer bitset, so a membership test is one `&`. The candidates of one start node share their
+prefixes on a single path stack, so extending a candidate copies nothing; only the prime paths are
+copied out. The check whether a path can be extended at its head uses a precomputed bitset of the
+non-final predecessors of each node.
+
+A candidate is extended only while a prime path can still come out of it: a prime path either
+returns to the first node from one of its predecessors, or holds all the non-final predecessors of
+the first node. So a candidate that misses some of these predecessors is dropped, together with
+all its extensions, when none of the missing predecessors can be reached from its last node
+without passing its nodes.
+
+`PrimePathStream` yields the prime paths in the order of the search, as they are found, and stops
+at a budget of paths, path length or time; `compute_prime_paths` collects and sorts them.
+
+"""
+
+__version__ = '0.1.0'
+__author__ = 'Morteza Zakeri'
+
+import time
+
+
+class DeadEndError(Exception):
+    """
+    A node that is not final has no successors, so the list-based enumeration fails on it
+
+    """
+
+
+def compute_prime_paths(edges: dict, nodes, finals) -> list:
+    """
+    Args:
+
+        edges (dict): The successor lists of the nodes, as `ControlFlowGraph.edges`
+
+        nodes (set): All nodes, as `ControlFlowGraph.nodes`; the candidates start at them in its order
+
+        finals (set): The final nodes
+
+    Returns:
+
+        The prime paths, as lists of nodes
+
+    Raises:
+
+        DeadEndError: If a node that is not final has no successors
+
+    """
+    prime_paths = list(PrimePathStream(edges, nodes, finals))
+    prime_paths.sort(key=len)
+    return prime_paths
+
+
+class PrimePathStream:
+    """
+    The prime paths of a graph, yielded as they are found, within optional budgets
+
+    The paths come in the order of the search: by start node, and depth-first from each one.
+    Sorting them by length, with a stable sort, gives the order of `compute_prime_paths`.
+
+    When a budget stops the enumeration, `truncated` tells which one:
+
+    - `max_paths`: more than `max_paths` prime paths were found
+    - `max_length`: the paths longer than `max_length` nodes were not searched, and the prime
+    paths that are not longer are all yielded
+    - `time_budget`: the enumeration took more than `time_budget` seconds
+
+    Usage:
+
+        stream = PrimePathStream(cfg.edges, cfg.nodes, cfg.finals, max_paths=100000, time_budget=60)
+        for path in stream:
+            ...
+        if stream.truncated is not None:
+            print('Stopped after', stream.count, 'paths by', stream.truncated)
+
+    """
+
+    # The number of extended candidates between two checks of the time budget
+    TIME_CHECK_INTERVAL = 4096
+
+    def __init__(self, edges: dict, nodes, finals, max_paths: int = None, max_length: int = None,
+                 time_budget: float = None):
+        self.edges = edges
+        self.nodes = nodes
+        self.finals = finals
+        self.max_paths = max_paths
+        self.max_length = max_length
+        self.time_budget = time_budget
+        # The number of yielded paths, and the budget that stopped the enumeration, if any
+        self.count = 0
+        self.truncated = None
+
+    def __iter__(self):
+        edges, finals = self.edges, self.finals
+        order = list(self.nodes)
+        for node in order:
+            if node not in finals and node not in edges:
+                raise DeadEndError(node)
+        index = {node: i for i, node in enumerate(order)}
+        bits = [1 << i for i in range(len(order))]
+        # The successors of each node, with their numbers and bits; the final nodes are not extended
+        successors = [[(index[t], bits[index[t]], t) for t in edges[node]] if node not in finals else []
+                      for node in order]
+        successor_masks = [0] * len(order)
+        non_final_predecessors = [0] * len(order)
+        for i, targets in enumerate(successors):
+            for t, bit, _ in targets:
+                successor_masks[i] |= bit
+                non_final_predecessors[t] |= bits[i]
+        # A path through a node with one successor goes on to the next branch, where it is checked instead
+        branches = [len(targets) > 1 for targets in successors]
+
+        def reaches(start: int, passed: int, targets: int) -> bool:
+            """
+            Whether a node of the bitset `targets` is reachable from `start` without passing the bitset `passed`
+
+            """
+            frontier = successor_masks[start] & ~passed
+            while frontier:
+                if frontier & targets:
+                    return True
+                passed |= frontier
+                reached = 0
+                while frontier:
+                    low = frontier & -frontier
+                    reached |= successor_masks[low.bit_length() - 1]
+                    frontier ^= low
+                frontier = reached & ~passed
+            return False
+
+        # A simple path has at most one node more than the graph, when it is a cycle
+        max_length = self.max_length if self.max_length is not None else len(order) + 1
+        max_paths = self.max_paths if self.max_paths is not None else -1
+        deadline = time.monotonic() + self.time_budget if self.time_budget is not None else None
+        ticks = self.TIME_CHECK_INTERVAL
+        self.count = 0
+        self.truncated = None
+        for first, first_bit in enumerate(bits):
+            head = non_final_predecessors[first] & ~first_bit
+            path = [order[first]]
+            if not successor_masks[first]:
+                if not head:
+                    if self.count == max_paths:
+                        self.truncated = 'max_paths'
+                        return
+                    self.count += 1
+                    yield path
+                continue
+            if max_length < 2:
+                self.truncated = 'max_length'
+                continue
+            # The successors left to try at each node of the path, and the bitset of the path after its first node
+            stack = [(iter(successors[first]), 0)]
+            while stack:
+                targets, mask = stack[-1]
+                for t, bit, label in targets:
+                    if mask & bit:
+                        continue
+                    extended = mask | bit
+                    if t == first or not successor_masks[t] & ~extended:
+                        # A cycle, or a path that cannot be extended at its end
+                        if t == first or not head & ~extended:
+                            if self.count == max_paths:
+                                self.truncated = 'max_paths'
+                                return
+                            self.count += 1
+                            yield path + [label]
+                        continue
+                    missing = head & ~extended
+                    if not missing or head & bit or not branches[t] or reaches(t, extended | first_bit, missing):
+                        if len(path) + 2 > max_length:
+                            self.truncated = 'max_length'
+                            continue
+                        if deadline is not None:
+                            ticks -= 1
+                            if not ticks:
+                                ticks = self.TIME_CHECK_INTERVAL
+                                if time.monotonic() > deadline:
+                                    self.truncated = 'time_budget'
+                                    return
+                        path.append(label)
+                        stack.append((iter(successors[t]), extended))
+                        break
+                else:
+                    stack.pop()
+                    path.pop()
@@ -0,0 +1,131 @@
+"""
+
+Prime path coverage matrices
+
+The coverage of the prime paths of a function by a test suite is kept as one NumPy boolean matrix
+per touring mode, of a row per test and a column per prime path. The union over the tests, the
+coverage percentage and the contribution of each test are then computed on whole matrices:
+
+- `covered(mode)`: the prime paths toured by any test
+- `percentage(mode)`: the percentage of the prime paths toured by any test, 0 without prime paths
+- `contributions(mode)`: the number of prime paths each test tours, and the number only it tours
+
+`save_coverage` writes the matrices of all the functions to one `.npz` file, with the names of
+the tests, and `load_coverage` reads them back.
+
+Usage:
+
+    matrix = CoverageMatrix.from_executed_paths(prime_paths, {test: executed_path, ...})
+    print(matrix.percentage('with detour'))
+    save_coverage('instrumented_programs/gcd/coverage.npz', {f_code: matrix, ...})
+
+"""
+
+__version__ = '0.1.0'
+__author__ = 'Morteza Zakeri'
+
+import numpy as np
+
+from coda.analysis.paths.prime_path_coverage import prime_path_coverage
+
+# The touring modes, in the order of the vectors of `prime_path_coverage`, with their keys in the .npz files
+TOURING_MODES = ('with sidetrip and detour', 'with sidetrip', 'with detour')
+MODE_KEYS = {'with sidetrip and detour': 'side_and_detour', 'with sidetrip': 'sidetrip', 'with detour': 'detour'}
+
+
+class CoverageMatrix:
+    """
+    The tests × prime paths coverage of one function, a boolean matrix per touring mode
+
+    """
+
+    def __init__(self, tests, number_of_paths: int, matrices: dict = None):
+        self.tests = list(tests)
+        self.number_of_paths = number_of_paths
+        self.matrices = matrices if matrices is not None else {
+            mode: np.zeros((len(self.tests), number_of_paths), dtype=bool) for mode in TOURING_MODES}
+
+    @classmethod
+    def from_executed_paths(cls, prime_paths, executed_paths: dict):
+        """
+        Match the prime paths of a function against its execution path in each test
+
+        Args:
+
+            prime_paths (list): The prime paths of the function
+
+            executed_paths (dict): The tests, in order, to the execution paths of the function in them
+
+        """
+        matrix = cls(executed_paths, len(prime_paths))
+        for row, executed_path in enumerate(executed_paths.values()):
+            for mode, vector in zip(TOURING_MODES, prime_path_coverage(prime_paths, executed_path)):
+                matrix.matrices[mode][row] = vector
+        return matrix
+
+    def covered(self, mode: str):
+        """
+        The boolean vector of the prime paths toured by any test
+
+        """
+        return self.matrices[mode].any(axis=0)
+
+    def percentage(self, mode: str) -> float:
+        if not self.number_of_paths:
+            return 0
+        return float(self.covered(mode).mean() * 100)
+
+    def contributions(self, mode: str):
+        """
+        Returns:
+
+            (toured, only): The vectors of the number of prime paths each test tours, and of those
+            no other test tours
+
+        """
+        matrix = self.matrices[mode]
+        toured_once = matrix.sum(axis=0) == 1
+        return matrix.sum(axis=1), (matrix & toured_once).sum(axis=1)
+
+    def to_json(self, mode: str) -> dict:
+        """
+        The coverage vectors of the tests, as lists of 0 and 1 by test name, as `covered_primepaths.json` keeps them
+
+        """
+        return {test: row.astype(int).tolist() for test, row in zip(self.tests, self.matrices[mode])}
+
+
+def save_coverage(path, matrices: dict):
+    """
+    Save the coverage matrices of functions to a `.npz` file
+
+    Each function `f` has the arrays `f/tests`, the names of the tests, and `f/<mode key>`, the
+    matrix of each touring mode by its key in `MODE_KEYS`.
+
+    """
+    arrays = {}
+    for function, matrix in matrices.items():
+        arrays['{0}/tests'.format(function)] = np.array(matrix.tests, dtype=str)
+        for mode in TOURING_MODES:
+            arrays['{0}/{1}'.format(function, MODE_KEYS[mode])] = matrix.matrices[mode]
+    np.savez_compressed(path, **arrays)
+
+
+def load_coverage(path) -> dict:
+    """
+    Load the coverage matrices saved by `save_coverage`
+
+    Returns:
+
+        The dictionary of the functions to their `CoverageMatrix`
+
+    """
+    matrices = {}
+    with np.load(path) as arrays:
+        for name in arrays.files:
+            function, key = name.rsplit('/', 1)
+            if key != 'tests':
+                continue
+            modes = {mode: arrays['{0}/{1}'.format(function, MODE_KEYS[mode])] for mode in TOURING_MODES}
+            matrices[function] = CoverageMatrix(arrays[name].tolist(), modes[TOURING_MODES[0]].shape[1], modes)
+    return matrices
@@ -0,0 +1,188 @@
+"""
+
+Prime path coverage of execution paths
+
+A prime path is toured by an execution path in one of three modes:
+
+- with detour: the nodes of the prime path appear in the execution path in order, from the first
+one on, and other nodes may come between them
+- with sidetrip: the edges of the prime path appear in the execution path in order, so the
+execution path may leave the prime path between them, but returns to the node it left from
+- with sidetrip and detour: either of them
+
+`checkCoverWithDetour`, `checkCoverWithSidetour` and `checkCoverWithSideAndDetour` are the
+original matchers, which scan the execution path from each occurrence of the first node of the
+prime path and copy a slice of it on each step. `ExecutionPathIndex` reads the execution path
+once, into the positions of each node and of each edge, and then tells each mode of a prime path
+by a binary search per node:
+
+- A later start never tours a prime path that an earlier one does not, so only the first
+occurrence of the first node is tried.
+- With detour, each next node is taken at its first occurrence after the previous one.
+- With sidetrip, each next node is taken after the first occurrence of the edge from the
+previous node at or after the previous one.
+- The sidetrip of the original matcher with both modes is only taken when the next node does
+not occur again, so the prime paths toured with sidetrip and detour are those toured with detour.
+
+`prime_path_coverage` gives the coverage vectors of all the prime paths of a function in the
+three modes, as `coda/main.py` records them.
+
+Usage:
+
+    side_and_detour, sidetrip, detour = prime_path_coverage(prime_paths, executed_path)
+
+"""
+
+__version__ = '0.1.0'
+__author__ = 'Morteza Zakeri'
+
+from bisect import bisect_left
+
+
+def checkCoverWithDetour(primepath, exepath):
+    exe_length = len(exepath)
+    prime_length = len(primepath)
+    for i in range(exe_length - prime_length + 1):
+        j = 0
+        k = 0
+        if exepath[i + j] == primepath[k]:
+            j += 1
+            k += 1
+            while k < prime_length and i + j < exe_length:
+                if exepath[i + j] == primepath[k]:  # tour directly
+                    j += 1
+                    k += 1
+                elif primepath[k] in exepath[i + j:]:  # tour with detour
+                    j += exepath[i + j:].index(primepath[k])
+                    k += 1
+                else:
+                    break
+            if k == prime_length:
+                return True
+    return False
+
+
+def checkCoverWithSidetour(primepath, exepath):
+    exe_length = len(exepath)
+    prime_length = len(primepath)
+    for i in range(exe_length - prime_length + 1):
+        j = 0
+        k = 0
+        if exepath[i + j] == primepath[k]:
+            j += 1
+            k += 1
+            while k < prime_length and i + j < exe_length:
+                if exepath[i + j] == primepath[k]:  # tour directly
+                    j += 1
+                    k += 1
+                elif primepath[k - 1] in exepath[i + j:]:  # tour with sidetrip
+                    j += exepath[i + j:].index(primepath[k - 1]) + 1
+                else:
+                    break
+            if k == prime_length:
+                return True
+    return False
+
+
+def checkCoverWithSideAndDetour(primepath, exepath):
+    exe_length = len(exepath)
+    prime_length = len(primepath)
+    for i in range(exe_length - prime_length + 1):
+        j = 0
+        k = 0
+        if exepath[i + j] == primepath[k]:
+            j += 1
+            k += 1
+            while k < prime_length and i + j < exe_length:
+                if exepath[i + j] == primepath[k]:  # tour directly
+                    j += 1
+                    k += 1
+                elif primepath[k] in exepath[i + j:]:  # tour with detour
+                    j += exepath[i + j:].index(primepath[k])
+                    k += 1
+                elif primepath[k - 1] in exepath[i + j:]:  # tour with sidetrip
+                    j += exepath[i + j:].index(primepath[k - 1]) + 1
+                else:
+                    break
+            if k == prime_length:
+                return True
+    return False
+
+
+class ExecutionPathIndex:
+    """
+    The positions of the nodes and the edges of an execution path, to match prime paths against it
+
+    The modes of a prime path of P nodes are told in O(P log T) for an execution path of T nodes,
+    with the same results as the original matchers for simple paths and cycles, whose nodes are
+    distinct but for the last node of a cycle.
+
+    """
+
+    def __init__(self, exepath):
+        self.length = len(exepath)
+        self.node_positions = {}
+        self.edge_positions = {}
+        previous = None
+        for position, node in enumerate(exepath):
+            self.node_positions.setdefault(node, []).append(position)
+            if position:
+                self.edge_positions.setdefault((previous, node), []).append(position - 1)
+            previous = node
+
+    def start(self, primepath):
+        """
+        The first position of the first node of a prime path from which the original matchers try it, or None
+
+        """
+        positions = self.node_positions.get(primepath[0])
+        if positions is None or positions[0] > self.length - len(primepath):
+            return None
+        return positions[0]
+
+    def covers_with_detour(self, primepath) -> bool:
+        position = self.start(primepath)
+        if position is None:
+            return False
+        for node in primepath[1:]:
+            positions = self.node_positions.get(node)
+            if positions is None:
+                return False
+            i = bisect_left(positions, position + 1)
+            if i == len(positions):
+                return False
+            position = positions[i]
+        return True
+
+    def covers_with_sidetrip(self, primepath) -> bool:
+        position = self.start(primepath)
+        if position is None:
+            return False
+        for edge in zip(primepath, primepath[1:]):
+            positions = self.edge_positions.get(edge)
+            if positions is None:
+                return False
+            i = bisect_left(positions, position)
+            if i == len(positions):
+                return False
+            position = positions[i] + 1
+        return True
+
+    def covers_with_sidetrip_and_detour(self, primepath) -> bool:
+        return self.covers_with_detour(primepath)
+
+
+def prime_path_coverage(prime_paths, exepath):
+    """
+    Match all the prime paths of a function against one execution path of it
+
+    Returns:
+
+        (side_and_detour, sidetrip, detour): The lists of 1 for each prime path toured by the
+        execution path in the mode, and 0 for the others
+
+    """
+    index = ExecutionPathIndex(exepath)
+    detour = [int(index.covers_with_detour(path)) for path in prime_paths]
+    sidetrip = [int(index.covers_with_sidetrip(path)) for path in prime_paths]
+    return list(detour), sidetrip, detour
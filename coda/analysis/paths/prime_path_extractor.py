@@ -4,6 +4,11 @@ The Graph class in the module computes prime paths
 
 """
 
+from coda.analysis.paths.bitset_prime_paths import DeadEndError, PrimePathStream, compute_prime_paths
+from coda.graph.cfg_io import BinaryCFGFile, read_text_cfg
+
+PRIME_PATH_ENGINES = ('bitset', 'scc', 'list')
+
 
 class ControlFlowGraph:
     """
@@ -17,28 +22,84 @@ class ControlFlowGraph:
 
 
         """
-        lines = graph_file.readlines()
+        edges, init_nodes, final_nodes = read_text_cfg(graph_file)
+        self._set_graph(edges, init_nodes, final_nodes)
+
+    @classmethod
+    def from_edges(cls, edges, inits, finals):
+        """
+        Build the graph from an edge list instead of a saved CFG file
+
+        Args:
+
+            edges (list): The (source, destination) pairs of the CFG edges
+
+            inits (set): The initial nodes
+
+            finals (set): The final nodes
+
+
+        """
+        cfg = cls.__new__(cls)
+        cfg._set_graph(edges, set(inits), set(finals))
+        return cfg
+
+    @classmethod
+    def from_csr(cls, sources, offsets, targets, inits, finals):
+        """
+        Build the graph from the CSR arrays of a binary CFG record
+
+        Args:
+
+            sources (list): The nodes with successors
+
+            offsets (list): The start of the successors of each source in `targets`, and their end
+
+            targets (list): The successors
+
+            inits (list): The initial nodes
+
+            finals (list): The final nodes
+
+
+        """
+        cfg = cls.__new__(cls)
+        cfg.edges = {source: targets[start:end] for source, start, end in zip(sources, offsets, offsets[1:])}
+        cfg.nodes = set(targets)
+        cfg.inits = set(inits)
+        cfg.nodes.update(cfg.inits)
+        cfg.finals = set(finals)
+        cfg.nodes.update(cfg.finals)
+        return cfg
+
+    @classmethod
+    def load_binary(cls, path) -> dict:
+        """
+        Load all the CFGs of a binary CFG file
+
+        Returns:
+
+            A dictionary of the function ids to their graphs
+
+
+        """
+        with BinaryCFGFile(path) as cfgs:
+            return {function_id: cls.from_csr(*cfgs[function_id]) for function_id in cfgs}
+
+    def _set_graph(self, edges, inits, finals):
         self.edges = {}
         self.nodes = set()
-        self.inits = set()
-        self.finals = set()
-        for i in range(len(lines) - 2):
-            line = lines[i]
-            n, dest = (int(x) for x in line.split(' '))
+        for n, dest in edges:
             self.nodes.add(dest)
             try:
                 self.edges[n].append(dest)
             except:
                 self.edges[n] = [dest]
 
-        init_line = lines[-2]
-        init_nodes = set(int(x) for x in init_line.split(':')[1].split(' '))
-        self.inits = init_nodes
+        self.inits = inits
         self.nodes.update(self.inits)
 
-        final_line = lines[-1]
-        final_nodes = set(int(x) for x in final_line.split(':')[1].split(' '))
-        self.finals = final_nodes
+        self.finals = finals
         self.nodes.update(self.finals)
 
     def reachHead(self, path):
@@ -80,11 +141,49 @@ class ControlFlowGraph:
                 extended_paths += [path + [n]]
         return extended_paths
 
-    def computePrimePaths(self):
+    def iterPrimePaths(self, max_paths: int = None, max_length: int = None, time_budget: float = None):
+        """
+        The prime paths as they are found, in the order of the search, within optional budgets
+
+        Returns:
+
+            A `bitset_prime_paths.PrimePathStream`, whose `truncated` tells the budget that stopped it, if any
+
+
+        """
+        return PrimePathStream(self.edges, self.nodes, self.finals, max_paths=max_paths, max_length=max_length,
+                               time_budget=time_budget)
+
+    def computePrimePaths(self, engine='bitset'):
         """
+        Compute the prime paths into `primePaths`
+
+        Args:
+
+            engine (str): `bitset` for `bitset_prime_paths.compute_prime_paths`, `scc` for
+            `scc_prime_paths.compute_prime_paths`, which searches inside each strongly connected
+            component only, or `list` for the enumeration over lists below; all of them find the same
+            paths in the same order
+
+        Raises:
+
+            ValueError: If the engine is not one of `PRIME_PATH_ENGINES`
 
 
         """
+        if engine not in PRIME_PATH_ENGINES:
+            raise ValueError('Unknown prime path engine {0!r}, expected one of {1}'.format(engine, PRIME_PATH_ENGINES))
+        if engine in ('bitset', 'scc'):
+            compute = compute_prime_paths
+            if engine == 'scc':
+                # networkx is imported only with the scc engine, to keep the start-up light
+                from coda.analysis.paths.scc_prime_paths import compute_prime_paths as compute
+            try:
+                self.primePaths = compute(self.edges, self.nodes, self.finals)
+                return
+            except DeadEndError:
+                # The list-based enumeration raises its own error on the node
+                pass
 
         self.primePaths = []
         try_paths = [[n] for n in self.nodes]
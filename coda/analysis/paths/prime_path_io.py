@@ -0,0 +1,209 @@
+"""
+
+Incremental writers and readers of the prime paths of functions
+
+A writer takes the prime paths of one function at a time, e.g., a `PrimePathStream`, and writes
+each path as it comes, so the paths of a function are never all in memory:
+
+- `json`: the `primepaths.json` format, `{"<function>": [[node, ...], ...], ...}`
+- `jsonl`: one `{"function": "<function>", "path": [node, ...]}` line per path
+- `binary`: little-endian int32 values, the `PPTH` magic and the format version, then one
+`function id, number of nodes, nodes` record per path; the function names must be integers, and
+a function without prime paths has no records
+
+If the enumeration of a function was truncated, the writer keeps the reason and the number of
+written paths in `truncated`. The JSON Lines and binary formats also record it after the paths
+of the function: a `{"function": "<function>", "truncated": "<reason>", "count": n}` line, or a
+`function id, -1, reason code, count` record with the codes of `TRUNCATION_REASONS`.
+
+Usage:
+
+    with get_prime_path_writer('jsonl', 'primepaths.jsonl') as writer:
+        writer.write_function('1', cfg.iterPrimePaths(max_paths=100000))
+    paths, truncated = read_prime_paths('primepaths.jsonl')
+
+"""
+
+__version__ = '0.1.0'
+__author__ = 'Morteza Zakeri'
+
+import json
+import sys
+from array import array
+from pathlib import Path
+
+from coda.graph.cfg_io import int32_array
+
+BINARY_PRIME_PATHS_MAGIC = b'PPTH'
+BINARY_PRIME_PATHS_VERSION = 1
+TRUNCATION_REASONS = ('max_paths', 'max_length', 'time_budget')
+
+
+class PrimePathWriter:
+    """
+    The interface of the incremental writers of prime paths
+
+    `output` is a file name, or a file opened for writing in the mode of the format.
+
+    """
+    binary = False
+
+    def __init__(self, output):
+        self.owns_file = not hasattr(output, 'write')
+        self.file = open(output, 'wb' if self.binary else 'w') if self.owns_file else output
+        # The functions whose enumeration was truncated, to the reason and the number of written paths
+        self.truncated = {}
+
+    def write_function(self, name, paths):
+        """
+        Write the prime paths of a function as they come from the iterable `paths`
+
+        Nothing is written for the function if `paths` raises before its first path.
+
+        """
+        iterator = iter(paths)
+        first_path = next(iterator, None)
+        self.start_function(name)
+        count = 0
+        if first_path is not None:
+            self.write_path(name, first_path, count)
+            count += 1
+            for path in iterator:
+                self.write_path(name, path, count)
+                count += 1
+        reason = getattr(paths, 'truncated', None)
+        if reason is not None:
+            self.truncated[name] = (reason, count)
+        self.end_function(name, reason, count)
+        return count
+
+    def start_function(self, name):
+        pass
+
+    def write_path(self, name, path, i: int):
+        raise NotImplementedError
+
+    def end_function(self, name, reason, count: int):
+        pass
+
+    def close(self):
+        if self.owns_file:
+            self.file.close()
+        else:
+            self.file.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class JSONPrimePathWriter(PrimePathWriter):
+    """
+    Writes the `primepaths.json` format, as `json.dump` of the dictionary of all functions would
+
+    """
+
+    def __init__(self, output):
+        super().__init__(output)
+        self.functions = 0
+        self.file.write('{')
+
+    def start_function(self, name):
+        self.file.write('{0}{1}: ['.format(', ' if self.functions else '', json.dumps(str(name))))
+        self.functions += 1
+
+    def write_path(self, name, path, i: int):
+        self.file.write('{0}{1}'.format(', ' if i else '', json.dumps(path)))
+
+    def end_function(self, name, reason, count: int):
+        self.file.write(']')
+
+    def close(self):
+        self.file.write('}' if self.owns_file else '}\n')
+        super().close()
+
+
+class JSONLinesPrimePathWriter(PrimePathWriter):
+    def write_path(self, name, path, i: int):
+        self.file.write('{{"function": {0}, "path": {1}}}\n'.format(json.dumps(str(name)), json.dumps(path)))
+
+    def end_function(self, name, reason, count: int):
+        if reason is not None:
+            self.file.write(json.dumps({"function": str(name), "truncated": reason, "count": count}) + '\n')
+
+
+class BinaryPrimePathWriter(PrimePathWriter):
+    binary = True
+
+    def __init__(self, output):
+        super().__init__(output)
+        self.file.write(BINARY_PRIME_PATHS_MAGIC)
+        self.file.write(int32_array([BINARY_PRIME_PATHS_VERSION]).tobytes())
+
+    def write_path(self, name, path, i: int):
+        self.file.write(int32_array([int(name), len(path)] + path).tobytes())
+
+    def end_function(self, name, reason, count: int):
+        if reason is not None:
+            self.file.write(int32_array([int(name), -1, TRUNCATION_REASONS.index(reason) + 1, count]).tobytes())
+
+
+PRIME_PATH_WRITERS = {
+    'json': JSONPrimePathWriter,
+    'jsonl': JSONLinesPrimePathWriter,
+    'binary': BinaryPrimePathWriter,
+}
+
+
+def get_prime_path_writer(name: str, output) -> PrimePathWriter:
+    """
+    Create a writer by its format name, one of `PRIME_PATH_WRITERS`
+
+    """
+    if name not in PRIME_PATH_WRITERS:
+        raise ValueError('Unknown prime path format {0!r}, expected one of {1}'.format(name, tuple(PRIME_PATH_WRITERS)))
+    return PRIME_PATH_WRITERS[name](output)
+
+
+def read_prime_paths(path):
+    """
+    Read a prime path file of any of the formats; the JSON Lines files are told by their `.jsonl` suffix
+
+    Returns:
+
+        (paths, truncated): The dictionary of the function names to their prime paths, and the
+        dictionary of the truncated functions to the reason and the number of written paths
+
+    """
+    with open(path, 'rb') as paths_file:
+        content = paths_file.read()
+    paths = {}
+    truncated = {}
+    if content.startswith(BINARY_PRIME_PATHS_MAGIC):
+        values = array('i', content[len(BINARY_PRIME_PATHS_MAGIC):])
+        if sys.byteorder == 'big':
+            values.byteswap()
+        if values[0] != BINARY_PRIME_PATHS_VERSION:
+            raise ValueError('Unsupported binary prime path version {0} in {1}'.format(values[0], path))
+        i = 1
+        while i < len(values):
+            name, length = str(values[i]), values[i + 1]
+            if length < 0:
+                truncated[name] = (TRUNCATION_REASONS[values[i + 2] - 1], values[i + 3])
+                i += 4
+                continue
+            paths.setdefault(name, []).append(values[i + 2:i + 2 + length].tolist())
+            i += 2 + length
+        return paths, truncated
+    text = content.decode('utf8')
+    if Path(path).suffix == '.jsonl':
+        for line in text.splitlines():
+            record = json.loads(line)
+            if "truncated" in record:
+                truncated[record["function"]] = (record["truncated"], record["count"])
+            else:
+                paths.setdefault(record["function"], []).append(record["path"])
+        return paths, truncated
+    return json.loads(text), truncated
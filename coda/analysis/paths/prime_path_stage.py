@@ -0,0 +1,243 @@
+"""
+
+Parallel prime path stage
+
+The prime paths of the functions of a translation unit are computed on a process pool, one
+function per task. The tasks are submitted by their estimated cost, the largest CFGs first, so a
+big function does not end up last on a single worker.
+
+The results are cached by `cfg_key`, the hash of the canonical form of a CFG, so structurally
+identical CFGs, e.g., the dozens of small getters and menu functions of a student project, are
+enumerated once. A `PrimePathCache` with a directory also keeps the results across runs, one
+`<key>.json` file per CFG.
+
+A function that fails, e.g., on a CFG with a dead end, does not stop the stage; its error is
+returned next to the prime paths of the other functions. A budget bounds the enumeration of each
+CFG, so that one function with too many prime paths does not hold a worker for hours; a function
+whose enumeration the budget stops is returned as failed, and its paths are not cached.
+
+The garbage collector is paused during the stage, in the workers and while their results come
+back, as the prime paths are many lists without cycles, which would otherwise be scanned again
+with each function.
+
+Usage:
+
+    cfgs = load_cfgs('extracted_cfgs/gcd')
+    paths, errors = compute_all_prime_paths(cfgs, workers=4, cache=PrimePathCache('prime_path_cache'),
+                                            budget={'max_paths': 1000000, 'time_budget': 600})
+
+"""
+
+__version__ = '0.1.0'
+__author__ = 'Morteza Zakeri'
+
+import gc
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+
+def canonical_cfg(edges, initial_nodes, final_nodes) -> tuple:
+    """
+    The canonical form of a CFG: the successor lists by source, and the sorted initial and final nodes
+
+    The sources are sorted, and the successors of each source keep their order, which is the order
+    of the search of the prime paths, so two CFGs of the same canonical form have the same prime
+    paths in the same order.
+
+    """
+    successors = {}
+    for source, target in edges:
+        successors.setdefault(source, []).append(target)
+    return ([(source, successors[source]) for source in sorted(successors)],
+            sorted(initial_nodes), sorted(final_nodes))
+
+
+def cfg_key(edges, initial_nodes, final_nodes) -> str:
+    """
+    The hash of the canonical form of a CFG
+
+    """
+    return hashlib.sha256(json.dumps(canonical_cfg(edges, initial_nodes, final_nodes)).encode('utf8')).hexdigest()
+
+
+def estimated_cost(edges, initial_nodes, final_nodes) -> int:
+    """
+    The estimated cost of the prime paths of a CFG, which grows with its branches
+
+    """
+    return len(edges)
+
+
+class paused_gc:
+    """
+    Pause the garbage collector in a `with` block, if it is enabled
+
+    """
+
+    def __enter__(self):
+        self.collecting = gc.isenabled()
+        gc.disable()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.collecting:
+            gc.enable()
+
+
+class TruncatedPrimePaths(Exception):
+    """
+    The enumeration of the prime paths of a CFG was stopped by its budget
+
+    """
+
+
+def compute_cfg_prime_paths(canonical: tuple, engine: str = 'bitset', budget: dict = None) -> list:
+    """
+    The prime paths of a CFG in the canonical form, in a worker process
+
+    With a budget, the paths are enumerated by `ControlFlowGraph.iterPrimePaths`, whatever the
+    engine, and sorted into the order of the engines.
+
+    Raises:
+
+        TruncatedPrimePaths: If the budget stopped the enumeration
+
+    """
+    from coda.analysis.paths.prime_path_extractor import ControlFlowGraph
+
+    successors, initial_nodes, final_nodes = canonical
+    cfg = ControlFlowGraph.from_edges([(source, target) for source, targets in successors for target in targets],
+                                      initial_nodes, final_nodes)
+    with paused_gc():
+        if not budget:
+            cfg.computePrimePaths(engine)
+            return cfg.primePaths
+        stream = cfg.iterPrimePaths(**budget)
+        paths = list(stream)
+    if stream.truncated is not None:
+        raise TruncatedPrimePaths('stopped by {0} after {1} prime paths'.format(stream.truncated, stream.count))
+    paths.sort(key=len)
+    return paths
+
+
+class PrimePathCache:
+    """
+    The prime paths of CFGs by `cfg_key`, in memory, and in a directory if one is given
+
+    """
+
+    def __init__(self, directory=None):
+        self.directory = Path(directory) if directory is not None else None
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+        self.paths = {}
+
+    def get(self, key: str):
+        """
+        The cached prime paths of a CFG, or None; an unreadable entry is a miss
+
+        """
+        if key not in self.paths and self.directory is not None:
+            try:
+                with open(self.directory / (key + '.json')) as paths_json:
+                    self.paths[key] = json.load(paths_json)
+            except (OSError, ValueError):
+                return None
+        return self.paths.get(key)
+
+    def put(self, key: str, paths: list):
+        self.paths[key] = paths
+        if self.directory is not None:
+            path = self.directory / (key + '.json')
+            # Write then rename, so that concurrent runs never read a partial entry.
+            tmp_path = path.with_suffix('.tmp{0}'.format(os.getpid()))
+            with open(tmp_path, 'w') as paths_json:
+                json.dump(paths, paths_json)
+            os.replace(tmp_path, path)
+
+
+def compute_all_prime_paths(cfgs: dict, workers: int = None, engine: str = 'bitset', cache: PrimePathCache = None,
+                            progress=None, budget: dict = None):
+    """
+    Compute the prime paths of many CFGs on a process pool, the largest first, each distinct CFG once
+
+    Args:
+
+        cfgs (dict): The function names to `(edges, initial_nodes, final_nodes)`, as `cfg_io.load_cfgs` returns
+
+        workers (int): The number of worker processes, defaults to the number of CPUs; with 1,
+        the prime paths are computed in this process
+
+        engine (str): The prime path engine, see `ControlFlowGraph.computePrimePaths`
+
+        cache (PrimePathCache): The cache to look the CFGs up in and to add the results to, a new
+        in-memory cache by default
+
+        progress (callable): Called with the name of each function as soon as its prime paths are computed;
+        the functions found in the cache are not reported
+
+        budget (dict): The limits of the enumeration of each CFG, any of the `max_paths`,
+        `max_length` and `time_budget` arguments of `ControlFlowGraph.iterPrimePaths`, or None
+        for no limit; a function whose enumeration they stop is reported in `errors`
+
+    Returns:
+
+        (paths, errors): The dictionary of the function names to their prime paths, in the order of
+        `cfgs`, and the dictionary of the failed functions to their error messages
+
+
+    """
+    with paused_gc():
+        return _compute_all_prime_paths(cfgs, workers or os.cpu_count() or 1, engine,
+                                        cache if cache is not None else PrimePathCache(), progress, budget)
+
+
+def _compute_all_prime_paths(cfgs: dict, workers: int, engine: str, cache: PrimePathCache, progress, budget: dict):
+    names_by_key = {}
+    tasks = {}
+    for name, (edges, initial_nodes, final_nodes) in cfgs.items():
+        key = cfg_key(edges, initial_nodes, final_nodes)
+        names_by_key.setdefault(key, []).append(name)
+        if key not in tasks and cache.get(key) is None:
+            tasks[key] = (estimated_cost(edges, initial_nodes, final_nodes),
+                          canonical_cfg(edges, initial_nodes, final_nodes))
+    order = sorted(tasks, key=lambda k: tasks[k][0], reverse=True)
+
+    failures = {}
+
+    def done(key, paths=None, error=None):
+        if error is None:
+            cache.put(key, paths)
+        else:
+            failures[key] = error
+        if progress is not None:
+            for name in names_by_key[key]:
+                progress(name)
+
+    if workers == 1:
+        for key in order:
+            try:
+                done(key, compute_cfg_prime_paths(tasks[key][1], engine, budget))
+            except Exception as e:
+                done(key, error='{0}: {1}'.format(type(e).__name__, e))
+    elif order:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(compute_cfg_prime_paths, tasks[key][1], engine, budget): key
+                       for key in order}
+            for future in as_completed(futures):
+                try:
+                    done(futures[future], future.result())
+                except Exception as e:
+                    done(futures[future], error='{0}: {1}'.format(type(e).__name__, e))
+
+    paths = {}
+    errors = {}
+    keys = {name: key for key, names in names_by_key.items() for name in names}
+    for name in cfgs:
+        if keys[name] in failures:
+            errors[name] = failures[keys[name]]
+        else:
+            paths[name] = cache.get(keys[name])
+    return paths, errors
@@ -0,0 +1,210 @@
+"""
+
+Prime path enumeration over the strongly connected components of a CFG
+
+The loops of a CFG are its strongly connected components (SCCs). A simple path that leaves a
+component never comes back to it, so what follows once a path enters another component at a
+node `v` does not depend on how it got there: the nodes of the components ahead are all unvisited,
+the path cannot return to its first node, and no node ahead is a predecessor of the first node.
+
+`compute_prime_paths` therefore enumerates the paths inside each component only:
+
+- For each component, in reverse topological order of the condensation DAG, a depth-first search
+inside the component finds the segments from each entry node `v` that either end inside it or leave
+it for an entry node of a later component. They are kept as `(segment, next entry node)` pairs, and
+the continuations of `v`, the paths made of its segments and the continuations of their next entry
+nodes, are built once, when a prime path first enters `v`, and shared by all the paths that enter it.
+- For each first node, the search inside its own component finds the cycles and the paths that end
+inside it, as `bitset_prime_paths` does; a path that leaves the component is prime if it holds the
+non-final predecessors of the first node, and is completed with each continuation of the node it
+enters. A missing predecessor of the first node can only be reached inside its component, which
+makes the pruning of `bitset_prime_paths` tighter.
+
+The segments and the continuations are in the order of the search, so the prime paths are the same,
+in the same order, as those of `bitset_prime_paths.compute_prime_paths` and the list-based
+enumeration. The garbage collector is paused meanwhile, as the millions of lists it would scan
+have no cycles.
+
+"""
+
+__version__ = '0.1.0'
+__author__ = 'Morteza Zakeri'
+
+import gc
+
+import networkx as nx
+
+from coda.analysis.paths.bitset_prime_paths import DeadEndError
+
+
+def compute_prime_paths(edges: dict, nodes, finals) -> list:
+    """
+    Args:
+
+        edges (dict): The successor lists of the nodes, as `ControlFlowGraph.edges`
+
+        nodes (set): All nodes, as `ControlFlowGraph.nodes`
+
+        finals (set): The final nodes
+
+    Returns:
+
+        The prime paths, as lists of nodes
+
+    Raises:
+
+        DeadEndError: If a node that is not final has no successors
+
+    """
+    # The continuations and the prime paths are millions of lists without cycles, which only make the
+    # garbage collector scan them over and over
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        return _compute_prime_paths(edges, nodes, finals)
+    finally:
+        if collecting:
+            gc.enable()
+
+
+def _compute_prime_paths(edges: dict, nodes, finals) -> list:
+    order = list(nodes)
+    for node in order:
+        if node not in finals and node not in edges:
+            raise DeadEndError(node)
+    index = {node: i for i, node in enumerate(order)}
+    bits = [1 << i for i in range(len(order))]
+    # The successors of each node, with their numbers and bits; the final nodes are not extended
+    successors = [[(index[t], bits[index[t]], t) for t in edges[node]] if node not in finals else []
+                  for node in order]
+    successor_masks = [0] * len(order)
+    non_final_predecessors = [0] * len(order)
+    for i, targets in enumerate(successors):
+        for t, bit, _ in targets:
+            successor_masks[i] |= bit
+            non_final_predecessors[t] |= bits[i]
+
+    g = nx.DiGraph()
+    g.add_nodes_from(range(len(order)))
+    g.add_edges_from((i, t) for i, targets in enumerate(successors) for t, _, _ in targets)
+    condensation = nx.condensation(g)
+    component = condensation.graph["mapping"]
+    entries = set(t for i, targets in enumerate(successors) for t, _, _ in targets if component[t] != component[i])
+    outside_masks = {}
+    for c in condensation:
+        outside_masks[c] = (1 << len(order)) - 1
+        for v in condensation.nodes[c]["members"]:
+            outside_masks[c] &= ~bits[v]
+    branches = [len(targets) > 1 for targets in successors]
+
+    def reaches(start: int, passed: int, targets: int) -> bool:
+        """
+        Whether a node of the bitset `targets` is reachable from `start` without passing the bitset `passed`
+
+        """
+        frontier = successor_masks[start] & ~passed
+        while frontier:
+            if frontier & targets:
+                return True
+            passed |= frontier
+            reached = 0
+            while frontier:
+                low = frontier & -frontier
+                reached |= successor_masks[low.bit_length() - 1]
+                frontier ^= low
+            frontier = reached & ~passed
+        return False
+
+    # The continuations from the entry nodes, as (segment, next entry node or None) pairs
+    segments = {}
+    for c in reversed(list(nx.topological_sort(condensation))):
+        for v in condensation.nodes[c]["members"]:
+            if v not in entries:
+                continue
+            path = [order[v]]
+            if not successor_masks[v] & ~bits[v]:
+                segments[v] = [(path, None)]
+                continue
+            found = []
+            stack = [(iter(successors[v]), bits[v])]
+            while stack:
+                targets, mask = stack[-1]
+                for t, bit, label in targets:
+                    if mask & bit:
+                        continue
+                    if component[t] != c:
+                        found.append((list(path), t))
+                        continue
+                    extended = mask | bit
+                    if not successor_masks[t] & ~extended:
+                        found.append((path + [label], None))
+                        continue
+                    path.append(label)
+                    stack.append((iter(successors[t]), extended))
+                    break
+                else:
+                    stack.pop()
+                    path.pop()
+            segments[v] = found
+
+    # The continuations of the entry nodes that prime paths enter, as whole paths
+    continuations = {}
+
+    def continue_from(entry: int) -> list:
+        pending = [entry]
+        while pending:
+            v = pending[-1]
+            if v in continuations:
+                pending.pop()
+                continue
+            ahead = [t for _, t in segments[v] if t is not None and t not in continuations]
+            if ahead:
+                pending.extend(ahead)
+                continue
+            found = []
+            for segment, t in segments[v]:
+                if t is None:
+                    found.append(segment)
+                else:
+                    found.extend([segment + rest for rest in continuations[t]])
+            continuations[v] = found
+            pending.pop()
+        return continuations[entry]
+
+    prime_paths = []
+    for first, first_bit in enumerate(bits):
+        c = component[first]
+        head = non_final_predecessors[first] & ~first_bit
+        # A missing predecessor of the first node is in its component, so the search does not leave it
+        outside = outside_masks[c] | first_bit
+        path = [order[first]]
+        if not successor_masks[first]:
+            if not head:
+                prime_paths.append(path)
+            continue
+        stack = [(iter(successors[first]), 0)]
+        while stack:
+            targets, mask = stack[-1]
+            for t, bit, label in targets:
+                if mask & bit:
+                    continue
+                if component[t] != c:
+                    # The predecessors of the first node are all in its component or before it
+                    if not head & ~mask:
+                        prime_paths.extend([path + rest for rest in continue_from(t)])
+                    continue
+                extended = mask | bit
+                if t == first or not successor_masks[t] & ~extended:
+                    if t == first or not head & ~extended:
+                        prime_paths.append(path + [label])
+                    continue
+                missing = head & ~extended
+                if not missing or head & bit or not branches[t] or reaches(t, extended | outside, missing):
+                    path.append(label)
+                    stack.append((iter(successors[t]), extended))
+                    break
+            else:
+                stack.pop()
+                path.pop()
+    prime_paths.sort(key=len)
+    return prime_paths
@@ -0,0 +1,148 @@
+"""
+
+Concurrent execution of the tests of an instrumented program
+
+Each test is a file given to the program on its standard input. The runs are independent
+processes, each with its own trace file, named by `CODA_TRACE_FILE` in its environment (see
+`coda.synthesis.probe_runtime`), so several tests run at the same time. A pool of threads starts
+them, as each thread only waits for its process. A run that takes longer than the timeout is sent
+SIGTERM, on which the probe runtime writes the probes it buffered, and is killed if it has not
+ended `TERMINATE_GRACE` seconds later; a killed run misses the probes of its last buffer. The end
+of the standard error output of each run is kept as well.
+
+Usage:
+
+    results = run_tests('instrumented_programs/gcd/instrumented_source.exe', test_files, 'traces', jobs=4, timeout=10)
+    for test, result in results.items():
+        executed_paths = read_trace(result["trace"])
+
+or from the command line:
+
+    coda run-tests instrumented_programs/gcd/instrumented_source.exe test_data/test -o traces -j 4 --timeout 10
+
+"""
+
+__version__ = '0.1.0'
+__author__ = 'Morteza Zakeri'
+
+import os
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from coda.synthesis.probe_runtime import TRACE_FILE_VARIABLE, BinaryTraceFile, is_binary_trace_file
+
+TRACE_SUFFIX = '.log'
+# The number of characters kept from the end of the standard error output of a run
+STDERR_TAIL = 2000
+# The seconds a run that timed out has to write its trace after SIGTERM, before it is killed
+TERMINATE_GRACE = 2
+
+
+def run_test(executable, test_path, trace_path, timeout: float = None) -> dict:
+    """
+    Run an instrumented program on one test, writing its trace to `trace_path`
+
+    Returns:
+
+        A dictionary with the test, the trace file, the exit code, or None if the run timed out or
+        could not start, whether it timed out, its time, and the end of its standard error output
+
+    """
+    result = {"test": str(test_path), "trace": str(trace_path), "returncode": None, "timed_out": False,
+              "seconds": None, "stderr": '', "error": None}
+    env = dict(os.environ)
+    env[TRACE_FILE_VARIABLE] = str(trace_path)
+    # A trace of an earlier run must not pass for the trace of this one
+    Path(trace_path).unlink(missing_ok=True)
+    start = time.perf_counter()
+    try:
+        with open(test_path, 'rb') as test_input, \
+                subprocess.Popen([str(executable)], stdin=test_input, stdout=subprocess.DEVNULL,
+                                 stderr=subprocess.PIPE, env=env) as process:
+            try:
+                _, stderr = process.communicate(timeout=timeout)
+                result["returncode"] = process.returncode
+            except subprocess.TimeoutExpired:
+                result["timed_out"] = True
+                process.terminate()
+                try:
+                    _, stderr = process.communicate(timeout=TERMINATE_GRACE)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                    _, stderr = process.communicate()
+        result["stderr"] = stderr.decode('utf8', 'replace')[-STDERR_TAIL:]
+    except OSError as e:
+        result["error"] = '{0}: {1}'.format(type(e).__name__, e)
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def run_tests(executable, test_paths, trace_dir, jobs: int = None, timeout: float = None, progress=None) -> dict:
+    """
+    Run an instrumented program on many tests at the same time
+
+    Args:
+
+        executable: The instrumented program
+
+        test_paths: The test files, given to the program on its standard input
+
+        trace_dir: The directory of the trace files, `<test file name>.log` per test
+
+        jobs (int): The number of tests run at the same time, the number of CPUs by default
+
+        timeout (float): The seconds after which a run is killed, or None to wait for each run
+
+        progress (callable): Called with the result of each test, in the order of the tests
+
+    Returns:
+
+        The dictionary of the test files, in order, to the results of `run_test`
+
+    """
+    executable = Path(executable).resolve()
+    trace_dir = Path(trace_dir)
+    trace_dir.mkdir(parents=True, exist_ok=True)
+    test_paths = [Path(path) for path in test_paths]
+    results = {}
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as executor:
+        futures = [executor.submit(run_test, executable, path, trace_dir / (path.name + TRACE_SUFFIX), timeout)
+                   for path in test_paths]
+        for path, future in zip(test_paths, futures):
+            results[str(path)] = future.result()
+            if progress is not None:
+                progress(results[str(path)])
+    return results
+
+
+def read_trace(trace_path) -> dict:
+    """
+    Read the trace of a run of a program instrumented by `CFGInstListener`
+
+    Binary traces, see `coda.synthesis.probe_runtime`, are memory-mapped; the text traces of
+    programs instrumented with the former `logFile` probes, a line of `function block` per probe,
+    are read as well. The binary trace of a run killed by SIGKILL misses the probes of its last
+    buffer; a crashed or terminated run writes it from the signal handlers of the probe runtime.
+
+    Returns:
+
+        The dictionary of the function codes to the list of their executed CFG nodes, in order;
+        empty if the run wrote no trace
+
+    """
+    executed_paths = {}
+    if not os.path.isfile(trace_path) or os.path.getsize(trace_path) == 0:
+        return executed_paths
+    if is_binary_trace_file(trace_path):
+        with BinaryTraceFile(trace_path) as trace:
+            return trace.executed_paths()
+    with open(trace_path) as trace_file:
+        for line in trace_file:
+            fields = line.split()
+            if len(fields) != 2:
+                # The last line of a killed run may be cut
+                continue
+            executed_paths.setdefault(fields[0], []).append(int(fields[1]))
+    return executed_paths
@@ -0,0 +1,90 @@
+"""
+
+Compact, array-backed token buffer
+
+`CommonTokenStream` keeps one `CommonToken` object per token, including the whitespace,
+newline, comment and directive tokens of the hidden channel. `CompactTokenList` replaces
+the `tokens` list of a token stream: it stores the fields of each token in parallel typed
+arrays and creates `CommonToken` objects only when they are read.
+
+A token object stays the same object as long as it is referenced, e.g., by a parse tree,
+since the created tokens are kept in a weak-value dictionary. The token text is read from the
+input stream, as `CommonToken.text` does, unless the lexer set an explicit text.
+
+Usage:
+
+    token_stream = CommonTokenStream(lexer)
+    token_stream.tokens = CompactTokenList()
+    token_stream.fill()
+
+"""
+
+__version__ = '0.1.0'
+__author__ = 'Morteza Zakeri'
+
+from array import array
+from collections.abc import Sequence
+from weakref import WeakValueDictionary
+
+from antlr4.Token import CommonToken
+
+
+class CompactTokenList(Sequence):
+    """
+    A list of tokens stored as parallel arrays of their type, channel, start, stop, line and column
+
+    It supports the list operations used by `BufferedTokenStream` and `TokenStreamRewriter`:
+    `len`, indexing, slicing, iteration and `append`.
+
+    """
+
+    def __init__(self):
+        self.types = array('i')
+        self.channels = array('h')
+        self.starts = array('i')
+        self.stops = array('i')
+        self.lines = array('i')
+        self.columns = array('i')
+        # Tokens whose text was set by the lexer, by index
+        self.texts = {}
+        self.source = None
+        self._tokens = WeakValueDictionary()
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._token(i) for i in range(*index.indices(len(self.types)))]
+        if index < 0:
+            index += len(self.types)
+        if not 0 <= index < len(self.types):
+            raise IndexError('token index out of range')
+        return self._token(index)
+
+    def _token(self, index: int) -> CommonToken:
+        token = self._tokens.get(index)
+        if token is None:
+            token = CommonToken(self.source, self.types[index], self.channels[index],
+                                self.starts[index], self.stops[index])
+            token.line = self.lines[index]
+            token.column = self.columns[index]
+            token.tokenIndex = index
+            token._text = self.texts.get(index)
+            self._tokens[index] = token
+        return token
+
+    def append(self, token: CommonToken):
+        if self.source is None:
+            self.source = token.source
+        index = len(self.types)
+        self.types.append(token.type)
+        self.channels.append(token.channel)
+        self.starts.append(token.start)
+        self.stops.append(token.stop)
+        self.lines.append(token.line)
+        self.columns.append(token.column)
+        if token._text is not None:
+            self.texts[index] = token._text
+        # Keep the appended token object, it is the current token of the parser while it is referenced
+        self._tokens[index] = token
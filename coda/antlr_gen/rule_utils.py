@@ -1,4 +1,4 @@
-from antlr4 import CommonTokenStream, ParserRuleContext
+from antlr4 import CommonTokenStream, ParserRuleContext, Token
 
 from coda.antlr_gen.cpp_parser.CPP14_v2Lexer import CPP14_v2Lexer
 
@@ -7,6 +7,15 @@ def extract_exact_text(token_stream: CommonTokenStream, rule: ParserRuleContext)
     return token_stream.getText(rule.start.tokenIndex, rule.stop.tokenIndex)
 
 
+def rule_text(token_stream: CommonTokenStream, rule) -> str:
+    """
+    The text of a rule without the hidden tokens, as `ParserRuleContext.getText()`, also for a `RuleSpan`
+
+    """
+    tokens = token_stream.tokens[rule.start.tokenIndex:rule.stop.tokenIndex + 1]
+    return ''.join(t.text for t in tokens if t.channel == Token.DEFAULT_CHANNEL)
+
+
 def is_break(rule: ParserRuleContext) -> bool:
     return rule.start.type == CPP14_v2Lexer.Break
 
@@ -21,3 +30,47 @@ def is_continue(rule: ParserRuleContext) -> bool:
 
 def is_throw(rule: ParserRuleContext) -> bool:
     return rule.start.type == CPP14_v2Lexer.Throw
+
+
+JUMP_KINDS = {
+    CPP14_v2Lexer.Break: 'break',
+    CPP14_v2Lexer.Continue: 'continue',
+    CPP14_v2Lexer.Return: 'return',
+    CPP14_v2Lexer.Throw: 'throw',
+}
+
+
+def jump_kind(rule) -> str:
+    """
+    The kind of jump statement a rule starts with, one of `JUMP_KINDS`, or None
+
+    Rules without a start token, as a missing rule or a terminal node, are not jumps.
+
+    """
+    start = getattr(rule, 'start', None)
+    return None if start is None else JUMP_KINDS.get(start.type)
+
+
+class RuleSpan:
+    """
+    A rule detached from its parse tree, which keeps only its first and last tokens
+
+    It answers the same questions as a `ParserRuleContext` in the helpers above,
+    e.g., when a CFG is restored from a cache without re-parsing the source.
+
+    """
+    __slots__ = ('start', 'stop')
+
+    def __init__(self, start: Token, stop: Token):
+        self.start = start
+        self.stop = stop
+
+
+def rule_token_range(rule) -> tuple:
+    """
+    The token indices of the first and the last token of a rule or a terminal node
+
+    """
+    if hasattr(rule, 'symbol'):
+        return rule.symbol.tokenIndex, rule.symbol.tokenIndex
+    return rule.start.tokenIndex, rule.stop.tokenIndex
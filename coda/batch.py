@@ -0,0 +1,210 @@
+"""
+CodA batch driver module
+
+Analyze all translation units of a C++ project in parallel.
+The files are sharded across a process pool; each worker lexes, parses, extracts the
+function CFGs and computes their prime paths, and sends back only a compact,
+JSON-serializable summary of each file to the parent process.
+
+Usage:
+
+    python -m coda.batch test_data/yaml_cpp_src -o yaml_cpp.json -j 8
+
+"""
+
+__version__ = '0.1.0'
+__author__ = 'Morteza Zakeri'
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from coda.cli import FRONT_ENDS, PARSE_MODES
+
+DEFAULT_PATTERNS = ('*.cpp', '*.cc', '*.cxx', '*.c')
+
+
+def cfg_summary(g) -> dict:
+    """
+    The compact form of a function CFG built by `CFGExtractorVisitor`
+
+    """
+    return {
+        "nodes": len(g),
+        "edges": [(f, t) for f, t, _ in g.edges()],
+        "initial_nodes": [g.head()],
+        "final_nodes": [g.last()]
+    }
+
+
+def compute_prime_paths(summary: dict) -> list:
+    from coda.analysis.paths.prime_path_extractor import ControlFlowGraph
+
+    cfg = ControlFlowGraph.from_edges(summary["edges"], summary["initial_nodes"], summary["final_nodes"])
+    cfg.computePrimePaths()
+    return cfg.primePaths
+
+
+def analyze_file(path: str, parse_mode: str = 'll', prime_paths: bool = True, chunked: bool = False,
+                 chunk_workers: int = 1, front_end: str = 'antlr') -> dict:
+    """
+    Run the whole static analysis pipeline on one translation unit, in a worker process
+
+    With `chunked`, the top-level functions are parsed one at a time by `coda.analysis.chunked_parse`,
+    on `chunk_workers` processes, and a function that fails does not fail the whole file.
+    Another `front_end` of `coda.analysis.cfg.frontend`, e.g., `tree-sitter`, replaces the ANTLR parser.
+
+    Returns:
+
+        A dictionary with the compact CFG and the prime paths of each function,
+        and the error message if the file could not be analyzed
+
+    """
+    from coda.analysis.parse_session import ParseSession
+    from coda.antlr_gen.rule_utils import rule_text
+
+    result = {"path": path, "functions": [], "error": None}
+    start = time.perf_counter()
+    chunk_errors = []
+    try:
+        if front_end != 'antlr':
+            from coda.analysis.cfg.frontend import get_front_end
+            functions = get_front_end(front_end).extract_cfgs_from_file(path)
+            names = {declarator: declarator.getText() for declarator in functions}
+        else:
+            session = ParseSession.from_file(path, parse_mode=parse_mode)
+            if chunked:
+                from coda.analysis.chunked_parse import extract_chunked_cfgs
+                functions = extract_chunked_cfgs(session.token_stream, workers=chunk_workers, parse_mode=parse_mode,
+                                                 errors=chunk_errors)
+            else:
+                from coda.analysis.cfg.cfg_extractor_visitor import CFGExtractorVisitor
+                cfg_extractor = CFGExtractorVisitor(session.token_stream)
+                cfg_extractor.visit(session.parse_tree)
+                functions = cfg_extractor.functions
+            names = {declarator: rule_text(session.token_stream, declarator) for declarator in functions}
+    except Exception as e:
+        result["error"] = '{0}: {1}'.format(type(e).__name__, e)
+        result["seconds"] = time.perf_counter() - start
+        return result
+
+    for declarator, g in functions.items():
+        function = {"name": names[declarator], "line": declarator.start.line, "error": None}
+        try:
+            function.update(cfg_summary(g))
+            if prime_paths:
+                function["prime_paths"] = compute_prime_paths(function)
+        except Exception as e:
+            function["error"] = '{0}: {1}'.format(type(e).__name__, e)
+        result["functions"].append(function)
+    for line, error in chunk_errors:
+        result["functions"].append({"name": None, "line": line, "error": error})
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def init_worker(dfa_cache=None):
+    if dfa_cache is not None:
+        from coda.analysis.dfa_cache import load_dfa_cache
+        load_dfa_cache(dfa_cache)
+
+
+def find_sources(directory, patterns=DEFAULT_PATTERNS) -> list:
+    files = {str(p) for pattern in patterns for p in Path(directory).rglob(pattern) if p.is_file()}
+    # Start the largest files first, so that a big file does not end up last on a single worker
+    return sorted(files, key=lambda p: os.path.getsize(p), reverse=True)
+
+
+def analyze_project(directory, workers: int = None, patterns=DEFAULT_PATTERNS, parse_mode: str = 'll',
+                    prime_paths: bool = True, progress=None, dfa_cache=None, chunked: bool = False,
+                    front_end: str = 'antlr') -> dict:
+    """
+    Analyze every source file under `directory` on a process pool
+
+    Args:
+
+        directory (str): The root directory of the project
+
+        workers (int): The number of worker processes, defaults to the number of CPUs
+
+        patterns (tuple): Glob patterns of the files to analyze
+
+        parse_mode (str): The prediction mode of the parser, see `ParseSession`
+
+        prime_paths (bool): Whether to compute the prime paths of the functions
+
+        progress (callable): Called with each file result as soon as it is ready
+
+        dfa_cache (str): A file saved by `coda.analysis.dfa_cache` to preload the parser DFAs of each worker from
+
+        chunked (bool): Whether to parse the files one top-level function at a time, see `analyze_file`
+
+        front_end (str): The front-end to parse the files with, see `coda.analysis.cfg.frontend`
+
+    Returns:
+
+        A dictionary of file paths to their analysis results
+
+
+    """
+    files = find_sources(directory, patterns)
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(dfa_cache,)) as executor:
+        futures = [executor.submit(analyze_file, path, parse_mode, prime_paths, chunked, 1, front_end) for path in files]
+        for future in as_completed(futures):
+            result = future.result()
+            results[result["path"]] = result
+            if progress is not None:
+                progress(result)
+    return {path: results[path] for path in sorted(results)}
+
+
+def main(args):
+    def progress(result):
+        status = result["error"] or '{0} functions'.format(len(result["functions"]))
+        print('{0:8.2f}s {1} ({2})'.format(result["seconds"], result["path"], status))
+
+    start = time.perf_counter()
+    results = analyze_project(args.directory, workers=args.jobs, patterns=args.patterns,
+                              parse_mode=args.parse_mode, prime_paths=not args.no_prime_paths,
+                              progress=progress, dfa_cache=args.dfa_cache, chunked=args.chunked,
+                              front_end=args.front_end)
+    print('Analyzed {0} files in {1:.2f}s'.format(len(results), time.perf_counter() - start))
+    with open(args.output, 'w') as f:
+        json.dump(results, f)
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument(
+        'directory',
+        help='Root directory of the C++ project')
+    arg_parser.add_argument(
+        '-o', '--output',
+        help='Output JSON file of the analysis results', default='batch_results.json')
+    arg_parser.add_argument(
+        '-j', '--jobs', type=int,
+        help='Number of worker processes, defaults to the number of CPUs', default=None)
+    arg_parser.add_argument(
+        '--patterns', nargs='+',
+        help='Glob patterns of the source files', default=list(DEFAULT_PATTERNS))
+    arg_parser.add_argument(
+        '--parse-mode', choices=PARSE_MODES,
+        help='Prediction mode of the parser', default='ll')
+    arg_parser.add_argument(
+        '--dfa-cache',
+        help='Parser DFA cache to preload in the workers, see coda.analysis.dfa_cache', default=None)
+    arg_parser.add_argument(
+        '--no-prime-paths', action='store_true',
+        help='Extract the CFGs only')
+    arg_parser.add_argument(
+        '--chunked', action='store_true',
+        help='Parse the files one top-level function at a time')
+    arg_parser.add_argument(
+        '--front-end', choices=FRONT_ENDS,
+        help='The C++ front-end, tree-sitter requires the tree-sitter and tree-sitter-cpp packages', default='antlr')
+    args = arg_parser.parse_args()
+    main(args)
@@ -0,0 +1,306 @@
+"""
+CodA command line interface
+
+Each subcommand imports only the modules it needs. In particular, the generated
+C++ parser, listener and visitor modules are not imported by the subcommands that
+work on saved CFG files, such as `primepaths`.
+
+Usage:
+
+    python -m coda cfg test_data/simple/gcd/gcd.c -o extracted_cfgs/gcd
+    python -m coda cfg test_data/yaml_cpp_src/emitter.cpp --chunked -j 8
+    python -m coda cfg test_data/yaml_cpp_src/emitter.cpp --incremental
+    python -m coda cfg test_data/yaml_cpp_src/emitter.cpp --front-end tree-sitter
+    python -m coda primepaths extracted_cfgs/gcd
+    python -m coda instrument test_data/simple/gcd/gcd.c -o gcd_instrumented.cpp
+    python -m coda batch test_data/yaml_cpp_src -o yaml_cpp.json
+    python -m coda warm-dfa "test_data/simple/*/*.c" -o coda_dfa.pickle
+    python -m coda run-tests instrumented_programs/gcd/instrumented_source.exe test_data/test -o traces -j 4
+
+"""
+
+__version__ = '0.1.0'
+__author__ = 'Morteza Zakeri'
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+PARSE_MODES = ('ll', 'sll', 'two_stage')
+FRONT_ENDS = ('antlr', 'tree-sitter')
+CFG_FORMATS = ('text', 'json', 'binary')
+PRIME_PATH_FILES = {'json': 'primepaths.json', 'jsonl': 'primepaths.jsonl', 'binary': 'primepaths.bin'}
+
+
+def cfg_command(args):
+    from coda.batch import analyze_file
+    from coda.graph.cfg_sinks import get_cfg_sink
+
+    if args.dfa_cache:
+        from coda.analysis.dfa_cache import load_dfa_cache
+        load_dfa_cache(args.dfa_cache)
+    if args.incremental:
+        return incremental_cfg_command(args)
+    result = analyze_file(args.source, parse_mode=args.parse_mode, prime_paths=False, chunked=args.chunked,
+                          chunk_workers=args.jobs, front_end=args.front_end)
+    if result["error"] is not None:
+        print('Failed to analyze {0}: {1}'.format(args.source, result["error"]), file=sys.stderr)
+        return 1
+
+    output_dir = Path(args.output or os.path.join('extracted_cfgs', Path(args.source).stem))
+    output_dir.mkdir(parents=True, exist_ok=True)
+    function_dict = {}
+    with get_cfg_sink(args.format, output_dir) as cfg_sink:
+        for f_code, function in enumerate(result["functions"], start=1):
+            if function["error"] is not None:
+                print('Skipped the function at line {0}: {1}'.format(function["line"], function["error"]),
+                      file=sys.stderr)
+                continue
+            function_dict[f_code] = (function["name"], function["line"])
+            cfg_sink.write_cfg(f_code, function["edges"], function["initial_nodes"], function["final_nodes"])
+    with open(output_dir / 'functions.json', 'w') as functions_json:
+        json.dump(function_dict, functions_json)
+    if args.dfa_cache:
+        from coda.analysis.dfa_cache import save_dfa_cache
+        save_dfa_cache(args.dfa_cache)
+    print('Extracted {0} CFGs to {1}'.format(len(function_dict), output_dir))
+    return 0
+
+
+def incremental_cfg_command(args):
+    from coda.analysis.incremental import update_cfgs
+
+    output_dir = args.output or os.path.join('extracted_cfgs', Path(args.source).stem)
+    stats = update_cfgs(args.source, output_dir, parse_mode=args.parse_mode, workers=args.jobs)
+    if args.dfa_cache:
+        from coda.analysis.dfa_cache import save_dfa_cache
+        save_dfa_cache(args.dfa_cache)
+    print('Reused {0} and analyzed {1} functions, wrote {2} files and removed {3} files in {4}'.format(
+        stats["reused"], stats["analyzed"], len(stats["written"]), len(stats["removed"]), output_dir))
+    return 0
+
+
+def primepaths_command(args):
+    from coda.analysis.paths.prime_path_extractor import ControlFlowGraph
+    from coda.analysis.paths.prime_path_io import get_prime_path_writer
+    from coda.graph.cfg_io import BINARY_CFG_FILE, is_binary_cfg_file
+
+    cfg_files = []
+    for path in map(Path, args.cfgs):
+        if path.is_dir() and (path / BINARY_CFG_FILE).is_file():
+            cfg_files.append(path / BINARY_CFG_FILE)
+        elif path.is_dir():
+            cfg_files.extend(sorted(path.glob('*.txt'), key=lambda p: (len(p.stem), p.stem)))
+        else:
+            cfg_files.append(path)
+
+    output = args.output
+    if output is None and len(args.cfgs) == 1 and Path(args.cfgs[0]).is_dir():
+        output = os.path.join(args.cfgs[0], PRIME_PATH_FILES[args.format])
+    if output is None and args.format == 'binary':
+        print('The binary format needs an output file, -o', file=sys.stderr)
+        return 1
+    status = 0
+    with get_prime_path_writer(args.format, output if output is not None else sys.stdout) as writer:
+        for cfg_path in cfg_files:
+            try:
+                if is_binary_cfg_file(cfg_path):
+                    cfgs = {str(function_id): cfg
+                            for function_id, cfg in ControlFlowGraph.load_binary(cfg_path).items()}
+                else:
+                    with open(cfg_path) as cfg_file:
+                        cfgs = {cfg_path.stem: ControlFlowGraph(cfg_file)}
+            except Exception as e:
+                print('Failed to load the CFGs of {0}: {1}'.format(cfg_path, e), file=sys.stderr)
+                status = 1
+                continue
+            for name, cfg in cfgs.items():
+                paths = cfg.iterPrimePaths(max_paths=args.max_paths, max_length=args.max_length,
+                                           time_budget=args.time_budget)
+                if args.verbose:
+                    paths = VerbosePaths(name, paths)
+                try:
+                    writer.write_function(name, paths)
+                except Exception as e:
+                    print('Failed to compute the prime paths of {0}: {1}'.format(name, e), file=sys.stderr)
+                    status = 1
+    for name, (reason, count) in writer.truncated.items():
+        print('Truncated the prime paths of {0} by {1} after {2} paths'.format(name, reason, count), file=sys.stderr)
+    return status
+
+
+class VerbosePaths:
+    """
+    Print the prime paths of a function as they pass to the writer, keeping the budget report of the stream
+
+    """
+
+    def __init__(self, name, paths):
+        self.name = name
+        self.paths = paths
+
+    @property
+    def truncated(self):
+        return self.paths.truncated
+
+    def __iter__(self):
+        for j, path in enumerate(self.paths):
+            print(self.name, j + 1, path, file=sys.stderr)
+            yield path
+
+
+def instrument_command(args):
+    from antlr4 import ParseTreeWalker
+    from coda.analysis.parse_session import ParseSession
+    from coda.synthesis.instrumentation import InstrumentationListener
+
+    session = ParseSession.from_file(args.source, parse_mode=args.parse_mode)
+    listener = InstrumentationListener(session.token_stream, token_stream_rewriter=session.rewriter)
+    ParseTreeWalker().walk(listener, session.parse_tree)
+    output = args.output or os.path.join('instrumented_programs', Path(args.source).stem + '.cpp')
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as instrumented_source:
+        instrumented_source.write(session.rewriter.getDefaultText())
+    print('Instrumented source written to', output)
+    return 0
+
+
+def batch_command(args):
+    from coda import batch
+
+    batch.main(args)
+    return 0
+
+
+def warm_dfa_command(args):
+    from coda.analysis import dfa_cache
+
+    dfa_cache.main(args)
+    return 0
+
+
+def render_command(args):
+    from coda.graph.render import find_sources, render_sources
+
+    sources = find_sources(args.sources)
+    rendered, failed = render_sources(sources, format=args.format, engine=args.engine, jobs=args.jobs)
+    for source_path, error in failed:
+        print('Failed to render {0}: {1}'.format(source_path, error), file=sys.stderr)
+    print('Rendered {0} of {1} Graphviz sources'.format(len(rendered), len(sources)))
+    return 1 if failed else 0
+
+
+def run_tests_command(args):
+    from coda.analysis.test_runner import run_tests
+
+    test_paths = []
+    for path in map(Path, args.tests):
+        test_paths.extend(sorted(p for p in path.iterdir() if p.is_file()) if path.is_dir() else [path])
+
+    def progress(result):
+        if result["error"] is not None:
+            status = result["error"]
+        elif result["timed_out"]:
+            status = 'timed out'
+        else:
+            status = 'exit code {0}'.format(result["returncode"])
+        print('{0:8.2f}s {1} ({2})'.format(result["seconds"], result["test"], status))
+
+    results = run_tests(args.executable, test_paths, args.output, jobs=args.jobs, timeout=args.timeout,
+                        progress=progress)
+    with open(os.path.join(args.output, 'runs.json'), 'w') as runs_json:
+        json.dump(results, runs_json)
+    failed = [result for result in results.values()
+              if result["error"] is not None or result["timed_out"] or result["returncode"] != 0]
+    print('Ran {0} tests, {1} failed or timed out, traces in {2}'.format(len(results), len(failed), args.output))
+    return 1 if failed else 0
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    arg_parser = argparse.ArgumentParser(prog='coda', description='CodA: Source code analysis and synthesis toolkit')
+    subparsers = arg_parser.add_subparsers(dest='command', required=True)
+
+    cfg_parser = subparsers.add_parser('cfg', help='Extract the CFGs of the functions of a C++ source')
+    cfg_parser.add_argument('source', help='C++ source file')
+    cfg_parser.add_argument('-o', '--output', help='Output directory, extracted_cfgs/<name> by default')
+    cfg_parser.add_argument('--parse-mode', choices=PARSE_MODES, default='ll', help='Prediction mode of the parser')
+    cfg_parser.add_argument('--dfa-cache', help='File to preload the parser DFAs from and save them to')
+    cfg_parser.add_argument('--chunked', action='store_true', help='Parse one top-level function at a time')
+    cfg_parser.add_argument('--front-end', choices=FRONT_ENDS, default='antlr',
+                            help='The C++ front-end, tree-sitter requires the tree-sitter and tree-sitter-cpp packages')
+    cfg_parser.add_argument('--format', choices=CFG_FORMATS, default='text',
+                            help='The format of the saved CFGs: a text file per function, or one JSON or binary file')
+    cfg_parser.add_argument('--incremental', action='store_true',
+                            help='Re-analyze only the functions changed since the last run, and save their prime paths')
+    cfg_parser.add_argument('-j', '--jobs', type=int, default=1,
+                            help='Number of worker processes to parse the functions with, with --chunked or --incremental')
+    cfg_parser.set_defaults(handler=cfg_command)
+
+    primepaths_parser = subparsers.add_parser('primepaths', help='Compute the prime paths of saved CFGs')
+    primepaths_parser.add_argument('cfgs', nargs='+',
+                                   help='CFG text or binary files, or directories of them')
+    primepaths_parser.add_argument('-o', '--output', help='Output JSON file')
+    primepaths_parser.add_argument('-v', '--verbose', action='store_true', help='Print the prime paths')
+    primepaths_parser.add_argument('--format', choices=tuple(PRIME_PATH_FILES), default='json',
+                                   help='The format of the prime paths, written as they are found')
+    primepaths_parser.add_argument('--max-paths', type=int, default=None,
+                                   help='Stop the enumeration of a function after this many prime paths')
+    primepaths_parser.add_argument('--max-length', type=int, default=None,
+                                   help='Do not search the paths of more nodes than this')
+    primepaths_parser.add_argument('--time-budget', type=float, default=None,
+                                   help='Stop the enumeration of a function after this many seconds')
+    primepaths_parser.set_defaults(handler=primepaths_command)
+
+    instrument_parser = subparsers.add_parser('instrument', help='Insert branch probes into a C++ source')
+    instrument_parser.add_argument('source', help='C++ source file')
+    instrument_parser.add_argument('-o', '--output', help='Output file of the instrumented source')
+    instrument_parser.add_argument('--parse-mode', choices=PARSE_MODES, default='ll',
+                                   help='Prediction mode of the parser')
+    instrument_parser.set_defaults(handler=instrument_command)
+
+    batch_parser = subparsers.add_parser('batch', help='Analyze all sources of a project on a process pool')
+    batch_parser.add_argument('directory', help='Root directory of the C++ project')
+    batch_parser.add_argument('-o', '--output', default='batch_results.json', help='Output JSON file')
+    batch_parser.add_argument('-j', '--jobs', type=int, default=None, help='Number of worker processes')
+    batch_parser.add_argument('--patterns', nargs='+', default=['*.cpp', '*.cc', '*.cxx', '*.c'],
+                              help='Glob patterns of the source files')
+    batch_parser.add_argument('--parse-mode', choices=PARSE_MODES, default='ll', help='Prediction mode of the parser')
+    batch_parser.add_argument('--dfa-cache', default=None, help='Parser DFA cache to preload in the workers')
+    batch_parser.add_argument('--no-prime-paths', action='store_true', help='Extract the CFGs only')
+    batch_parser.add_argument('--chunked', action='store_true', help='Parse one top-level function at a time')
+    batch_parser.add_argument('--front-end', choices=FRONT_ENDS, default='antlr', help='The C++ front-end')
+    batch_parser.set_defaults(handler=batch_command)
+
+    warm_parser = subparsers.add_parser('warm-dfa', help='Warm up the parser DFAs on some sources and save them')
+    warm_parser.add_argument('files', nargs='+', help='Glob patterns of the sources to parse')
+    warm_parser.add_argument('-o', '--output', default='coda_dfa.pickle', help='The DFA cache file')
+    warm_parser.add_argument('--parse-mode', choices=PARSE_MODES, default='ll', help='Prediction mode of the parser')
+    warm_parser.set_defaults(handler=warm_dfa_command)
+
+    render_parser = subparsers.add_parser('render', help='Render saved Graphviz sources of CFGs in one batch')
+    render_parser.add_argument('sources', nargs='+', help='.gv or .dot files, or directories of them')
+    render_parser.add_argument('--format', default='png', help='Output format of Graphviz, e.g., png, svg or pdf')
+    render_parser.add_argument('--engine', default='dot', help='Graphviz layout engine')
+    render_parser.add_argument('-j', '--jobs', type=int, default=None,
+                               help='Number of sources rendered at the same time, the number of CPUs by default')
+    render_parser.set_defaults(handler=render_command)
+
+    run_tests_parser = subparsers.add_parser('run-tests', help='Run the tests of an instrumented program at the same time')
+    run_tests_parser.add_argument('executable', help='The compiled instrumented program')
+    run_tests_parser.add_argument('tests', nargs='+', help='Test input files, or directories of them')
+    run_tests_parser.add_argument('-o', '--output', default='traces',
+                                  help='Directory of the trace file of each test and of runs.json')
+    run_tests_parser.add_argument('-j', '--jobs', type=int, default=None,
+                                  help='Number of tests run at the same time, the number of CPUs by default')
+    run_tests_parser.add_argument('--timeout', type=float, default=None,
+                                  help='Kill a test run after this many seconds')
+    run_tests_parser.set_defaults(handler=run_tests_command)
+
+    return arg_parser
+
+
+def main(argv=None) -> int:
+    args = build_arg_parser().parse_args(argv)
+    return args.handler(args)
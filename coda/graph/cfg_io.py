@@ -0,0 +1,282 @@
+"""
+
+Readers and writers of the saved CFG formats
+
+The text format is the one written by the CFG listeners and read by `ControlFlowGraph`:
+one `source destination` line per edge, followed by an `initial nodes:` and a `final nodes:` line.
+
+The binary format keeps the CFGs of many functions in one file of little-endian int32 values:
+the `CFGB` magic and the format version, then one record per function. A record is the header
+`function id, number of sources, number of edges, number of initial nodes, number of final nodes`,
+followed by the source nodes, the CSR offsets of their successors (one more than the sources),
+the successors, the initial nodes and the final nodes. The successors of each source keep the
+order of the edge list.
+
+`BinaryCFGFile` memory-maps a binary file and indexes its records by reading only their headers;
+the arrays of a function are copied out of the map when its CFG is requested.
+
+The JSON format is the `cfgs.json` file of `coda.graph.cfg_sinks.JSONCFGSink`. `load_cfgs` reads a
+CFG file or directory in any of the formats.
+
+"""
+
+__version__ = '0.1.0'
+__author__ = 'Morteza Zakeri'
+
+import json
+import mmap
+import sys
+from array import array
+from pathlib import Path
+
+BINARY_MAGIC = b'CFGB'
+BINARY_VERSION = 1
+# The file names of the CFGs of all functions in a directory
+BINARY_CFG_FILE = 'cfgs.bin'
+JSON_CFG_FILE = 'cfgs.json'
+# The number of values in the header of a binary record
+RECORD_HEADER_SIZE = 5
+
+
+def write_text_cfg(cfg_file, edges, initial_nodes, final_nodes):
+    """
+    Write a CFG in the text format
+
+    Args:
+
+        cfg_file: A file opened for writing text
+
+        edges (list): The (source, destination) pairs of the CFG edges
+
+        initial_nodes (set): The initial nodes
+
+        final_nodes (set): The final nodes
+
+
+    """
+    cfg_file.write(format_text_cfg(edges, initial_nodes, final_nodes))
+
+
+def format_text_cfg(edges, initial_nodes, final_nodes) -> str:
+    """
+    The text format of a CFG, as one string
+
+    """
+    return (''.join('{0} {1}\n'.format(source, dest) for source, dest in edges)
+            + 'initial nodes:' + ' '.join(str(node) for node in initial_nodes) + '\n'
+            + 'final nodes:' + ' '.join(str(node) for node in final_nodes) + '\n')
+
+
+def read_text_cfg(cfg_file):
+    """
+    Read a CFG in the text format
+
+    Returns:
+
+        (edges, initial_nodes, final_nodes)
+
+    """
+    lines = cfg_file.readlines()
+    edges = []
+    for line in lines[:-2]:
+        source, dest = (int(x) for x in line.split(' '))
+        edges.append((source, dest))
+    initial_nodes = set(int(x) for x in lines[-2].split(':')[1].split(' '))
+    final_nodes = set(int(x) for x in lines[-1].split(':')[1].split(' '))
+    return edges, initial_nodes, final_nodes
+
+
+def write_binary_header(cfg_file):
+    """
+    Start a binary CFG file, opened for writing bytes
+
+    """
+    cfg_file.write(BINARY_MAGIC)
+    cfg_file.write(int32_array([BINARY_VERSION]).tobytes())
+
+
+def write_binary_cfg(cfg_file, function_id: int, edges, initial_nodes, final_nodes):
+    """
+    Append the record of a CFG to a binary CFG file, with a single write
+
+    """
+    successors = {}
+    for source, dest in edges:
+        successors.setdefault(source, []).append(dest)
+    offsets = [0]
+    targets = []
+    for dests in successors.values():
+        targets.extend(dests)
+        offsets.append(len(targets))
+    record = [function_id, len(successors), len(targets), len(initial_nodes), len(final_nodes)]
+    record.extend(successors)
+    record.extend(offsets)
+    record.extend(targets)
+    record.extend(initial_nodes)
+    record.extend(final_nodes)
+    cfg_file.write(int32_array(record).tobytes())
+
+
+def int32_array(values) -> array:
+    """
+    An int32 array, which is written and read as little-endian
+
+    """
+    a = array('i', values)
+    if sys.byteorder == 'big':
+        a.byteswap()
+    return a
+
+
+class BinaryCFGFile:
+    """
+    A memory-mapped binary CFG file
+
+    Usage:
+
+        with BinaryCFGFile('extracted_cfgs/gcd/cfgs.bin') as cfgs:
+            for function_id in cfgs:
+                sources, offsets, targets, initial_nodes, final_nodes = cfgs[function_id]
+
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._values = None
+        self._file = open(self.path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # An empty file cannot be mapped
+            self._file.close()
+            raise ValueError('{0} is not a binary CFG file'.format(self.path)) from None
+        if self._map[:len(BINARY_MAGIC)] != BINARY_MAGIC or len(self._map) % 4:
+            self.close()
+            raise ValueError('{0} is not a binary CFG file'.format(self.path))
+        if sys.byteorder == 'little':
+            self._values = memoryview(self._map)[len(BINARY_MAGIC):].cast('i')
+        else:
+            self._values = array('i', self._map[len(BINARY_MAGIC):])
+            self._values.byteswap()
+        if not len(self._values):
+            self.close()
+            raise ValueError('{0} is not a binary CFG file'.format(self.path))
+        if self._values[0] != BINARY_VERSION:
+            version = self._values[0]
+            self.close()
+            raise ValueError('Unsupported binary CFG version {0} in {1}'.format(version, self.path))
+        try:
+            self._records = self._read_records()
+        except ValueError as e:
+            self.close()
+            raise ValueError('{0} is not a binary CFG file: {1}'.format(self.path, e)) from None
+
+    def _read_records(self) -> dict:
+        """
+        The position of the CSR arrays of each function, after its record header
+
+        """
+        values = self._values
+        records = {}
+        i = 1
+        while i < len(values):
+            header = values[i:i + RECORD_HEADER_SIZE].tolist()
+            if len(header) < RECORD_HEADER_SIZE:
+                raise ValueError('truncated record header')
+            function_id, n_sources, n_edges, n_initial, n_final = header
+            if function_id in records:
+                raise ValueError('duplicate function id {0}'.format(function_id))
+            if min(n_sources, n_edges, n_initial, n_final) < 0:
+                raise ValueError('negative size in the record of function {0}'.format(function_id))
+            records[function_id] = i + RECORD_HEADER_SIZE
+            i += RECORD_HEADER_SIZE + 2 * n_sources + 1 + n_edges + n_initial + n_final
+        if i != len(values):
+            raise ValueError('truncated record of function {0}'.format(function_id))
+        return records
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, function_id) -> bool:
+        return function_id in self._records
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def __getitem__(self, function_id: int):
+        """
+        The CSR arrays of a function CFG, as lists
+
+        Returns:
+
+            (sources, offsets, targets, initial_nodes, final_nodes)
+
+        """
+        values = self._values
+        i = self._records[function_id]
+        n_sources, n_edges, n_initial, n_final = values[i - 4:i]
+        arrays = []
+        for n in (n_sources, n_sources + 1, n_edges, n_initial, n_final):
+            arrays.append(values[i:i + n].tolist())
+            i += n
+        return tuple(arrays)
+
+    def edges(self, function_id: int):
+        """
+        The (source, destination) pairs, initial nodes and final nodes of a function CFG
+
+        """
+        sources, offsets, targets, initial_nodes, final_nodes = self[function_id]
+        edges = [(source, targets[k]) for j, source in enumerate(sources) for k in range(offsets[j], offsets[j + 1])]
+        return edges, set(initial_nodes), set(final_nodes)
+
+    def close(self):
+        if isinstance(self._values, memoryview):
+            self._values.release()
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def is_binary_cfg_file(path) -> bool:
+    with open(path, 'rb') as cfg_file:
+        return cfg_file.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+
+
+def load_cfgs(path) -> dict:
+    """
+    Load the CFGs of a binary, JSON or text CFG file, or of a directory of CFG files
+
+    A directory is read from its `cfgs.bin` or `cfgs.json` file if it has one, otherwise from its
+    `<function id>.txt` files.
+
+    Returns:
+
+        A dictionary of the function ids, or the stems of the text files, to
+        `(edges, initial_nodes, final_nodes)`
+
+    """
+    path = Path(path)
+    if path.is_dir():
+        for name in (BINARY_CFG_FILE, JSON_CFG_FILE):
+            if (path / name).is_file():
+                return load_cfgs(path / name)
+        cfgs = {}
+        for text_path in sorted(path.glob('*.txt'), key=lambda p: (len(p.stem), p.stem)):
+            cfgs.update(load_cfgs(text_path))
+        return cfgs
+    if is_binary_cfg_file(path):
+        with BinaryCFGFile(path) as cfgs:
+            return {function_id: cfgs.edges(function_id) for function_id in cfgs}
+    if path.suffix == '.json':
+        with open(path) as cfgs_json:
+            return {int(function_id): ([tuple(edge) for edge in cfg["edges"]], set(cfg["initial_nodes"]),
+                                       set(cfg["final_nodes"]))
+                    for function_id, cfg in json.load(cfgs_json).items()}
+    with open(path) as cfg_file:
+        return {path.stem: read_text_cfg(cfg_file)}
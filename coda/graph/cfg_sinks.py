@@ -0,0 +1,134 @@
+"""
+
+Destinations of extracted function CFGs
+
+The CFG extractors hand each function CFG to a sink once, when the function is complete,
+instead of writing its edges one by one. A sink decides how the CFGs are stored:
+
+- `text`: one `<function id>.txt` file per function in the text format of `coda.graph.cfg_io`,
+as read by `ControlFlowGraph`
+- `json`: all CFGs in one `cfgs.json` file, written when the sink is closed
+- `binary`: all CFGs in one `cfgs.bin` file in the binary format of `coda.graph.cfg_io`
+- `memory`: the CFGs are kept in the `cfgs` dictionary of the sink
+
+Usage:
+
+    with get_cfg_sink('binary', 'extracted_cfgs/gcd') as sink:
+        sink.write_cfg(1, [(1, 2), (2, 3)], {1}, {3})
+
+"""
+
+__version__ = '0.1.0'
+__author__ = 'Morteza Zakeri'
+
+import json
+import os
+from pathlib import Path
+
+from coda.graph.cfg_io import (
+    BINARY_CFG_FILE,
+    JSON_CFG_FILE,
+    format_text_cfg,
+    write_binary_header,
+    write_binary_cfg
+)
+
+
+class CFGSink:
+    """
+    The interface of the destinations of function CFGs
+
+    """
+
+    def write_cfg(self, function_id: int, edges, initial_nodes, final_nodes):
+        """
+        Store the CFG of one function
+
+        Args:
+
+            function_id (int): The number of the function in its translation unit
+
+            edges (list): The (source, destination) pairs of the CFG edges
+
+            initial_nodes (set): The initial nodes
+
+            final_nodes (set): The final nodes
+
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class TextCFGSink(CFGSink):
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    def write_cfg(self, function_id: int, edges, initial_nodes, final_nodes):
+        with open(self.directory / '{0}.txt'.format(function_id), 'w') as cfg_file:
+            cfg_file.write(format_text_cfg(edges, initial_nodes, final_nodes))
+
+
+class JSONCFGSink(CFGSink):
+    def __init__(self, directory):
+        self.path = Path(directory) / JSON_CFG_FILE
+        self.cfgs = {}
+
+    def write_cfg(self, function_id: int, edges, initial_nodes, final_nodes):
+        self.cfgs[function_id] = {
+            "edges": [[source, dest] for source, dest in edges],
+            "initial_nodes": sorted(initial_nodes),
+            "final_nodes": sorted(final_nodes)
+        }
+
+    def close(self):
+        with open(self.path, 'w') as cfgs_json:
+            json.dump(self.cfgs, cfgs_json)
+
+
+class BinaryCFGSink(CFGSink):
+    def __init__(self, directory):
+        self.path = Path(directory) / BINARY_CFG_FILE
+        self.cfg_file = open(self.path, 'wb')
+        write_binary_header(self.cfg_file)
+
+    def write_cfg(self, function_id: int, edges, initial_nodes, final_nodes):
+        write_binary_cfg(self.cfg_file, function_id, edges, sorted(initial_nodes), sorted(final_nodes))
+
+    def close(self):
+        self.cfg_file.close()
+
+
+class MemoryCFGSink(CFGSink):
+    def __init__(self, directory=None):
+        self.cfgs = {}
+
+    def write_cfg(self, function_id: int, edges, initial_nodes, final_nodes):
+        self.cfgs[function_id] = (list(edges), set(initial_nodes), set(final_nodes))
+
+
+CFG_SINKS = {
+    'text': TextCFGSink,
+    'json': JSONCFGSink,
+    'binary': BinaryCFGSink,
+    'memory': MemoryCFGSink,
+}
+
+
+def get_cfg_sink(name: str, directory=None) -> CFGSink:
+    """
+    Create a sink by its name, one of `CFG_SINKS`, writing to an existing `directory`
+
+    """
+    if name not in CFG_SINKS:
+        raise ValueError('Unknown CFG sink {0!r}, expected one of {1}'.format(name, tuple(CFG_SINKS)))
+    if name != 'memory' and not os.path.isdir(directory):
+        raise NotADirectoryError(directory)
+    return CFG_SINKS[name](directory)
@@ -0,0 +1,292 @@
+"""
+
+Compact, mutable control flow graph
+
+`CompactCFG` is the graph type the CFG builders of `coda.graph.utils` and
+`coda.analysis.cfg.lang_structures` work on. The builders change the graphs of the nested
+structures in place, e.g., shift their labels and merge them into the enclosing structure,
+instead of copying `networkx` graphs at every step.
+
+Each node is a `CFGNode` with `__slots__`: the list of rules in its basic block (`data`),
+its successors as a list of integer labels, the states of the edges to them in a parallel
+list, and its in-degree. The nodes and the successors keep the insertion order of `networkx`,
+so a graph exported by `to_networkx` lists its nodes and edges exactly as the builders did
+when they were written on `networkx.DiGraph`.
+
+The graph also indexes the blocks that hold a jump statement not yet directed to its target,
+by the kind of jump (`jumps`). The index follows the labels through relabeling, merging and
+subgraphs, so a structure resolves its jumps without scanning the blocks of the whole graph.
+
+"""
+
+__version__ = '0.1.0'
+__author__ = 'Morteza Zakeri'
+
+
+class CFGNode:
+    """
+    A basic block and its outgoing edges
+
+    `data` is None until the block is set, as for a node that was only added by an edge.
+
+    """
+    __slots__ = ('data', 'successors', 'states', 'in_degree')
+
+    def __init__(self, data=None):
+        self.data = data
+        self.successors = []
+        self.states = []
+        self.in_degree = 0
+
+
+class CompactCFG:
+    """
+    A directed graph of basic blocks labeled by integers, with an optional state on each edge
+
+    """
+    __slots__ = ('_nodes', 'jumps')
+
+    def __init__(self):
+        self._nodes = {}
+        # Labels of the blocks with unresolved jump statements, by jump kind
+        self.jumps = {}
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def __contains__(self, label) -> bool:
+        return label in self._nodes
+
+    def __iter__(self):
+        return iter(self._nodes)
+
+    def labels(self) -> list:
+        return list(self._nodes)
+
+    def node(self, label: int) -> CFGNode:
+        return self._nodes[label]
+
+    def data(self, label: int) -> list:
+        return self._nodes[label].data
+
+    def set_data(self, label: int, data: list):
+        self._nodes[label].data = data
+
+    def nodes_data(self) -> list:
+        """
+        The (label, data) pairs of the nodes, in order
+
+        """
+        return [(label, node.data) for label, node in self._nodes.items()]
+
+    def edges(self) -> list:
+        """
+        The (source, destination, state) triples of the edges, in order
+
+        """
+        return [(label, t, state) for label, node in self._nodes.items()
+                for t, state in zip(node.successors, node.states)]
+
+    def successors(self, label: int) -> list:
+        return self._nodes[label].successors
+
+    def in_degree(self, label: int) -> int:
+        return self._nodes[label].in_degree
+
+    def has_edge(self, source: int, dest: int) -> bool:
+        return source in self._nodes and dest in self._nodes[source].successors
+
+    def edge_state(self, source: int, dest: int):
+        node = self._nodes.get(source)
+        if node is None or dest not in node.successors:
+            raise KeyError('The edge {0} is not in the graph.'.format((source, dest)))
+        return node.states[node.successors.index(dest)]
+
+    def head(self) -> int:
+        return min(self._nodes)
+
+    def last(self) -> int:
+        return max(self._nodes)
+
+    def add_node(self, label: int, data: list = None):
+        """
+        Add a node, or set the data of an existing node if `data` is given
+
+        """
+        node = self._nodes.get(label)
+        if node is None:
+            self._nodes[label] = CFGNode(data)
+        elif data is not None:
+            node.data = data
+
+    def add_edge(self, source: int, dest: int, state=None):
+        """
+        Add an edge, and its nodes if they are missing; the state of an existing edge is replaced only by a state
+
+        """
+        nodes = self._nodes
+        if source not in nodes:
+            nodes[source] = CFGNode()
+        if dest not in nodes:
+            nodes[dest] = CFGNode()
+        node = nodes[source]
+        successors = node.successors
+        if dest in successors:
+            if state is not None:
+                node.states[successors.index(dest)] = state
+            return
+        successors.append(dest)
+        node.states.append(state)
+        nodes[dest].in_degree += 1
+
+    def add_edges_from(self, edges):
+        """
+        Add (source, destination) or (source, destination, state) edges
+
+        """
+        for edge in edges:
+            self.add_edge(*edge)
+
+    def add_jump(self, label: int, kind: str):
+        self.jumps.setdefault(kind, []).append(label)
+
+    def take_jumps(self, kind: str) -> list:
+        """
+        Remove and return the labels of the blocks with unresolved jumps of a kind
+
+        """
+        return self.jumps.pop(kind, [])
+
+    def remove_edge(self, source: int, dest: int):
+        node = self._nodes.get(source)
+        if node is None or dest not in node.successors:
+            raise KeyError('The edge {0} is not in the graph.'.format((source, dest)))
+        i = node.successors.index(dest)
+        del node.successors[i]
+        del node.states[i]
+        self._nodes[dest].in_degree -= 1
+
+    def remove_successors(self, label: int):
+        """
+        Remove all the outgoing edges of a node
+
+        """
+        node = self._nodes[label]
+        for t in node.successors:
+            self._nodes[t].in_degree -= 1
+        node.successors = []
+        node.states = []
+
+    def remove_node(self, label: int):
+        node = self._nodes.pop(label)
+        for t in node.successors:
+            if t != label:
+                self._nodes[t].in_degree -= 1
+        if node.in_degree:
+            for other in self._nodes.values():
+                if label in other.successors:
+                    i = other.successors.index(label)
+                    del other.successors[i]
+                    del other.states[i]
+
+    def copy(self) -> 'CompactCFG':
+        """
+        A copy of the graph structure; the data lists are shared, as they are replaced rather than changed
+
+        """
+        g = CompactCFG()
+        for label, node in self._nodes.items():
+            copied = CFGNode(node.data)
+            copied.successors = list(node.successors)
+            copied.states = list(node.states)
+            copied.in_degree = node.in_degree
+            g._nodes[label] = copied
+        g.jumps = {kind: list(labels) for kind, labels in self.jumps.items()}
+        return g
+
+    def relabel(self, mapping) -> 'CompactCFG':
+        """
+        Relabel the nodes in place, with a function or a dictionary of the old to the new labels
+
+        """
+        if not callable(mapping):
+            mapping = mapping.__getitem__
+        for node in self._nodes.values():
+            node.successors = [mapping(t) for t in node.successors]
+        # The index may keep the labels of removed blocks, which are dropped
+        self.jumps = {kind: [mapping(label) for label in labels if label in self._nodes]
+                      for kind, labels in self.jumps.items()}
+        self._nodes = {mapping(label): node for label, node in self._nodes.items()}
+        return self
+
+    def shift(self, n: int) -> 'CompactCFG':
+        """
+        Add `n` to all labels, in place
+
+        """
+        if n:
+            self.relabel(lambda label: label + n)
+        return self
+
+    def merge(self, other: 'CompactCFG') -> 'CompactCFG':
+        """
+        Add the nodes and edges of `other` to this graph, in place, as `networkx.compose(self, other)`
+
+        The data and edge states of `other` take precedence. `other` must not be used afterwards.
+
+        """
+        for label, node in other._nodes.items():
+            self.add_node(label, node.data)
+        for label, node in other._nodes.items():
+            for t, state in zip(node.successors, node.states):
+                self.add_edge(label, t, state)
+        for kind, labels in other.jumps.items():
+            self.jumps.setdefault(kind, []).extend(labels)
+        return self
+
+    def subgraph(self, labels) -> 'CompactCFG':
+        """
+        A new graph of some nodes and the edges between them
+
+        The nodes are in the order of `networkx.DiGraph.subgraph`: the order of this graph, or the
+        iteration order of the set of labels if they are fewer than half of the nodes.
+
+        """
+        labels = set(label for label in labels if label in self._nodes)
+        order = labels if 2 * len(labels) < len(self._nodes) else self._nodes
+        g = CompactCFG()
+        for label in order:
+            if label in labels:
+                g._nodes[label] = CFGNode(self._nodes[label].data)
+        for label in g._nodes:
+            node = self._nodes[label]
+            for t, state in zip(node.successors, node.states):
+                if t in labels:
+                    g.add_edge(label, t, state)
+        for kind, jump_labels in self.jumps.items():
+            jump_labels = [label for label in jump_labels if label in labels]
+            if jump_labels:
+                g.jumps[kind] = jump_labels
+        return g
+
+    def to_networkx(self):
+        """
+        Export the graph as a `networkx.DiGraph`, with the `data` of the nodes and the `state` of the edges
+
+        """
+        import networkx as nx
+
+        g = nx.DiGraph()
+        g.add_nodes_from((label, {"data": node.data} if node.data is not None else {})
+                         for label, node in self._nodes.items())
+        g.add_edges_from((f, t, {"state": state} if state is not None else {}) for f, t, state in self.edges())
+        return g
+
+    @classmethod
+    def from_networkx(cls, gin) -> 'CompactCFG':
+        g = cls()
+        for label, data in gin.nodes(data="data"):
+            g.add_node(label, data)
+        for f, t, state in gin.edges(data="state"):
+            g.add_edge(f, t, state)
+        return g
@@ -0,0 +1,91 @@
+"""
+
+Batch rendering of saved Graphviz sources
+
+The CFG extractors and `coda.graph.visual.draw_CFG` only save the Graphviz source of each
+function CFG (`.gv` or `.dot`), which is plain text and costs no `dot` process. The sources are
+rendered afterwards in one stage, by a pool of workers that each run the layout engine on one
+source at a time.
+
+Usage:
+
+    rendered, failed = render_sources(Path('extracted_cfgs/gcd').glob('*.gv'), format='svg', jobs=4)
+
+or from the command line:
+
+    coda render extracted_cfgs/gcd --format svg -j 4
+
+"""
+
+__version__ = '0.1.0'
+__author__ = 'Morteza Zakeri'
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+GRAPHVIZ_SOURCE_SUFFIXES = ('.gv', '.dot')
+
+
+def render_source(source_path, format: str = 'png', engine: str = 'dot') -> str:
+    """
+    Render one Graphviz source file next to it
+
+    Returns:
+
+        The path of the rendered file
+
+    """
+    import graphviz
+
+    return graphviz.render(engine, format, source_path, quiet=True)
+
+
+def find_sources(paths) -> list:
+    """
+    The Graphviz source files among some files and directories, in order
+
+    """
+    sources = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            sources.extend(sorted(p for p in path.iterdir() if p.suffix in GRAPHVIZ_SOURCE_SUFFIXES))
+        else:
+            sources.append(path)
+    return sources
+
+
+def render_sources(source_paths, format: str = 'png', engine: str = 'dot', jobs: int = None):
+    """
+    Render Graphviz source files with a pool of workers
+
+    The workers are threads, as each of them only waits for its layout engine process.
+
+    Args:
+
+        source_paths: The Graphviz source files
+
+        format (str): The output format of Graphviz, e.g., png, svg or pdf
+
+        engine (str): The layout engine
+
+        jobs (int): The number of sources rendered at the same time, the number of CPUs by default
+
+    Returns:
+
+        (rendered, failed): The paths of the rendered files, and (source path, error) pairs
+
+    """
+    source_paths = [str(path) for path in source_paths]
+    rendered = []
+    failed = []
+    if not source_paths:
+        return rendered, failed
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as executor:
+        futures = [executor.submit(render_source, path, format, engine) for path in source_paths]
+        for path, future in zip(source_paths, futures):
+            try:
+                rendered.append(future.result())
+            except Exception as e:
+                failed.append((path, e))
+    return rendered, failed
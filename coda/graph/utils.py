@@ -1,119 +1,195 @@
 from functools import reduce
 
-import networkx as nx
+from coda.antlr_gen.rule_utils import jump_kind, RuleSpan, rule_token_range
+from coda.graph.compact_cfg import CompactCFG
 
-from coda.antlr_gen.rule_utils import is_break, is_return, is_continue, is_throw
 
+def split_on_continue(gin: CompactCFG, continue_return) -> CompactCFG:
+    return resolve_jumps(gin, {'continue': continue_return})
 
-def split_on_continue(gin: nx.DiGraph, continue_return) -> nx.DiGraph:
-    return direct_node_to_if(gin, continue_return, is_continue)
 
+def split_on_break(gin: CompactCFG) -> CompactCFG:
+    return resolve_jumps(gin, {'break': last_node(gin)})
 
-def split_on_break(gin: nx.DiGraph) -> nx.DiGraph:
-    return direct_node_to_if(gin, last_node(gin), is_break)
 
+def split_on_throw(gin: CompactCFG, throw_return) -> CompactCFG:
+    return resolve_jumps(gin, {'throw': throw_return})
 
-def split_on_throw(gin: nx.DiGraph, throw_return) -> nx.DiGraph:
-    return direct_node_to_if(gin, throw_return, is_throw)
 
+def split_on_return(gin: CompactCFG) -> CompactCFG:
+    return resolve_jumps(gin, {'return': last_node(gin)})
 
-def direct_node_to_if(gin: nx.DiGraph, direction_reference, predicate) -> nx.DiGraph:
-    g = gin.copy()
-    for label, data in gin.nodes(data="data"):
-        for ctx in data:
-            if predicate(ctx):
-                g.remove_edges_from([(label, adj) for adj in gin.adj[label]])
-                g.add_edge(label, direction_reference)
-                g.nodes[label]["data"] = data[:data.index(ctx)]
-                break
-    return g
 
+def split_on_loop_jumps(gin: CompactCFG, continue_return) -> CompactCFG:
+    return resolve_jumps(gin, {'continue': continue_return, 'break': last_node(gin)})
+
+
+def resolve_jumps(gin: CompactCFG, targets: dict) -> CompactCFG:
+    """
+    Direct the blocks with recorded jump statements of the given kinds to their targets, in one pass
+
+    Only the blocks in the jump index of the graph are visited. A block is cut at its first jump
+    of the given kinds, which is directed to the target of its kind; a return keeps its expression.
+
+    Args:
 
-def split_on_return(gin: nx.DiGraph) -> nx.DiGraph:
-    g = gin.copy()
-    for label, data in gin.nodes(data="data"):
-        for ctx in data:
-            if is_return(ctx):
-                g.remove_edges_from([(label, adj) for adj in gin.adj[label]])
-                g.add_edge(label, last_node(gin))
-                d = data[:data.index(ctx)]
-                if ctx.expression():
+        targets (dict): The target label of each jump kind, see `rule_utils.JUMP_KINDS`
+
+    """
+    labels = dict.fromkeys(label for kind in targets for label in gin.take_jumps(kind))
+    for label in labels:
+        if label not in gin:
+            continue
+        data = gin.data(label)
+        for i, ctx in enumerate(data):
+            kind = jump_kind(ctx)
+            if kind in targets:
+                gin.remove_successors(label)
+                gin.add_edge(label, targets[kind])
+                d = data[:i]
+                if kind == 'return' and ctx.expression():
                     d += [ctx.expression()]
-                g.nodes[label]["data"] = d
+                gin.set_data(label, d)
                 break
-    return g
+    return gin
+
 
+def record_jump(gin: CompactCFG, label: int, rule):
+    kind = jump_kind(rule)
+    if kind is not None:
+        gin.add_jump(label, kind)
 
-def solve_null_nodes(gin: nx.DiGraph) -> nx.DiGraph:
+
+def solve_null_nodes(gin: CompactCFG) -> CompactCFG:
     g = remove_null_nodes(gin)
     g = reorder_node_labels(g)
     return g
 
 
-def remove_null_nodes(gin: nx.DiGraph) -> nx.DiGraph:
-    g = gin.copy()
-    for label, ns in gin.adj.items():
-        for n in ns:
-            if is_node_null(gin, n) and n != last_node(gin):
-                g = shrink_path(g, label, n)
-    return g
+def remove_null_nodes(gin: CompactCFG) -> CompactCFG:
+    """
+    Contract the empty blocks, except the last one, in one pass over the nodes, in place
 
+    The edges of each node to empty blocks are redirected to the current successors of the
+    empty blocks, so a chain of empty blocks collapses when its inner blocks come first. The
+    empty blocks left without a predecessor are removed, and skipped when their turn comes.
 
-def shrink_path(gin: nx.DiGraph, from_node: int, to_node: int) -> nx.DiGraph:
-    g = gin.copy()
-    edge_attrs = g.edges[(from_node, to_node)]
-    g.add_edges_from([(from_node, grand_child, edge_attrs) for grand_child in g.adj[to_node]])
-    g.remove_edge(from_node, to_node)
-    if is_node_unreachable(g, to_node):
-        g.remove_node(to_node)
-    return g
+    """
+    null_nodes = {label for label, data in gin.nodes_data() if data == []}
+    null_nodes.discard(last_node(gin))
+    for label in gin.labels():
+        if label not in gin:
+            continue
+        for n in list(gin.successors(label)):
+            if n in null_nodes:
+                shrink_path(gin, label, n)
+    return gin
 
 
-def reorder_node_labels(gin: nx.DiGraph) -> nx.DiGraph:
-    return nx.relabel_nodes(gin, {old: new for new, old in enumerate(sorted(gin.nodes))})
+def shrink_path(gin: CompactCFG, from_node: int, to_node: int) -> CompactCFG:
+    state = gin.edge_state(from_node, to_node)
+    gin.add_edges_from([(from_node, grand_child, state) for grand_child in gin.successors(to_node)])
+    gin.remove_edge(from_node, to_node)
+    if is_node_unreachable(gin, to_node):
+        gin.remove_node(to_node)
+    return gin
 
 
-def shift_node_labels(gin: nx.DiGraph, n: int) -> nx.DiGraph:
-    return nx.relabel_nodes(gin, {i: i + n for i in gin.nodes})
+def reorder_node_labels(gin: CompactCFG) -> CompactCFG:
+    return gin.relabel({old: new for new, old in enumerate(sorted(gin))})
 
 
-def is_node_unreachable(gin: nx.DiGraph, n: int) -> bool: return gin.in_degree[n] == 0
+def shift_node_labels(gin: CompactCFG, n: int) -> CompactCFG:
+    return gin.shift(n)
 
 
-def is_node_null(gin: nx.DiGraph, n: int) -> bool: return gin.nodes[n]["data"] == []
+def is_node_unreachable(gin: CompactCFG, n: int) -> bool: return gin.in_degree(n) == 0
 
 
-def compose(*graphs) -> nx.DiGraph: return reduce(lambda acc, x: nx.compose(acc, x), graphs)
+def is_node_null(gin: CompactCFG, n: int) -> bool: return gin.data(n) == []
 
 
-def head_node(gin: nx.DiGraph) -> int: return min(gin.nodes)
+def compose(*graphs) -> CompactCFG: return reduce(lambda acc, x: acc.merge(x), graphs)
 
 
-def last_node(gin: nx.DiGraph) -> int: return max(gin.nodes)
+def head_node(gin: CompactCFG) -> int: return gin.head()
+
+
+def last_node(gin: CompactCFG) -> int: return gin.last()
 
 
 def build_single_node_graph(data=None):
-    g = nx.DiGraph()
-    g.add_node(0, data=[data] if data else [])
+    g = CompactCFG()
+    g.add_node(0, [data] if data else [])
+    record_jump(g, 0, data)
     return g
 
 
-def concat_graphs(gin1: nx.DiGraph, gin2: nx.DiGraph):
+def concat_graphs(gin1: CompactCFG, gin2: CompactCFG):
     gin2 = shift_node_labels(gin2, len(gin1) - 1)
 
     gin1_last = last_node(gin1)
     gin2_head = head_node(gin2)
-    data = gin1.nodes[gin1_last]["data"] + gin2.nodes[gin2_head]["data"]
+    data = gin1.data(gin1_last) + gin2.data(gin2_head)
 
     g = compose(gin1, gin2)
-    g.nodes[gin1_last]["data"] = data
+    g.set_data(gin1_last, data)
+    return g
+
+
+def concat_graph_sequence(graphs) -> CompactCFG:
+    """
+    Concatenate graphs in order, as `reduce(concat_graphs, graphs)` does, in linear time
+
+    The last node of the result is tracked instead of searched, and the data of the last block
+    is extended in place once it is a list of this function.
+
+    """
+    graphs = iter(graphs)
+    g = next(graphs)
+    g_last = last_node(g)
+    block = None
+    for gin in graphs:
+        gin.shift(len(g) - 1)
+        if g.data(g_last) is not block:
+            block = list(g.data(g_last))
+        block += gin.data(head_node(gin))
+        gin_last = last_node(gin)
+        g.merge(gin)
+        g.set_data(g_last, block)
+        g_last = max(g_last, gin_last)
     return g
 
 
 def build_isolated_node_graph(to_isolate, body):
-    g = nx.DiGraph()
-    g.add_nodes_from([(0, {"data": []}),
-                      (1, {"data": [to_isolate]}),
-                      (2, {"data": [body]})])
+    g = CompactCFG()
+    g.add_node(0, [])
+    g.add_node(1, [to_isolate])
+    g.add_node(2, [body])
     g.add_edges_from([(0, 1), (1, 2)])
+    record_jump(g, 2, body)
+    return g
+
+
+def graph_to_token_ranges(gin: CompactCFG) -> dict:
+    """
+    Detach a CFG from its parse tree by replacing the rules in the blocks with their token index ranges
+
+    """
+    return {
+        "nodes": [(label, [rule_token_range(rule) if rule is not None else None for rule in data])
+                  for label, data in gin.nodes_data()],
+        "edges": gin.edges()
+    }
+
+
+def graph_from_token_ranges(ranges: dict, tokens) -> CompactCFG:
+    """
+    Rebuild a CFG saved by `graph_to_token_ranges` on top of a token buffer
+
+    """
+    g = CompactCFG()
+    for label, data in ranges["nodes"]:
+        g.add_node(label, [RuleSpan(tokens[r[0]], tokens[r[1]]) if r is not None else None for r in data])
+    g.add_edges_from(ranges["edges"])
     return g
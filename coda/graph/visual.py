@@ -23,21 +23,34 @@ def build_node_template(node_label, node_contents):
     >"""
 
 
-def draw_CFG(graph, filename, token_stream, format="png"):
+def draw_CFG(graph, filename, token_stream, format="png", render=False, view=False):
+    """
+    Save the Graphviz source of a CFG to `<filename>.gv`, and render it only if `render` is set
+
+    Many sources are rendered faster at once by `coda.graph.render.render_sources`.
+
+    Returns:
+
+        The path of the saved source
+
+    """
     gr = gv.Digraph(comment=filename, format=format, node_attr={"shape": "none"})
     gr.node("start", style="filled", fillcolor="#aaffaa", shape="oval")
 
-    for node, args in list(graph.nodes.data())[:-1]:
-        block_contents = stringify_block(token_stream, args)
+    for node, data in graph.nodes_data()[:-1]:
+        block_contents = stringify_block(token_stream, data)
         gr.node(str(node), label=build_node_template(node, block_contents))
     gr.node(str(last_node(graph)), label="end", style="filled", fillcolor="#ffaaaa", shape="oval")
 
-    for f, t, args in graph.edges.data():
-        gr.edge(str(f), str(t), label=args.get("state"))
+    for f, t, state in graph.edges():
+        gr.edge(str(f), str(t), label=state)
     gr.edge("start", str(head_node(graph)))
 
-    gr.render(f"{filename}.gv", view=True)
+    source_path = gr.save(f"{filename}.gv")
+    if render or view:
+        gr.render(source_path, view=view)
+    return source_path
 
 
-def stringify_block(token_stream, node_args):
-    return [(rule.start.line, extract_exact_text(token_stream, rule)) for rule in node_args["data"]]
+def stringify_block(token_stream, data):
+    return [(rule.start.line, extract_exact_text(token_stream, rule)) for rule in data]
@@ -1,11 +1,26 @@
 """
 The interface for package synthesis
-Version 1.1
+Version 1.2
 """
 
 
 # Modules provided by the synthesis package, export as following
 # Each *.py in python called a single module
 # A package consist of some related module
-import coda.synthesis.instrumentation
-from coda.synthesis.instrumentation import *
\ No newline at end of file
+# The modules are imported on first attribute access, since the instrumentation module
+# imports the generated C++ parser, which is slow to load.
+__all__ = ['instrumentation', 'InstrumentationListener']
+
+
+def __getattr__(name):
+    import coda.synthesis.instrumentation
+    if name == 'instrumentation':
+        return coda.synthesis.instrumentation
+    try:
+        return getattr(coda.synthesis.instrumentation, name)
+    except AttributeError:
+        raise AttributeError('module {0!r} has no attribute {1!r}'.format(__name__, name)) from None
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
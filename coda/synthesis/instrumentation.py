@@ -11,19 +11,24 @@ from antlr4 import TokenStreamRewriter
 from coda.antlr_gen.cpp_parser.CPP14_v2Lexer import *
 from coda.antlr_gen.cpp_parser.CPP14_v2Parser import *
 from coda.antlr_gen.cpp_parser.CPP14_v2Listener import *
+from coda.synthesis.probe_runtime import PROBE_RUNTIME, probe_call
 
 
 class InstrumentationListener(CPP14_v2Listener):
-    def __init__(self, common_token_stream: CommonTokenStream):
+    def __init__(self, common_token_stream: CommonTokenStream,
+                 token_stream_rewriter: TokenStreamRewriter.TokenStreamRewriter = None):
         """
 
         :param common_token_stream:
+        :param token_stream_rewriter: An existing rewriter over `common_token_stream` to reuse, if any
 
         """
         self.branch_number = 0
         self.has_return_statement = False
         # Move all the tokens in the source code in a buffer, token_stream_rewriter.
-        if common_token_stream is not None:
+        if token_stream_rewriter is not None:
+            self.token_stream_rewriter = token_stream_rewriter
+        elif common_token_stream is not None:
             self.token_stream_rewriter = TokenStreamRewriter.TokenStreamRewriter(common_token_stream)
         else:
             raise TypeError('common_token_stream is None')
@@ -36,8 +41,7 @@ class InstrumentationListener(CPP14_v2Listener):
         :return:
 
         """
-        new_code = '#include <fstream>\nstd::ofstream logFile("log_file.txt");\n\n'
-        self.token_stream_rewriter.insertBeforeIndex(ctx.start.tokenIndex, new_code)
+        self.token_stream_rewriter.insertBeforeIndex(ctx.start.tokenIndex, PROBE_RUNTIME)
 
     def enterStatement(self, ctx: CPP14_v2Parser.StatementContext):
         """
@@ -54,14 +58,14 @@ class InstrumentationListener(CPP14_v2Listener):
             # if there is a compound statement after the branchning condition:
             if isinstance(ctx.children[0], CPP14_v2Parser.CompoundstatementContext):
                 self.branch_number += 1
-                new_code = '\nlogFile << "p' + str(self.branch_number) + '" << std::endl;\n'
+                new_code = '\n' + probe_call(0, self.branch_number) + ';\n'
                 self.token_stream_rewriter.insertAfter(ctx.start.tokenIndex, new_code)
             # if there is only one statement after the branchning condition then create a block.
             elif not isinstance(ctx.children[0],
                                 (CPP14_v2Parser.SelectionstatementContext, CPP14_v2Parser.IterationstatementContext)):
                 self.branch_number += 1
                 new_code = '{'
-                new_code += '\nlogFile << "p' + str(self.branch_number) + '" << std::endl;\n'
+                new_code += '\n' + probe_call(0, self.branch_number) + ';\n'
                 new_code += ctx.getText()
                 new_code += '\n}'
                 self.token_stream_rewriter.replaceRange(ctx.start.tokenIndex, ctx.stop.tokenIndex, new_code)
@@ -73,7 +77,7 @@ class InstrumentationListener(CPP14_v2Listener):
         :return:
         """
         self.branch_number += 1
-        new_code = '\nlogFile << "p' + str(self.branch_number) + '" << std::endl;'
+        new_code = '\n' + probe_call(0, self.branch_number) + ';'
         self.token_stream_rewriter.insertAfter(ctx.start.tokenIndex, new_code)
 
     def exitFunctionbody(self, ctx: CPP14_v2Parser.FunctionbodyContext):
@@ -86,7 +90,7 @@ class InstrumentationListener(CPP14_v2Listener):
         """
         if not self.has_return_statement:
             self.branch_number += 1
-            new_code = '\n logFile << "p' + str(self.branch_number) + '" << std::endl;\n'
+            new_code = '\n ' + probe_call(0, self.branch_number) + ';\n'
             self.token_stream_rewriter.insertBeforeIndex(ctx.stop.tokenIndex, new_code)
 
     def enterJumpstatement(self, ctx: CPP14_v2Parser.JumpstatementContext):
@@ -99,6 +103,6 @@ class InstrumentationListener(CPP14_v2Listener):
         """
         if ctx.getChild(0).getText() == 'return':
             self.branch_number += 1
-            new_code = '\n logFile << "p' + str(self.branch_number) + '" << std::endl;\n'
+            new_code = '\n ' + probe_call(0, self.branch_number) + ';\n'
             self.token_stream_rewriter.insertBeforeIndex(ctx.start.tokenIndex, new_code)
             self.has_return_statement = True
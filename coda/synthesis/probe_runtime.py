@@ -0,0 +1,238 @@
+"""
+
+The C++ runtime of the probes inserted by the instrumentation, and the reader of their traces
+
+`PROBE_RUNTIME` is inserted at the start of an instrumented translation unit. Each probe is a
+`coda_probe(function, block)` call, see `probe_call`, which appends the pair of int32 values to a
+static buffer and is true, so it also fits in a condition, as `coda_probe(1, 3) && (x > 0)`.
+The buffer is written to the trace file when it is full and when the program exits, so a probe
+costs no formatting and no flush. A program that aborts, crashes on SIGSEGV or SIGFPE, is sent
+SIGTERM or ends on an uncaught exception writes its buffer too, from signal handlers and a
+`std::set_terminate` hook, before it dies as it would have; only a run killed by SIGKILL misses
+its last buffer. The trace file is opened when the program starts, so the handlers only `write`.
+
+The trace file is named by the `CODA_TRACE_FILE` environment variable of the run, and is
+`log_file.txt` in the working directory if the variable is not set, so several runs of a program
+can each write their own trace at the same time. It holds:
+
+- the `CTRC` magic and the format version, an int32
+- the (function id, block id) int32 pairs of the executed probes, in order
+
+in the byte order of the machine that ran the program. The branch probes of
+`InstrumentationListener` have the function id 0 and the branch number as the block id.
+
+`BinaryTraceFile` memory-maps a trace and groups its pairs by function without a loop over them.
+
+Usage:
+
+    rewriter.insertBeforeIndex(ctx.start.tokenIndex, PROBE_RUNTIME)
+    ...
+    with BinaryTraceFile('traces/test1.log') as trace:
+        executed_paths = trace.executed_paths()
+
+"""
+
+__version__ = '0.1.0'
+__author__ = 'Morteza Zakeri'
+
+import mmap
+import os
+
+import numpy as np
+
+TRACE_FILE_VARIABLE = 'CODA_TRACE_FILE'
+DEFAULT_TRACE_FILE = 'log_file.txt'
+BINARY_TRACE_MAGIC = b'CTRC'
+BINARY_TRACE_VERSION = 1
+BINARY_TRACE_HEADER_SIZE = 8
+# The number of pairs the runtime keeps before it writes them
+PROBE_BUFFER_PAIRS = 1 << 16
+
+PROBE_RUNTIME = '''#include <atomic>
+#include <csignal>
+#include <cstdlib>
+#include <exception>
+#include <fcntl.h>
+#include <stdint.h>
+#ifdef _WIN32
+#include <io.h>
+#define CODA_TRACE_OPEN(path) _open(path, _O_WRONLY | _O_CREAT | _O_TRUNC | _O_BINARY, 0666)
+#define CODA_TRACE_WRITE _write
+#else
+#include <signal.h>
+#include <unistd.h>
+#define CODA_TRACE_OPEN(path) open(path, O_WRONLY | O_CREAT | O_TRUNC, 0666)
+#define CODA_TRACE_WRITE write
+#endif
+namespace coda_trace {{
+static int32_t buffer[2 * {buffer_pairs}];
+static volatile int used = 0;
+static std::terminate_handler next_terminate = 0;
+static void write_all(int file, const char *data, long size) {{
+    while (size > 0) {{
+        long written = CODA_TRACE_WRITE(file, data, size);
+        if (written <= 0) {{
+            return;
+        }}
+        data += written;
+        size -= written;
+    }}
+}}
+static int open_trace() {{
+    const char *path = std::getenv("{variable}");
+    int file = CODA_TRACE_OPEN(path != 0 && *path != 0 ? path : "{default_file}");
+    if (file >= 0) {{
+        const int32_t version = {version};
+        write_all(file, "{magic}", 4);
+        write_all(file, (const char *) &version, sizeof(version));
+    }}
+    return file;
+}}
+static const int file = open_trace();
+// Only async-signal-safe calls, as it also runs in the signal handlers
+static void write_buffer() {{
+    if (file >= 0) {{
+        write_all(file, (const char *) buffer, (long) (used * sizeof(int32_t)));
+    }}
+    used = 0;
+}}
+// The handled signals are blocked meanwhile, so a handler never writes the same pairs again
+static void flush() {{
+#ifndef _WIN32
+    sigset_t signals, previous;
+    sigemptyset(&signals);
+    sigaddset(&signals, SIGABRT);
+    sigaddset(&signals, SIGSEGV);
+    sigaddset(&signals, SIGFPE);
+    sigaddset(&signals, SIGTERM);
+    sigprocmask(SIG_BLOCK, &signals, &previous);
+#endif
+    write_buffer();
+#ifndef _WIN32
+    sigprocmask(SIG_SETMASK, &previous, 0);
+#endif
+}}
+static void finish() {{
+    flush();
+}}
+static void on_signal(int signal) {{
+    write_buffer();
+    std::signal(signal, SIG_DFL);
+    std::raise(signal);
+}}
+static void on_terminate() {{
+    flush();
+    if (next_terminate != 0) {{
+        next_terminate();
+    }}
+    std::abort();
+}}
+static int install() {{
+    std::atexit(finish);
+    std::signal(SIGABRT, on_signal);
+    std::signal(SIGSEGV, on_signal);
+    std::signal(SIGFPE, on_signal);
+    std::signal(SIGTERM, on_signal);
+    next_terminate = std::set_terminate(on_terminate);
+    return 0;
+}}
+static const int installed = install();
+}}
+static inline bool coda_probe(int32_t function, int32_t block) {{
+    int used = coda_trace::used;
+    if (used == 2 * {buffer_pairs}) {{
+        coda_trace::flush();
+        used = 0;
+    }}
+    coda_trace::buffer[used] = function;
+    coda_trace::buffer[used + 1] = block;
+    // A signal handler writes the pair only once both of its values are stored
+    std::atomic_signal_fence(std::memory_order_release);
+    coda_trace::used = used + 2;
+    return true;
+}}
+
+'''.format(buffer_pairs=PROBE_BUFFER_PAIRS, variable=TRACE_FILE_VARIABLE, default_file=DEFAULT_TRACE_FILE,
+           version=BINARY_TRACE_VERSION, magic=BINARY_TRACE_MAGIC.decode('ascii'))
+
+
+def probe_call(function: int, block: int) -> str:
+    """
+    The C++ expression of a probe of `PROBE_RUNTIME`, without a semicolon
+
+    """
+    return 'coda_probe({0}, {1})'.format(function, block)
+
+
+def is_binary_trace_file(path) -> bool:
+    with open(path, 'rb') as trace_file:
+        return trace_file.read(len(BINARY_TRACE_MAGIC)) == BINARY_TRACE_MAGIC
+
+
+class BinaryTraceFile:
+    """
+    A memory-mapped binary trace
+
+    The pairs are read in place, as an (n, 2) int32 array, unless the trace was written on a
+    machine of the other byte order. A trace cut in the middle of a pair, e.g., by a full disk,
+    is read up to its last whole pair.
+
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        size = os.fstat(self.file.fileno()).st_size
+        self.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        if size < BINARY_TRACE_HEADER_SIZE or self.mmap[:len(BINARY_TRACE_MAGIC)] != BINARY_TRACE_MAGIC:
+            self.close()
+            raise ValueError('{0} is not a binary trace'.format(path))
+        version = np.frombuffer(self.mmap, dtype=np.int32, count=1, offset=len(BINARY_TRACE_MAGIC))
+        self.swapped = int(version[0]) != BINARY_TRACE_VERSION
+        if self.swapped and int(version.byteswap()[0]) != BINARY_TRACE_VERSION:
+            self.close()
+            raise ValueError('Unsupported binary trace version in {0}'.format(path))
+        del version
+        self.number_of_pairs = (size - BINARY_TRACE_HEADER_SIZE) // 8
+
+    def pairs(self):
+        """
+        The (function id, block id) pairs, as an (n, 2) int32 array
+
+        Its memory is the mapped trace, so it must be dropped before the trace is closed.
+
+        """
+        pairs = np.frombuffer(self.mmap, dtype=np.int32, count=2 * self.number_of_pairs,
+                              offset=BINARY_TRACE_HEADER_SIZE).reshape(-1, 2)
+        return pairs.byteswap() if self.swapped else pairs
+
+    def __len__(self):
+        return self.number_of_pairs
+
+    def executed_paths(self) -> dict:
+        """
+        Returns:
+
+            The dictionary of the function ids, as strings, to the list of their executed blocks, in order
+
+        """
+        pairs = self.pairs()
+        order = np.argsort(pairs[:, 0], kind='stable')
+        functions = pairs[order, 0]
+        blocks = pairs[order, 1]
+        del pairs
+        starts = np.flatnonzero(np.diff(functions)) + 1
+        return {str(group[0]): blocks_of_function.tolist()
+                for group, blocks_of_function in zip(np.split(functions, starts), np.split(blocks, starts))
+                if len(group)}
+
+    def close(self):
+        if isinstance(self.mmap, mmap.mmap):
+            self.mmap.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
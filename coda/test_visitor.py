@@ -1,32 +1,42 @@
 import argparse
+import sys
 
-from antlr4 import FileStream, CommonTokenStream
-
-from coda.antlr_gen.cpp_parser.CPP14_v2Lexer import CPP14_v2Lexer
-from coda.antlr_gen.cpp_parser.CPP14_v2Parser import CPP14_v2Parser
+from coda.analysis.parse_session import ParseSession, PARSE_MODES
+from coda.analysis.parse_cache import ParseCache, load_or_extract_cfgs
+from coda.analysis.dfa_cache import load_dfa_cache, save_dfa_cache
 from coda.analysis.cfg.cfg_extractor_visitor import CFGExtractorVisitor
+from coda.graph.render import render_sources
 from coda.graph.visual import draw_CFG
 
 
 def main(args):
     file_name = f"../test_source/{args.file}"
-    # Step 1: load the input source into a stream
-    stream = FileStream(file_name, encoding="utf8")
-    # Step 2: create an instance of CPP14_v2Lexer
-    lexer = CPP14_v2Lexer(stream)
-    # Step 3: tokenize the input source into a list of tokens
-    token_stream = CommonTokenStream(lexer)
-    # Step 4: create an instance of CPP14_v2Parser
-    parser = CPP14_v2Parser(token_stream)
-    # step 5: create a parse tree
-    parse_tree = parser.translationunit()
-    # Step 6: create an instance of CFGExtractorVisitor
-    cfg_extractor = CFGExtractorVisitor(token_stream)
-    # Step 7: extract the cfg by visiting the parse_tree
-    cfg_extractor.visit(parse_tree)
-    funcs = cfg_extractor.functions
-    for i, g in enumerate(funcs.values()):
-        draw_CFG(g, f"../test_output/{args.file}{i}", token_stream)
+    if args.dfa_cache:
+        # Start from the prediction DFAs warmed up by the previous runs
+        load_dfa_cache(args.dfa_cache)
+    if args.cache_dir:
+        # Unchanged sources are restored from the parse cache without lexing and parsing
+        with open(file_name, encoding="utf8") as f:
+            source = f.read()
+        token_stream, funcs = load_or_extract_cfgs(source, ParseCache(args.cache_dir), parse_mode=args.parse_mode)
+    else:
+        # Step 1: lex the input source once into a filled token buffer
+        session = ParseSession.from_file(file_name, parse_mode=args.parse_mode)
+        token_stream = session.token_stream
+        # Step 2: create a parse tree
+        parse_tree = session.parse_tree
+        # Step 3: create an instance of CFGExtractorVisitor
+        cfg_extractor = CFGExtractorVisitor(token_stream)
+        # Step 4: extract the cfg by visiting the parse_tree
+        cfg_extractor.visit(parse_tree)
+        funcs = cfg_extractor.functions
+    if args.dfa_cache:
+        save_dfa_cache(args.dfa_cache)
+    sources = [draw_CFG(g, f"../test_output/{args.file}{i}", token_stream) for i, g in enumerate(funcs.values())]
+    if args.render_format:
+        rendered, failed = render_sources(sources, format=args.render_format, jobs=args.jobs)
+        for source_path, error in failed:
+            print('Failed to render {0}: {1}'.format(source_path, error), file=sys.stderr)
     # pps = {extract_exact_text(token_stream, sig): {"nodes": list(cfg.nodes.data()), "edges": list(cfg.edges.data())} for sig, cfg in funcs.items()}
     # from pprint import pprint as print
     # print(pps)
@@ -37,5 +47,20 @@ if __name__ == '__main__':
     arg_parser.add_argument(
         '-n', '--file',
         help='Input source', default="if.cpp")
+    arg_parser.add_argument(
+        '--cache-dir',
+        help='Directory of the persistent parse cache, disabled if not given', default=None)
+    arg_parser.add_argument(
+        '--parse-mode', choices=PARSE_MODES,
+        help='Prediction mode of the parser', default='ll')
+    arg_parser.add_argument(
+        '--dfa-cache',
+        help='File to preload the parser DFAs from and save them to, disabled if not given', default=None)
+    arg_parser.add_argument(
+        '--render-format',
+        help='Format to render the saved CFG sources to, e.g., png or svg; not rendered if empty', default='png')
+    arg_parser.add_argument(
+        '-j', '--jobs', type=int,
+        help='Number of CFGs rendered at the same time, the number of CPUs by default', default=None)
     args = arg_parser.parse_args()
     main(args)